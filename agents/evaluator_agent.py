@@ -1,19 +1,30 @@
-
-from graph_state import GraphState, PerformanceEvaluation
-from tools.market_data_tools import get_mock_market_outcome
+from graph_state import GraphState, PerformanceEvaluation, RawDocument, StrategicSummary
+from tools.market_data_tools import NO_DATA_OUTCOME, get_mock_market_outcome, simulate_market_outcome
+from typing import Dict, List, Optional
 
 class EvaluatorAgent:
     """
     The Evaluator Agent assesses the Strategist's hypothesis against a
     simulated ground truth to score performance.
     """
-    def run(self, state: GraphState) -> dict:
-        print("--- AGENT: Evaluator ---")
-        summary = state["strategic_summaries"][0]
-        raw_documents = state["raw_documents"]
+    def _evaluate_summary(self, summary: StrategicSummary, raw_documents: List[RawDocument],
+                          market_scores: Optional[Dict[str, float]] = None) -> PerformanceEvaluation:
+        """
+        Scores one keyword's hypothesis against the outcome simulated from that
+        keyword's documents, or from their accumulated `market_scores` when the
+        documents were streamed and not kept.
+        """
+        keyword = summary.get("keyword")
+        if keyword:
+            raw_documents = [doc for doc in raw_documents if doc.get("keyword") == keyword]
 
         # 1. Get the simulated "ground truth" outcome
-        simulated_outcome = get_mock_market_outcome.invoke({"raw_documents": raw_documents})
+        if market_scores is not None:
+            asset = keyword or summary["cryptocurrency"]
+            score = market_scores.get(asset)
+            simulated_outcome = NO_DATA_OUTCOME if score is None else simulate_market_outcome(score, keyword=asset)
+        else:
+            simulated_outcome = get_mock_market_outcome.invoke({"raw_documents": raw_documents})
 
         # 2. Evaluate the hypothesis against the outcome
         hypothesis = summary["hypothesis"].lower()
@@ -39,14 +50,29 @@ class EvaluatorAgent:
             result = "Partially Correct"
             notes = "The hypothesis predicted a strong move, but the market was stable."
 
-        evaluation = PerformanceEvaluation(
+        return PerformanceEvaluation(
+            keyword=keyword or summary["cryptocurrency"],
             cryptocurrency=summary["cryptocurrency"],
             hypothesis_tested=summary["hypothesis"],
             simulated_outcome=simulated_outcome,
             evaluation_result=result,
             evaluation_notes=notes
         )
-        
-        return {"evaluation": evaluation}
 
-evaluator_agent = EvaluatorAgent()
\ No newline at end of file
+    def run(self, state: GraphState) -> dict:
+        print("--- AGENT: Evaluator ---")
+        raw_documents = state["raw_documents"]
+        market_scores = None
+        if state.get("stream_aggregates") is not None:
+            market_scores = {keyword: aggregate["market_score"] for keyword, aggregate in state["stream_aggregates"].items()}
+        evaluations = [
+            self._evaluate_summary(summary, raw_documents, market_scores)
+            for summary in state["strategic_summaries"]
+        ]
+        # `evaluation` keeps the first keyword's result for single-keyword callers.
+        return {
+            "evaluation": evaluations[0] if evaluations else None,
+            "evaluations": evaluations,
+        }
+
+evaluator_agent = EvaluatorAgent()
@@ -1,22 +1,120 @@
-
-from graph_state import GraphState, ProcessedDocument
-from tools.nlp_tools import analyze_text_deeply
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+from config import (
+    get_analyst_batch_size,
+    get_analyst_batch_max_retries,
+    get_analyst_max_concurrency,
+    get_local_tier_enabled,
+    get_escalation_threshold,
+    get_dedup_enabled,
+    get_dedup_max_distance,
+)
+from graph_state import GraphState, ProcessedDocument, RawDocument
+from instrumentation import bind_context
+from tools.dedup import plan_deduplication
+from tools.local_sentiment import LocalSentimentScorer, escalation_metrics
+from tools.nlp_tools import analyze_text_deeply, analyze_texts_batch
 
 class IntelligenceAnalystAgent:
     """The Analyst Agent processes raw data to extract sentiment, entities, and topics."""
-    def run(self, state: GraphState) -> dict:
-        print("--- AGENT: Intelligence Analyst ---")
-        raw_documents = state["raw_documents"]
+    def __init__(self, batch_size: Optional[int] = None, max_concurrency: Optional[int] = None,
+                 local_scorer: Optional[LocalSentimentScorer] = None, dedup_max_distance: Optional[int] = None):
+        # None defers to the ANALYST_* settings at run time. Gemini quotas are
+        # enforced by the shared LLM client, so cache hits cost no quota.
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.local_scorer = local_scorer
+        self.dedup_max_distance = dedup_max_distance
+
+    def _get_local_scorer(self) -> Optional[LocalSentimentScorer]:
+        if self.local_scorer is not None:
+            return self.local_scorer
+        if get_local_tier_enabled():
+            return LocalSentimentScorer(escalation_threshold=get_escalation_threshold())
+        return None
+
+    def _analyze_with_llm(self, documents: List[RawDocument]) -> Tuple[List[dict], int]:
+        """Runs the Gemini tier over `documents`. Returns the results in input order and the call count."""
+        batch_size = self.batch_size or get_analyst_batch_size()
+        max_concurrency = self.max_concurrency or get_analyst_max_concurrency()
+
+        units = [documents[start:start + batch_size] for start in range(0, len(documents), batch_size)]
+        if max_concurrency > 1 and len(units) > 1:
+            # Calls are I/O-bound, so threads overlap their latencies; map() keeps input order.
+            with ThreadPoolExecutor(max_workers=min(max_concurrency, len(units)),
+                                    thread_name_prefix="analyst") as executor:
+                unit_results = list(executor.map(bind_context(lambda unit: self._analyze_unit(unit, batch_size)), units))
+        else:
+            unit_results = [self._analyze_unit(unit, batch_size) for unit in units]
+        return [result for results in unit_results for result in results], len(units)
+
+    def _analyze_unit(self, docs: List[RawDocument], batch_size: int) -> List[dict]:
+        """Analyzes one unit of work (a single document or one batch) with one Gemini call."""
+        if batch_size == 1:
+            return [analyze_text_deeply.invoke({"text_content": docs[0]["content"]})]
+        return analyze_texts_batch.invoke({
+            "texts": [doc["content"] for doc in docs],
+            "max_retries": get_analyst_batch_max_retries(),
+        })
+
+    def analyze(self, raw_documents: List[RawDocument]) -> Tuple[List[ProcessedDocument], dict]:
+        """Analyzes `raw_documents`; returns the processed documents in input order and the analyst metrics."""
+        # Near-duplicates are collapsed so only one representative per cluster is analyzed.
+        dedup_plan = None
+        documents = raw_documents
+        max_distance = self.dedup_max_distance
+        if max_distance is None and get_dedup_enabled():
+            max_distance = get_dedup_max_distance()
+        if max_distance is not None:
+            dedup_plan = plan_deduplication(raw_documents, max_distance)
+            documents = [raw_documents[index] for index in dedup_plan.representatives]
+
+        # Tier 1: obvious documents are scored locally; the rest are escalated.
+        nlp_results: List[Optional[dict]] = [None] * len(documents)
+        local_scorer = self._get_local_scorer()
+        escalated = list(range(len(documents)))
+        if local_scorer is not None:
+            escalated = []
+            for index, doc in enumerate(documents):
+                analysis = local_scorer.analyze(doc["content"], doc.get("source"))
+                if local_scorer.should_escalate(analysis):
+                    escalated.append(index)
+                else:
+                    nlp_results[index] = {key: analysis[key] for key in ("sentiment_score", "sentiment_label", "entities", "topic")}
+
+        # Tier 2: Gemini.
+        llm_results, llm_calls = self._analyze_with_llm([documents[index] for index in escalated])
+        for index, nlp_result in zip(escalated, llm_results):
+            nlp_results[index] = nlp_result
+        metrics = escalation_metrics(len(documents), len(escalated), llm_calls)
+        if local_scorer is not None:
+            print(f"Escalated {metrics['escalated']}/{metrics['documents']} documents to Gemini "
+                  f"({metrics['escalation_rate']:.0%}).")
+
+        # Fan the representatives' results back out to every cluster member.
+        cluster_sizes = [1] * len(raw_documents)
+        if dedup_plan is not None:
+            nlp_results = dedup_plan.fan_out(nlp_results)
+            cluster_sizes = dedup_plan.fan_out(dedup_plan.cluster_sizes)
+            print(f"Collapsed {len(raw_documents)} documents into {len(documents)} near-duplicate clusters.")
+        metrics["total_documents"] = len(raw_documents)
+        metrics["unique_documents"] = len(documents)
+
         processed_docs = []
-        for doc in raw_documents:
-            nlp_results = analyze_text_deeply.invoke({"text_content": doc["content"]})
+        for doc, nlp_result, cluster_size in zip(raw_documents, nlp_results, cluster_sizes):
             processed_docs.append(ProcessedDocument(
                 **doc,
-                sentiment_score=nlp_results.get("sentiment_score"),
-                sentiment_label=nlp_results.get("sentiment_label"),
-                topic=nlp_results.get("topic"),
-                entities=nlp_results.get("entities")
+                sentiment_score=nlp_result.get("sentiment_score"),
+                sentiment_label=nlp_result.get("sentiment_label"),
+                topic=nlp_result.get("topic"),
+                entities=list(nlp_result.get("entities") or []),
+                cluster_size=cluster_size
             ))
-        return {"processed_documents": processed_docs}
+        return processed_docs, metrics
+
+    def run(self, state: GraphState) -> dict:
+        print("--- AGENT: Intelligence Analyst ---")
+        processed_docs, metrics = self.analyze(state["raw_documents"])
+        return {"processed_documents": processed_docs, "analyst_metrics": metrics}
 
-intelligence_analyst_agent = IntelligenceAnalystAgent()
\ No newline at end of file
+intelligence_analyst_agent = IntelligenceAnalystAgent()
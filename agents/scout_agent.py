@@ -1,21 +1,108 @@
-
 #from cryptosentinator.graph_state import GraphState, RawDocument      ---- test
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Tuple
+from config import get_scout_max_concurrency, get_scout_source_timeout_seconds
 from graph_state import GraphState, RawDocument
+from instrumentation import bind_context
 from tools.web_search_tools import search_x_mock, search_reddit_mock, search_news_mock
 
 class ScoutAgent:
     """The Scout Agent is responsible for gathering raw intelligence from various sources."""
-    def run(self, state: GraphState) -> dict:
-        print("--- AGENT: Scout ---")
-        keywords = state["keywords"]
-        all_raw_docs = []
+    def __init__(self, max_concurrency: Optional[int] = None, source_timeout: Optional[float] = None):
+        # None defers to the SCOUT_* settings at run time.
+        self.max_concurrency = max_concurrency
+        self.source_timeout = source_timeout
+
+    def _source_calls(self, keyword: str) -> List[tuple]:
+        # This agent could have more complex logic to choose sources, but for now, it hits all.
+        return [
+            ("X", search_x_mock, {"keyword": keyword, "count": 2}),
+            ("Reddit", search_reddit_mock, {"keyword": keyword, "count": 1}),
+            ("News", search_news_mock, {"keyword": keyword, "count": 1}),
+        ]
+
+    def _calls(self, keywords: List[str]) -> List[tuple]:
+        calls = []
         for keyword in keywords:
             print(f"Scouting for keyword: {keyword}")
-            # This agent could have more complex logic to choose sources, but for now, it hits all.
-            all_raw_docs.extend(search_x_mock.invoke({"keyword": keyword, "count": 2}))
-            all_raw_docs.extend(search_reddit_mock.invoke({"keyword": keyword, "count": 1}))
-            all_raw_docs.extend(search_news_mock.invoke({"keyword": keyword, "count": 1}))
-        
+            calls.extend((keyword, *call) for call in self._source_calls(keyword))
+        return calls
+
+    def _run_searches(self, calls: List[tuple]) -> Iterator[Tuple[int, Optional[Future]]]:
+        """
+        Runs the searches at most `max_concurrency` at a time and yields
+        (index into `calls`, future) as each one settles; the future is None
+        when the search outlived its own timeout, counted from when it started.
+        A timed-out search gives up its slot, so the searches queued behind
+        it still get their full timeout.
+        """
+        max_concurrency = max(1, self.max_concurrency or get_scout_max_concurrency())
+        source_timeout = self.source_timeout or get_scout_source_timeout_seconds()
+        # One thread per search: a hung search keeps its thread, not a slot.
+        executor = ThreadPoolExecutor(max_workers=len(calls), thread_name_prefix="scout")
+        queued = deque(enumerate(calls))
+        running: Dict[Future, Tuple[int, float]] = {}
+        try:
+            while queued or running:
+                while queued and len(running) < max_concurrency:
+                    index, (_, _, source_tool, args) = queued.popleft()
+                    future = executor.submit(bind_context(source_tool.invoke), args)
+                    running[future] = (index, time.monotonic() + source_timeout)
+                next_deadline = min(deadline for _, deadline in running.values())
+                done, _ = wait(running, timeout=max(0.0, next_deadline - time.monotonic()),
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield running.pop(future)[0], future
+                now = time.monotonic()
+                # A search that finished while the caller was busy is not late.
+                expired = [f for f, (_, deadline) in running.items() if deadline <= now and not f.done()]
+                for future in expired:
+                    yield running.pop(future)[0], None
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _documents(call: tuple, future: Optional[Future]) -> Optional[List[Dict]]:
+        """The search's documents, or None (after logging) if it timed out or failed."""
+        keyword, source_name = call[0], call[1]
+        if future is None:
+            print(f"Source {source_name} timed out for '{keyword}'. Continuing with partial results.")
+            return None
+        if future.exception() is not None:
+            print(f"Source {source_name} failed for '{keyword}': {future.exception()}. Continuing with partial results.")
+            return None
+        return future.result()
+
+    def run(self, state: GraphState) -> dict:
+        print("--- AGENT: Scout ---")
+        calls = self._calls(state["keywords"])
+        if not calls:
+            return {"raw_documents": []}
+
+        # Fan out across every (keyword, source) pair so one slow source does not
+        # hold up the others; results keep the order of the calls.
+        results: Dict[int, List[Dict]] = {}
+        for index, future in self._run_searches(calls):
+            docs = self._documents(calls[index], future)
+            if docs is not None:
+                results[index] = docs
+        all_raw_docs = [doc for index in sorted(results) for doc in results[index]]
         return {"raw_documents": [RawDocument(**doc) for doc in all_raw_docs]}
 
-scout_agent = ScoutAgent()
\ No newline at end of file
+    def iter_documents(self, keywords: List[str]) -> Iterator[List[RawDocument]]:
+        """
+        Streaming variant of `run`: yields each search's documents as soon as
+        that search finishes. Each search has its own timeout from when it
+        starts; one that finished while the consumer was busy is still used.
+        """
+        calls = self._calls(keywords)
+        if not calls:
+            return
+        for index, future in self._run_searches(calls):
+            docs = self._documents(calls[index], future)
+            if docs is not None:
+                yield [RawDocument(**doc) for doc in docs]
+
+scout_agent = ScoutAgent()
@@ -1,15 +1,33 @@
 from langchain_core.tools import tool
-from config import get_gemini_api_key
-from langchain_core.prompts import ChatPromptTemplate
-import google.generativeai as genai
-from graph_state import GraphState, StrategicSummary
+from llm_client import get_llm_client
+from graph_state import GraphState, ProcessedDocument, StrategicSummary
+from instrumentation import bind_context
+from config import get_prompt_max_evidence_tokens, get_strategist_max_concurrency
 from tools.market_data_tools import get_mock_crypto_price_data
+from tools.aggregation import aggregate_documents
+from tools.prompt_builder import PromptTemplate, truncate_to_tokens
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 import json
+import math
 import re
 
 
-genai.configure(api_key=get_gemini_api_key())
-model = genai.GenerativeModel('gemini-2.0-flash')
+model = get_llm_client('gemini-2.0-flash')
+
+# The task comes before the per-keyword data so every strategist call shares the same prefix.
+STRATEGIST_PROMPT = PromptTemplate("strategist", (
+    "You are a crypto market strategist. Based on the provided data, formulate a strategic summary.\n\n"
+    "**Your Task:**\n"
+    "Generate a JSON object with the following structure:\n"
+    '- "cryptocurrency": The name of the crypto.\n'
+    '- "hypothesis": A clear, one-sentence hypothesis about the potential market movement.\n'
+    '- "confidence": Your confidence in this hypothesis (\'High\', \'Medium\', or \'Low\').\n'
+    '- "reasoning": A 2-3 sentence explanation for your hypothesis, linking the sentiment, topics, and market data.\n'
+    '- "supporting_evidence": A list of 2-3 key strings from the evidence that support your reasoning.\n\n'
+    "Respond ONLY with the JSON object.\n\n"
+    "**Input Data:**\n"
+))
 
 def extract_json_from_response(response_text: str) -> dict:
     """Extracts the first JSON object found in a string."""
@@ -22,23 +40,34 @@ def extract_json_from_response(response_text: str) -> dict:
         print(f"Error extracting JSON: {e}")
         return {}
 
+def _finite_or_zero(value: Optional[float]) -> float:
+    """Aggregates are NaN for keywords without scored documents; prompts show those as 0."""
+    return value if value is not None and math.isfinite(value) else 0.0
+
 class StrategistAgent:
     """
     The Strategist Agent synthesizes processed data and market info to form a
     strategic hypothesis about market trends.
     """
-    def run(self, state: GraphState) -> dict:
-        print("--- AGENT: Strategist ---")
-        processed_documents = state["processed_documents"]
-        keyword = state["keywords"][0]  # For simplicity, focus on the first keyword for the summary
-
-        # 1. Summarize sentiment and topics
-        avg_sentiment = (
-            sum(doc["sentiment_score"] for doc in processed_documents if doc["sentiment_score"] is not None) / len(processed_documents)
-            if processed_documents else 0.0
+    def _summarize_keyword(self, keyword: str, processed_documents: List[ProcessedDocument],
+                           aggregate: Optional[Dict] = None) -> Optional[StrategicSummary]:
+        """Forms the strategic summary for one keyword from that keyword's documents only."""
+        # 1. Summarize sentiment and topics (precomputed, vectorized aggregates)
+        aggregate = aggregate or {}
+        avg_sentiment = _finite_or_zero(aggregate.get("sentiment_mean"))
+        sentiment_std = _finite_or_zero(aggregate.get("sentiment_variance")) ** 0.5
+        decayed_sentiment = _finite_or_zero(aggregate.get("decayed_sentiment"))
+        topic_summary = ", ".join(aggregate.get("topics", {}))
+        source_summary = ", ".join(
+            f"{source} {_finite_or_zero(stats['mean']):.2f} (n={stats['count']})"
+            for source, stats in aggregate.get("by_source", {}).items()
         )
-        topics = [doc["topic"] for doc in processed_documents if doc.get("topic")]
-        topic_summary = ", ".join(list(set(topics)))
+        entity_summary = ", ".join(aggregate.get("entities", {}))
+        window_summary = ", ".join(
+            f"{window} {_finite_or_zero(stats['sentiment_mean']):.2f} (n={stats['documents']})"
+            for window, stats in aggregate.get("windows", {}).items()
+        )
+        window_line = f"- Rolling-Window Sentiment: {window_summary}\n" if window_summary else ""
 
         # 2. Get market context
         market_data = get_mock_crypto_price_data.invoke({"cryptocurrency_symbol": keyword})
@@ -46,28 +75,27 @@ class StrategistAgent:
         change = market_data.get("24h_change_percent")
 
         # 3. Prepare evidence
-        evidence_snippets = [
-            f"'{doc['content'][:70]}...' (Topic: {doc.get('topic')}, Sentiment: {doc.get('sentiment_score', 0):.2f})"
-            for doc in processed_documents[:3]
-        ]
+        max_evidence_tokens = get_prompt_max_evidence_tokens()
+        evidence_snippets, truncated = [], 0
+        for doc in processed_documents[:3]:
+            content, cut = truncate_to_tokens(doc['content'], max_evidence_tokens)
+            truncated += cut
+            evidence_snippets.append(
+                f"'{content}' (Topic: {doc.get('topic')}, Sentiment: {doc.get('sentiment_score') or 0:.2f})"
+            )
 
         # 4. Use Gemini to generate a strategic summary
-        prompt = (
-            "You are a crypto market strategist. Based on the provided data, formulate a strategic summary.\n\n"
-            "**Input Data:**\n"
+        prompt = STRATEGIST_PROMPT.render(
             f"- Cryptocurrency: {keyword}\n"
-            f"- Average Sentiment Score: {avg_sentiment:.2f} (from -1 to 1)\n"
-            f"- Dominant Discussion Topics: {topic_summary}\n"
+            f"- Average Sentiment Score: {avg_sentiment:.2f} (from -1 to 1, std dev {sentiment_std:.2f})\n"
+            f"- Recency-Weighted Sentiment Score: {decayed_sentiment:.2f}\n"
+            f"- Sentiment by Source: {source_summary}\n"
+            f"- Dominant Discussion Topics (most frequent first): {topic_summary}\n"
+            f"- Most Mentioned Entities: {entity_summary}\n"
+            f"{window_line}"
             f"- Current Market Data: Price ${price}, 24h Change {change}%\n"
-            f"- Key Data Points (Evidence): {evidence_snippets}\n\n"
-            "**Your Task:**\n"
-            "Generate a JSON object with the following structure:\n"
-            '- "cryptocurrency": The name of the crypto.\n'
-            '- "hypothesis": A clear, one-sentence hypothesis about the potential market movement.\n'
-            '- "confidence": Your confidence in this hypothesis (\'High\', \'Medium\', or \'Low\').\n'
-            '- "reasoning": A 2-3 sentence explanation for your hypothesis, linking the sentiment, topics, and market data.\n'
-            '- "supporting_evidence": A list of 2-3 key strings from the evidence that support your reasoning.\n\n'
-            "Respond ONLY with the JSON object."
+            f"- Key Data Points (Evidence): {evidence_snippets}\n",
+            truncated=truncated,
         )
 
         try:
@@ -80,9 +108,37 @@ class StrategistAgent:
                 raise ValueError("Gemini response missing required keys.")
             if not isinstance(summary_json["supporting_evidence"], list):
                 summary_json["supporting_evidence"] = [str(summary_json["supporting_evidence"])]
-            return {"strategic_summaries": [StrategicSummary(**summary_json)]}
+            summary_json["keyword"] = keyword
+            return StrategicSummary(**summary_json)
         except Exception as e:
-            print(f"Error in strategist agent: {e}. Returning empty summary.")
-            return {"strategic_summaries": []}
+            print(f"Error in strategist agent for '{keyword}': {e}. Returning empty summary.")
+            return None
+
+    def run(self, state: GraphState) -> dict:
+        print("--- AGENT: Strategist ---")
+        # Incremental runs narrow this down to the keywords whose sentiment moved.
+        keywords = list(dict.fromkeys(state.get("strategist_keywords") or state["keywords"]))
+        documents_by_keyword: Dict[str, List[ProcessedDocument]] = {keyword: [] for keyword in keywords}
+        for doc in state["processed_documents"]:
+            if doc.get("keyword") in documents_by_keyword:
+                documents_by_keyword[doc["keyword"]].append(doc)
+        # Streaming runs keep only a few evidence documents and hand over running aggregates instead.
+        aggregates = state.get("stream_aggregates")
+        if aggregates is None:
+            aggregates = aggregate_documents(state["processed_documents"])
+        # Copies: the graph state's aggregates are reused across runs and must not change here.
+        aggregates = {keyword: dict(aggregate) for keyword, aggregate in aggregates.items()}
+        for keyword, windows in (state.get("window_aggregates") or {}).items():
+            if keyword in aggregates:
+                aggregates[keyword]["windows"] = windows
+
+        # One Gemini call per keyword, run concurrently; map() keeps the keyword order.
+        max_workers = min(get_strategist_max_concurrency(), len(keywords)) or 1
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="strategist") as executor:
+            summaries = list(executor.map(
+                bind_context(lambda keyword: self._summarize_keyword(keyword, documents_by_keyword[keyword], aggregates.get(keyword))),
+                keywords
+            ))
+        return {"strategic_summaries": [summary for summary in summaries if summary is not None]}
 
 strategist_agent = StrategistAgent()
\ No newline at end of file
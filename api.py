@@ -1,19 +1,7 @@
-import requests
-import json
+from llm_client import get_llm_client
 
-url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key=GEMINI_API_KEY"
-headers = {'Content-Type': 'application/json'}
-data = {
-    "contents": [
-        {
-            "parts": [
-                {
-                    "text": "Explain how AI works in a few words"
-                }
-            ]
-        }
-    ]
-}
-
-response = requests.post(url, headers=headers, data=json.dumps(data))
-print(response.text)
\ No newline at end of file
+# Smoke test of the shared Gemini client (reads GEMINI_API_KEY / GEMINI_API_BASE_URL).
+client = get_llm_client("gemini-2.0-flash")
+response = client.generate_content("Explain how AI works in a few words")
+print(response.text)
+print(client.stats())
@@ -1,7 +1,35 @@
 # app.py
 
+import threading
+from typing import Optional
+
 import gradio as gr
-from interactive_pipeline import create_interactive_pipeline
+from config import get_metrics_host, get_metrics_port, get_trusted_proxies
+from instrumentation import start_metrics_server
+from interactive_pipeline import create_interactive_pipeline, stream_interactive_pipeline, warm_up
+
+
+def _tenant(request: gr.Request) -> Optional[str]:
+    """
+    Fairness key of a request: the client IP. The X-Tenant-Id header is only
+    honoured from TRUSTED_PROXIES; from anyone else, a fresh id per request
+    would get around the per-tenant queue limit.
+    """
+    if request is None:
+        return None
+    host = request.client.host if request.client else None
+    if host in get_trusted_proxies():
+        return request.headers.get("x-tenant-id") or host
+    return host
+
+
+def analyze(keywords: str, request: gr.Request):
+    yield from stream_interactive_pipeline(keywords, tenant=_tenant(request))
+
+
+def analyze_example(keywords: str, request: gr.Request) -> str:
+    return create_interactive_pipeline(keywords, tenant=_tenant(request))
+
 
 # Define the Gradio interface using Blocks for more control
 with gr.Blocks(theme=gr.themes.Soft(), title="CryptoSentinator v2") as demo:
@@ -41,12 +69,16 @@ with gr.Blocks(theme=gr.themes.Soft(), title="CryptoSentinator v2") as demo:
     
     output_report = gr.Markdown(label="Analysis Report")
     
-    # Define the click action
+    # Define the click action. The generator streams partial reports after each
+    # agent; API clients of "analyze" receive them as server-sent events.
+    # Runs go through the bounded job queue, which does the admission control,
+    # so Gradio itself does not limit how many handlers wait on it.
     analyze_button.click(
-        fn=create_interactive_pipeline,
+        fn=analyze,
         inputs=keyword_input,
         outputs=output_report,
-        api_name="analyze" # Exposes this as an API endpoint
+        api_name="analyze", # Exposes this as an API endpoint
+        concurrency_limit=None,
     )
     
     # Add examples for users to try
@@ -58,10 +90,16 @@ with gr.Blocks(theme=gr.themes.Soft(), title="CryptoSentinator v2") as demo:
         ],
         inputs=keyword_input,
         outputs=output_report,
-        fn=create_interactive_pipeline,
+        fn=analyze_example,
         cache_examples=False, # Set to True for faster demo, but may show stale data
     )
 
 # Launch the interface
 if __name__ == "__main__":
+    # The UI starts serving right away; LangGraph and the agents load in the
+    # background so the first request usually finds the pipeline compiled.
+    threading.Thread(target=warm_up, name="pipeline-warm-up", daemon=True).start()
+    if get_metrics_port():
+        start_metrics_server(get_metrics_port(), get_metrics_host())
+        print(f"Prometheus metrics on http://{get_metrics_host()}:{get_metrics_port()}/metrics")
     demo.launch(share=True)
\ No newline at end of file
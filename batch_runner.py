@@ -0,0 +1,206 @@
+"""
+Offline sweeps: runs the pipeline once per keyword over a keyword file (or
+stdin) with bounded concurrency and appends one JSON line per keyword.
+
+The output file is also the checkpoint: keywords that already have a
+successful line are skipped when the sweep is started again, so an
+interrupted sweep resumes where it stopped. Failed keywords, including runs
+that ended without a strategic summary, are retried.
+Every run in the process shares the Gemini rate limiter, so
+GEMINI_MAX_QPS / GEMINI_MAX_RPM bound the whole sweep, not each worker.
+
+    python -m batch_runner tickers.txt --output sweep.jsonl --concurrency 8
+    cat tickers.txt | python -m batch_runner - --output sweep.jsonl
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, Set, TextIO
+
+from config import get_batch_concurrency, get_storage_enabled
+from instrumentation import bind_context, start_span
+
+
+def read_keywords(lines: Iterable[str]) -> List[str]:
+    """Keywords one per line (or comma-separated), without blanks, '#' comments and repeats."""
+    keywords, seen = [], set()
+    for line in lines:
+        for keyword in line.split("#", 1)[0].split(","):
+            keyword = keyword.strip()
+            if keyword and keyword.casefold() not in seen:
+                seen.add(keyword.casefold())
+                keywords.append(keyword)
+    return keywords
+
+
+def completed_keywords(path: str) -> Set[str]:
+    """Keywords with a successful result in an earlier run's output (case-folded)."""
+    done: Set[str] = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # a line cut short when the previous sweep was killed
+            if record.get("status") == "ok":
+                done.add(record["keyword"].casefold())
+    return done
+
+
+class ResultWriter:
+    """Appends result lines from several threads; each line is on disk before the next keyword is reported done."""
+    def __init__(self, path: str, resume: bool):
+        if resume and os.path.exists(path) and os.path.getsize(path):
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b"\n"
+        else:
+            needs_newline = False
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file: TextIO = open(path, "a" if resume else "w", encoding="utf-8")
+        if needs_newline:
+            self._file.write("\n")
+        self._lock = threading.Lock()
+
+    def write(self, record: Dict) -> None:
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def _error_record(keyword: str, error: str, started: float, start: float) -> Dict:
+    return {"keyword": keyword, "status": "error", "error": error,
+            "started_at": datetime.datetime.fromtimestamp(started).isoformat(timespec="seconds"),
+            "seconds": round(time.perf_counter() - start, 3)}
+
+
+def run_keyword(app, keyword: str, pipeline: Optional[str] = None) -> Dict:
+    """One pipeline run for `keyword`, as a JSON-serializable result record."""
+    from checkpointing import CheckpointedRun, run_id_for
+
+    started = time.time()
+    start = time.perf_counter()
+    try:
+        with start_span("batch keyword", keyword=keyword):
+            run = CheckpointedRun(app, {"keywords": [keyword]}, run_id_for([keyword], "batch", pipeline))
+            final_state = run.invoke()
+    except Exception as e:
+        return _error_record(keyword, str(e), started, start)
+    # The strategist logs and swallows Gemini failures (timeouts, an exhausted token
+    # budget), so a run can finish without the summary it was for. Incremental runs
+    # legitimately skip keywords whose sentiment did not move.
+    expected = final_state.get("strategist_keywords")
+    if (expected is None or keyword in expected) and not final_state.get("strategic_summaries"):
+        return _error_record(keyword, "The run produced no strategic summary.", started, start)
+    if get_storage_enabled():
+        from storage import persist_run
+        persist_run(final_state)
+    return {
+        "keyword": keyword,
+        "status": "ok",
+        "started_at": datetime.datetime.fromtimestamp(started).isoformat(timespec="seconds"),
+        "seconds": round(time.perf_counter() - start, 3),
+        "documents": len(final_state.get("processed_documents") or []),
+        "strategic_summaries": final_state.get("strategic_summaries") or [],
+        "evaluations": final_state.get("evaluations") or [],
+        "analyst_metrics": final_state.get("analyst_metrics"),
+    }
+
+
+def run_batch(keywords: List[str], output: str, concurrency: Optional[int] = None, pipeline: Optional[str] = None,
+              resume: bool = True, app=None, log=print) -> Dict:
+    """
+    Runs every keyword not already completed in `output` and appends its
+    result. Returns the sweep's totals: keywords run, skipped and failed,
+    wall time, keywords per minute and per-keyword seconds.
+    """
+    concurrency = concurrency or get_batch_concurrency()
+    if app is None:
+        from pipeline import get_compiled_pipeline
+        app = get_compiled_pipeline(pipeline)
+    done = completed_keywords(output) if resume else set()
+    pending = [keyword for keyword in keywords if keyword.casefold() not in done]
+    if done:
+        log(f"Resuming: {len(keywords) - len(pending)} of {len(keywords)} keywords already completed.")
+
+    writer = ResultWriter(output, resume)
+    timings: Dict[str, float] = {}
+    failed: List[str] = []
+    start = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(pending))), thread_name_prefix="batch")
+    futures = []
+    written = set()
+    try:
+        futures = [executor.submit(bind_context(run_keyword), app, keyword, pipeline) for keyword in pending]
+        for finished, future in enumerate(as_completed(futures), start=1):
+            record = future.result()
+            writer.write(record)
+            written.add(future)
+            timings[record["keyword"]] = record["seconds"]
+            if record["status"] != "ok":
+                failed.append(record["keyword"])
+            elapsed = time.perf_counter() - start
+            log(f"[{finished}/{len(pending)}] {record['keyword']}: {record['status']} in {record['seconds']:.1f}s "
+                f"({finished / elapsed * 60:.1f} keywords/min)")
+    finally:
+        # On Ctrl-C, queued keywords are dropped, but the ones already running are
+        # waited for and their results written rather than thrown away.
+        executor.shutdown(wait=True, cancel_futures=True)
+        for future in futures:
+            if future not in written and future.done() and not future.cancelled():
+                writer.write(future.result())
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "keywords": len(keywords),
+        "skipped": len(keywords) - len(pending),
+        "completed": len(timings) - len(failed),
+        "failed": failed,
+        "seconds": elapsed,
+        "keywords_per_minute": len(timings) / elapsed * 60 if elapsed > 0 else 0.0,
+        "timings": timings,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("keywords", help="File with one keyword per line, or '-' for stdin.")
+    parser.add_argument("--output", required=True, help="JSON Lines file receiving one result per keyword.")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="Keywords run at once (default: BATCH_CONCURRENCY).")
+    parser.add_argument("--pipeline", default=None, help="Pipeline configuration (default: SENTINATOR_PIPELINE).")
+    parser.add_argument("--restart", action="store_true",
+                        help="Ignore earlier results in --output and run every keyword again.")
+    args = parser.parse_args(argv)
+
+    if args.keywords == "-":
+        keywords = read_keywords(sys.stdin)
+    else:
+        with open(args.keywords, encoding="utf-8") as f:
+            keywords = read_keywords(f)
+    summary = run_batch(keywords, args.output, args.concurrency, args.pipeline, resume=not args.restart)
+
+    print(f"\n{summary['completed']} completed, {len(summary['failed'])} failed, {summary['skipped']} skipped "
+          f"in {summary['seconds']:.1f}s ({summary['keywords_per_minute']:.1f} keywords/min)")
+    for keyword, seconds in sorted(summary["timings"].items(), key=lambda item: -item[1]):
+        print(f"  {keyword:<24} {seconds:8.1f}s{'  FAILED' if keyword in summary['failed'] else ''}")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
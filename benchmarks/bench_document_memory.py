@@ -0,0 +1,81 @@
+"""
+Microbenchmark: per-document memory of processed documents held as
+TypedDicts, as slotted CompactDocuments and as one columnar DocumentBatch,
+plus the cost of converting back to the TypedDict shape.
+
+Documents are decoded from JSON lines, as they would arrive from a source
+or a corpus file, so every field starts out as its own string object.
+
+Run from the project root:
+    python -m benchmarks.bench_document_memory --documents 100000
+"""
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+
+from compact_documents import CompactDocument, DocumentBatch
+from tools.synthetic_data import SyntheticDataGenerator
+
+
+def _lines(documents: int, seed: int) -> list:
+    rng = random.Random(seed)
+    raw = SyntheticDataGenerator(seed=seed).generate(documents)
+    return [json.dumps(dict(
+        doc,
+        sentiment_score=round(rng.uniform(-1, 1), 3),
+        sentiment_label=rng.choice(["Positive", "Negative", "Neutral"]),
+        topic=rng.choice(["Price Action", "Regulation", "Adoption", "Technology"]),
+        entities=rng.sample(["BTC", "ETH", "SEC", "Binance", "ETF"], rng.randrange(3)),
+        cluster_size=1,
+    )) for doc in raw]
+
+
+def _retained_bytes(build) -> tuple:
+    """Bytes still allocated after `build()` returns, and the built object."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, result
+
+
+def _timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run(documents: int, seed: int = 42) -> dict:
+    lines = _lines(documents, seed)
+    dict_bytes, dicts = _retained_bytes(lambda: [json.loads(line) for line in lines])
+    compact_bytes, compact = _retained_bytes(lambda: [CompactDocument.from_dict(json.loads(line)) for line in lines])
+    batch_bytes, batch = _retained_bytes(lambda: DocumentBatch.from_documents([json.loads(line) for line in lines]))
+    return {
+        "documents": documents,
+        "typeddict_bytes_per_document": dict_bytes / documents,
+        "compact_bytes_per_document": compact_bytes / documents,
+        "batch_bytes_per_document": batch_bytes / documents,
+        "compact_from_dicts_seconds": _timed(lambda: [CompactDocument.from_dict(doc) for doc in dicts]),
+        "compact_to_dicts_seconds": _timed(lambda: [doc.to_dict() for doc in compact]),
+        "batch_from_dicts_seconds": _timed(lambda: DocumentBatch.from_documents(dicts)),
+        "batch_to_dicts_seconds": _timed(batch.to_documents),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=100_000, help="Number of processed documents.")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    results = run(args.documents, args.seed)
+    typeddict = results["typeddict_bytes_per_document"]
+    print(f"TypedDict:       {typeddict:8.0f} bytes/document")
+    for name, key in (("CompactDocument", "compact"), ("DocumentBatch", "batch")):
+        size = results[f"{key}_bytes_per_document"]
+        print(f"{name + ':':16} {size:8.0f} bytes/document ({size / typeddict:.0%}), "
+              f"from dicts {results[f'{key}_from_dicts_seconds']:.3f} s, to dicts {results[f'{key}_to_dicts_seconds']:.3f} s")
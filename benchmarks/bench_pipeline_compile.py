@@ -0,0 +1,41 @@
+"""
+Microbenchmark: per-request overhead of building and compiling the LangGraph
+workflow versus reusing the cached compiled app.
+
+Run from the project root:
+    python -m benchmarks.bench_pipeline_compile --requests 200
+"""
+import argparse
+import time
+
+from pipeline import build_sentinator_workflow, clear_pipeline_cache, get_compiled_pipeline
+
+
+def _time_per_request(fn, requests: int) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        fn()
+    return (time.perf_counter() - start) / requests
+
+
+def run(requests: int) -> dict:
+    clear_pipeline_cache()
+    before = _time_per_request(lambda: build_sentinator_workflow().compile(), requests)
+    get_compiled_pipeline()  # the first request pays for compilation once
+    after = _time_per_request(get_compiled_pipeline, requests)
+    return {
+        "requests": requests,
+        "compile_per_request_ms": before * 1000,
+        "cached_per_request_ms": after * 1000,
+        "speedup": before / after if after else float("inf"),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="Number of simulated requests.")
+    args = parser.parse_args()
+    results = run(args.requests)
+    print(f"Build + compile per request: {results['compile_per_request_ms']:.3f} ms")
+    print(f"Cached compiled app:         {results['cached_per_request_ms']:.5f} ms")
+    print(f"Speedup:                     {results['speedup']:.0f}x")
@@ -0,0 +1,145 @@
+"""
+Local stand-in for the Gemini generateContent REST endpoint.
+
+Replies are deterministic: analysis prompts are scored with the local lexicon
+scorer and strategist prompts get a fixed-shape summary, so the whole
+pipeline can run against it without network access or an API key.
+
+Run standalone with `python -m benchmarks.gemini_stub --port 8089` and point
+the pipeline at it with GEMINI_API_BASE_URL=http://127.0.0.1:8089/v1beta.
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional
+
+from tools.lexicon_scorer import lexicon_sentiment_result
+
+_CRYPTOCURRENCY = re.compile(r"- Cryptocurrency: (.+)")
+
+
+def _analysis(text: str) -> dict:
+    result = lexicon_sentiment_result(text)
+    result["entities"] = re.findall(r"#(\w+)", text)[:3]
+    result["topic"] = "General Market Trend"
+    return result
+
+
+def default_responder(prompt: str) -> str:
+    """Deterministic reply text for the analyst and strategist prompts."""
+    if "Documents to analyze" in prompt:
+        replies = []
+        for line in prompt.split("Documents to analyze (one JSON object per line):\n", 1)[-1].splitlines():
+            try:
+                document = json.loads(line)
+            except ValueError:
+                continue
+            replies.append({"id": document["id"], **_analysis(document["text"])})
+        return json.dumps(replies)
+    if "crypto market strategist" in prompt:
+        match = _CRYPTOCURRENCY.search(prompt)
+        name = match.group(1).strip() if match else "Unknown"
+        return json.dumps({
+            "cryptocurrency": name,
+            "hypothesis": f"{name} is likely to trade sideways in the short term.",
+            "confidence": "Medium",
+            "reasoning": "Stub reply generated from the aggregated sentiment.",
+            "supporting_evidence": ["stub evidence"],
+        })
+    return json.dumps(_analysis(prompt.split("Text to analyze:", 1)[-1].strip()))
+
+
+class GeminiStubServer:
+    """
+    Threaded HTTP server speaking the generateContent wire format. `latency`
+    delays every reply; `failures` lists HTTP statuses returned, in order, by
+    the first requests before normal replies start.
+    """
+    def __init__(self, responder: Callable[[str], str] = default_responder, latency: float = 0.0,
+                 failures: Optional[List[int]] = None, host: str = "127.0.0.1", port: int = 0):
+        self.responder = responder
+        self.latency = latency
+        self.failures = list(failures or [])
+        self.requests = 0
+        self.client_ports: List[int] = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1beta"
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so clients can reuse connections
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with stub._lock:
+                    stub.requests += 1
+                    stub.client_ports.append(self.client_address[1])
+                    failure = stub.failures.pop(0) if stub.failures else None
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if failure is not None:
+                    self._reply(failure, {"error": {"code": failure, "message": "stub failure"}})
+                    return
+                prompt = "".join(part.get("text", "") for part in body["contents"][0]["parts"])
+                text = stub.responder(prompt)
+                self._reply(200, {
+                    "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}}],
+                    "usageMetadata": {
+                        "promptTokenCount": len(prompt) // 4,
+                        "candidatesTokenCount": len(text) // 4,
+                        "totalTokenCount": (len(prompt) + len(text)) // 4,
+                    },
+                })
+
+            def _reply(self, status: int, payload: dict):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "GeminiStubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="gemini-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "GeminiStubServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a local Gemini stub.")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every reply.")
+    args = parser.parse_args()
+    server = GeminiStubServer(latency=args.latency, port=args.port)
+    print(f"Gemini stub listening on {server.base_url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
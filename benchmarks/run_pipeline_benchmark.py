@@ -0,0 +1,262 @@
+"""
+End-to-end benchmark of the compiled agent pipeline.
+
+Drives the real graph (analyst, strategist, evaluator) over a seeded
+synthetic corpus per size (tools.synthetic_data). A deterministic fake LLM
+with injected latency stands in for Gemini. Each size runs in a fresh
+process, so peak RSS is measured per size. Reports per-node wall time, documents/sec, peak RSS and
+LLM calls per document, and writes everything as JSON for comparison across
+commits.
+
+Run from the project root:
+    python -m benchmarks.run_pipeline_benchmark --sizes 1,100,10000 --batch-size 20 --concurrency 8
+    python -m benchmarks.run_pipeline_benchmark --sizes 100 --compare benchmarks/results/pipeline-abc123.json
+
+Analyst settings (ANALYST_BATCH_SIZE, ANALYST_LOCAL_TIER_ENABLED, ...) are
+read from the environment as usual; the flags below are shortcuts for them.
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+from benchmarks.gemini_stub import default_responder
+from tools.synthetic_data import CHUNK_SIZE, SyntheticDataGenerator, read_jsonl
+
+DEFAULT_SIZES = "1,100"
+DEFAULT_KEYWORDS = "Bitcoin,Ethereum,Solana"
+SETTINGS_ENV = (
+    "ANALYST_BATCH_SIZE", "ANALYST_MAX_CONCURRENCY", "ANALYST_LOCAL_TIER_ENABLED", "ANALYST_DEDUP_ENABLED",
+    "NLP_CACHE_ENABLED", "STRATEGIST_MAX_CONCURRENCY", "MOCK_DATA_SEED", "STREAM_QUEUE_SIZE", "STREAM_WORKERS",
+    "STREAM_CHUNK_SIZE",
+)
+BASE_TIME = "2024-01-01T00:00:00"
+
+
+def iter_corpus(size: int, keywords: List[str], seed: int = 42, corpus_path: Optional[str] = None) -> Iterator[List[Dict]]:
+    """
+    `size` seeded synthetic documents spread over `keywords`, or the first
+    `size` documents of a JSONL corpus written by tools.synthetic_data, in chunks.
+    """
+    if not corpus_path:
+        yield from SyntheticDataGenerator(seed=seed, keywords=keywords, end=BASE_TIME).iter_documents(size)
+        return
+    documents = itertools.islice(read_jsonl(corpus_path), size)
+    while True:
+        chunk = list(itertools.islice(documents, CHUNK_SIZE))
+        if not chunk:
+            return
+        yield chunk
+
+
+def make_corpus(size: int, keywords: List[str], seed: int = 42, corpus_path: Optional[str] = None) -> List[Dict]:
+    """The whole corpus of iter_corpus as one list."""
+    return [document for chunk in iter_corpus(size, keywords, seed, corpus_path) for document in chunk]
+
+
+class FakeLLM:
+    """
+    Deterministic stand-in for the Gemini client: lexicon-based replies in the
+    real response formats, and a latency of `latency_ms` per call plus
+    `ms_per_1k_tokens` per thousand prompt and output tokens.
+    """
+    def __init__(self, model_name: str, latency_ms: float = 20.0, ms_per_1k_tokens: float = 0.0):
+        self.model_name = model_name
+        self.latency_ms = latency_ms
+        self.ms_per_1k_tokens = ms_per_1k_tokens
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt: str):
+        from instrumentation import record_llm_call
+        from llm_client import LLMResponse
+
+        text = default_responder(prompt)
+        prompt_tokens, output_tokens = len(prompt) // 4, len(text) // 4
+        latency = (self.latency_ms + self.ms_per_1k_tokens * (prompt_tokens + output_tokens) / 1000) / 1000
+        if latency > 0:
+            time.sleep(latency)
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.output_tokens += output_tokens
+        record_llm_call(self.model_name, prompt_tokens, output_tokens, latency)
+        return LLMResponse(text, prompt_tokens, output_tokens, latency)
+
+
+class CorpusScout:
+    """Scout replacement that hands the fixed corpus to the analyst."""
+    def __init__(self, documents: List[Dict]):
+        self.documents = documents
+
+    def run(self, state) -> dict:
+        return {"raw_documents": self.documents}
+
+
+def _peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_size(size: int, keywords: List[str], seed: int, latency_ms: float, ms_per_1k_tokens: float,
+             corpus_path: Optional[str] = None, pipeline_name: str = "sentinator") -> dict:
+    """
+    Runs the pipeline once over a corpus of `size` documents and returns its
+    measurements. The streaming pipeline reads the corpus chunk by chunk
+    instead of holding it in memory.
+    """
+    import agents.strategist_agent as strategist_agent
+    import pipeline
+    import tools.nlp_tools as nlp_tools
+
+    fake_llm = FakeLLM("fake-llm", latency_ms, ms_per_1k_tokens)
+    original_models = nlp_tools.model, strategist_agent.model
+    nlp_tools.model = strategist_agent.model = fake_llm
+    try:
+        if pipeline_name == pipeline.STREAMING_PIPELINE:
+            from streaming_pipeline import StreamingIngestor
+
+            ingestor = StreamingIngestor(lambda _: iter_corpus(size, keywords, seed, corpus_path))
+            app = pipeline.build_streaming_workflow(ingestor=ingestor).compile()
+        else:
+            app = pipeline.build_sentinator_workflow(scout=CorpusScout(make_corpus(size, keywords, seed, corpus_path))).compile()
+        node_seconds: Dict[str, float] = {}
+        final_state: Dict = {}
+        # The agents print per document; keep that out of the timings.
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = last = time.perf_counter()
+            for update in app.stream({"keywords": keywords}, stream_mode="updates"):
+                now = time.perf_counter()
+                for node, output in update.items():
+                    node_seconds[node] = node_seconds.get(node, 0.0) + now - last
+                    final_state.update(output or {})
+                last = now
+            wall = time.perf_counter() - started
+    finally:
+        nlp_tools.model, strategist_agent.model = original_models
+
+    return {
+        "documents": size,
+        "wall_seconds": round(wall, 4),
+        "documents_per_second": round(size / wall, 2) if wall else None,
+        "node_seconds": {node: round(seconds, 4) for node, seconds in node_seconds.items()},
+        "llm_calls": fake_llm.calls,
+        "llm_calls_per_document": round(fake_llm.calls / size, 4) if size else None,
+        "prompt_tokens": fake_llm.prompt_tokens,
+        "output_tokens": fake_llm.output_tokens,
+        "summaries": len(final_state.get("strategic_summaries", [])),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(sizes: List[int], keywords: List[str], seed: int, latency_ms: float, ms_per_1k_tokens: float,
+        corpus_path: Optional[str] = None, pipeline_name: str = "sentinator") -> dict:
+    """Benchmarks every size in its own process and collects the results with the run settings."""
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for size in sizes:
+        with context.Pool(1) as pool:
+            result = pool.apply(run_size, (size, keywords, seed, latency_ms, ms_per_1k_tokens, corpus_path, pipeline_name))
+        print(f"{size:>8} docs: {result['wall_seconds']:>9.3f} s  {result['documents_per_second'] or 0:>10.1f} docs/s  "
+              f"{result['llm_calls_per_document'] or 0:.3f} LLM calls/doc  peak RSS {result['peak_rss_mb'] or 0:.0f} MB  "
+              f"nodes {result['node_seconds']}")
+        results.append(result)
+    return {
+        "benchmark": "pipeline",
+        "commit": _git_commit(),
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {
+            "keywords": keywords,
+            "seed": seed,
+            "corpus": corpus_path,
+            "pipeline": pipeline_name,
+            "llm_latency_ms": latency_ms,
+            "llm_ms_per_1k_tokens": ms_per_1k_tokens,
+            "env": {name: os.environ[name] for name in SETTINGS_ENV if name in os.environ},
+        },
+        "results": results,
+    }
+
+
+def compare(report: dict, baseline: dict) -> None:
+    """Prints throughput and node-time changes against a previous report."""
+    previous = {result["documents"]: result for result in baseline.get("results", [])}
+    print(f"\nCompared with {baseline.get('commit', '?')}:")
+    for result in report["results"]:
+        before = previous.get(result["documents"])
+        if not before or not before.get("documents_per_second"):
+            continue
+        change = result["documents_per_second"] / before["documents_per_second"] - 1
+        print(f"{result['documents']:>8} docs: {before['documents_per_second']:.1f} -> "
+              f"{result['documents_per_second']:.1f} docs/s ({change:+.1%})")
+        for node, seconds in result["node_seconds"].items():
+            if before["node_seconds"].get(node):
+                print(f"{'':>14}{node}: {before['node_seconds'][node]:.3f} -> {seconds:.3f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated corpus sizes, e.g. 1,100,10000,100000.")
+    parser.add_argument("--keywords", default=DEFAULT_KEYWORDS, help="Comma-separated keywords the corpus is spread over.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--pipeline", choices=("sentinator", "streaming"), default="sentinator")
+    parser.add_argument("--corpus", help="JSONL corpus from `python -m tools.synthetic_data` instead of generating one.")
+    parser.add_argument("--llm-latency-ms", type=float, default=20.0, help="Fake LLM latency per call.")
+    parser.add_argument("--llm-ms-per-1k-tokens", type=float, default=0.0, help="Extra fake LLM latency per 1k tokens.")
+    parser.add_argument("--batch-size", type=int, help="Sets ANALYST_BATCH_SIZE.")
+    parser.add_argument("--concurrency", type=int, help="Sets ANALYST_MAX_CONCURRENCY.")
+    parser.add_argument("--local-tier", action="store_true", help="Sets ANALYST_LOCAL_TIER_ENABLED.")
+    parser.add_argument("--dedup", action="store_true", help="Sets ANALYST_DEDUP_ENABLED.")
+    parser.add_argument("--output", help="JSON report path (default: benchmarks/results/pipeline-<commit>.json).")
+    parser.add_argument("--compare", help="Previous JSON report to compare against.")
+    args = parser.parse_args()
+
+    # Child processes inherit these settings.
+    os.environ.setdefault("MOCK_DATA_SEED", str(args.seed))
+    if args.batch_size:
+        os.environ["ANALYST_BATCH_SIZE"] = str(args.batch_size)
+    if args.concurrency:
+        os.environ["ANALYST_MAX_CONCURRENCY"] = str(args.concurrency)
+    if args.local_tier:
+        os.environ["ANALYST_LOCAL_TIER_ENABLED"] = "true"
+    if args.dedup:
+        os.environ["ANALYST_DEDUP_ENABLED"] = "true"
+
+    report = run([int(size) for size in args.sizes.split(",") if size.strip()],
+                 [keyword.strip() for keyword in args.keywords.split(",") if keyword.strip()],
+                 args.seed, args.llm_latency_ms, args.llm_ms_per_1k_tokens, args.corpus, args.pipeline)
+    output = args.output or os.path.join("benchmarks", "results", f"pipeline-{report['commit']}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"Wrote {output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            compare(report, json.load(handle))
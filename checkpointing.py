@@ -0,0 +1,255 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+
+from config import get_checkpoint_path, get_checkpoint_retention_seconds, get_pipeline_name
+from llm_client import TokenBudget, run_token_budget
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL, parent_checkpoint_id TEXT,
+    checkpoint_type TEXT NOT NULL, checkpoint BLOB NOT NULL, metadata_type TEXT NOT NULL, metadata BLOB NOT NULL,
+    created_at REAL NOT NULL, PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id));
+CREATE INDEX IF NOT EXISTS idx_checkpoints_created ON checkpoints (created_at);
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, channel TEXT NOT NULL, version TEXT NOT NULL,
+    value_type TEXT NOT NULL, value BLOB, PRIMARY KEY (thread_id, checkpoint_ns, channel, version));
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL, task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL, channel TEXT NOT NULL, value_type TEXT NOT NULL, value BLOB, task_path TEXT NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx));
+"""
+
+
+class SqliteCheckpointSaver(BaseCheckpointSaver):
+    """
+    LangGraph checkpoint saver on a local SQLite file, so a failed run can be
+    resumed from its last completed node, even by another process. Threads
+    (one per run id) whose newest checkpoint is older than `retention_seconds`
+    are deleted whenever a new run starts.
+    """
+    def __init__(self, path: Optional[str] = None, retention_seconds: Optional[float] = None):
+        super().__init__()
+        path = path or ":memory:"
+        directory = os.path.dirname(path)
+        if path != ":memory:" and directory:
+            os.makedirs(directory, exist_ok=True)
+        self.retention_seconds = (get_checkpoint_retention_seconds() if retention_seconds is None
+                                  else retention_seconds)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def _config(self, thread_id: str, checkpoint_ns: str, checkpoint_id: Optional[str]) -> Optional[RunnableConfig]:
+        if not checkpoint_id:
+            return None
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}}
+
+    def _tuple(self, row: tuple) -> CheckpointTuple:
+        # Called with the lock held.
+        thread_id, checkpoint_ns, checkpoint_id, parent_id, checkpoint_type, checkpoint_blob, metadata_type, metadata = row
+        checkpoint: Checkpoint = self.serde.loads_typed((checkpoint_type, checkpoint_blob))
+        channel_values = {}
+        for channel, version in checkpoint["channel_versions"].items():
+            blob = self._connection.execute(
+                "SELECT value_type, value FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? "
+                "AND version = ?", (thread_id, checkpoint_ns, channel, str(version))).fetchone()
+            if blob is not None and blob[0] != "empty":
+                channel_values[channel] = self.serde.loads_typed(blob)
+        writes = self._connection.execute(
+            "SELECT task_path, task_id, idx, channel, value_type, value FROM writes WHERE thread_id = ? "
+            "AND checkpoint_ns = ? AND checkpoint_id = ?", (thread_id, checkpoint_ns, checkpoint_id)).fetchall()
+        writes.sort(key=lambda write: writes_sort_key(*write[:3]))
+        return CheckpointTuple(
+            config=self._config(thread_id, checkpoint_ns, checkpoint_id),
+            checkpoint={**checkpoint, "channel_values": channel_values},
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=self._config(thread_id, checkpoint_ns, parent_id),
+            pending_writes=[(task_id, channel, self.serde.loads_typed((value_type, value)))
+                            for _, task_id, _, channel, value_type, value in writes],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        columns = ("SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint, "
+                   "metadata_type, metadata FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?")
+        with self._lock:
+            checkpoint_id = get_checkpoint_id(config)
+            if checkpoint_id:
+                row = self._connection.execute(columns + " AND checkpoint_id = ?",
+                                               (thread_id, checkpoint_ns, checkpoint_id)).fetchone()
+            else:
+                row = self._connection.execute(columns + " ORDER BY checkpoint_id DESC LIMIT 1",
+                                               (thread_id, checkpoint_ns)).fetchone()
+            return self._tuple(row) if row is not None else None
+
+    def list(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+             before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        sql = ("SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint, "
+               "metadata_type, metadata FROM checkpoints WHERE 1 = 1")
+        params: List[Any] = []
+        if config is not None:
+            sql += " AND thread_id = ?"
+            params.append(config["configurable"]["thread_id"])
+            if config["configurable"].get("checkpoint_ns") is not None:
+                sql += " AND checkpoint_ns = ?"
+                params.append(config["configurable"]["checkpoint_ns"])
+            if get_checkpoint_id(config):
+                sql += " AND checkpoint_id = ?"
+                params.append(get_checkpoint_id(config))
+        if before is not None and get_checkpoint_id(before):
+            sql += " AND checkpoint_id < ?"
+            params.append(get_checkpoint_id(before))
+        sql += " ORDER BY checkpoint_id DESC"
+        with self._lock:
+            rows = self._connection.execute(sql, params).fetchall()
+        for row in rows:
+            if limit is not None and limit <= 0:
+                return
+            with self._lock:
+                checkpoint = self._tuple(row)
+            if filter and any(checkpoint.metadata.get(key) != value for key, value in filter.items()):
+                continue
+            if limit is not None:
+                limit -= 1
+            yield checkpoint
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        parent_id = config["configurable"].get("checkpoint_id")
+        if parent_id is None:
+            self.delete_expired()  # a new run is starting: a good time to drop abandoned ones
+        stored = checkpoint.copy()
+        values = stored.pop("channel_values")
+        blobs = [(thread_id, checkpoint_ns, channel, str(version),
+                  *(self.serde.dumps_typed(values[channel]) if channel in values else ("empty", None)))
+                 for channel, version in new_versions.items()]
+        checkpoint_type, checkpoint_blob = self.serde.dumps_typed(stored)
+        metadata_type, metadata_blob = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        with self._lock, self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)", blobs)
+            self._connection.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, checkpoint["id"], parent_id, checkpoint_type, checkpoint_blob,
+                 metadata_type, metadata_blob, time.time()))
+        return self._config(thread_id, checkpoint_ns, checkpoint["id"])
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                   task_path: str = "") -> None:
+        configurable = config["configurable"]
+        rows = [(configurable["thread_id"], configurable.get("checkpoint_ns", ""), configurable["checkpoint_id"],
+                 task_id, WRITES_IDX_MAP.get(channel, idx), channel, *self.serde.dumps_typed(value), task_path)
+                for idx, (channel, value) in enumerate(writes)]
+        # Special channels (errors, interrupts) are overwritten; regular writes are kept from the first attempt.
+        verb = "INSERT OR REPLACE" if all(channel in WRITES_IDX_MAP for channel, _ in writes) else "INSERT OR IGNORE"
+        with self._lock, self._connection:
+            self._connection.executemany(f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock, self._connection:
+            for table in ("checkpoints", "blobs", "writes"):
+                self._connection.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+    def delete_expired(self, now: Optional[float] = None) -> int:
+        """Deletes every thread whose newest checkpoint is past the retention period; returns how many."""
+        cutoff = (time.time() if now is None else now) - self.retention_seconds
+        with self._lock:
+            expired = [row[0] for row in self._connection.execute(
+                "SELECT thread_id FROM checkpoints GROUP BY thread_id HAVING MAX(created_at) < ?", (cutoff,))]
+        for thread_id in expired:
+            self.delete_thread(thread_id)
+        return len(expired)
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+_saver: Optional[SqliteCheckpointSaver] = None
+_saver_lock = threading.Lock()
+
+
+def get_checkpoint_saver() -> SqliteCheckpointSaver:
+    """The process-wide checkpoint saver at CHECKPOINT_PATH."""
+    global _saver
+    with _saver_lock:
+        if _saver is None:
+            _saver = SqliteCheckpointSaver(get_checkpoint_path() or None)
+        return _saver
+
+
+def reset_checkpoint_saver() -> None:
+    global _saver
+    with _saver_lock:
+        if _saver is not None:
+            _saver.close()
+        _saver = None
+
+
+def run_id_for(keywords: Sequence[str], prefix: str, pipeline: Optional[str] = None) -> str:
+    """Run id of a request: retries of the same keyword set on the same pipeline share it."""
+    keyword_set = ",".join(sorted({keyword.casefold() for keyword in keywords}))
+    return f"{prefix}:{pipeline or get_pipeline_name()}:{keyword_set}"
+
+
+class CheckpointedRun:
+    """
+    One pipeline run under a run id. If the app was compiled with a
+    checkpointer and an earlier attempt with this id failed part-way, the
+    run resumes after the last completed node instead of starting over. A
+    run that completes deletes its checkpoints. Apps without a checkpointer
+    are invoked exactly as before. Either way, the LLM calls of the run
+    share one token budget (LLM_RUN_TOKEN_BUDGET), available as `.budget`.
+    """
+    def __init__(self, app, state: Dict, run_id: str):
+        self.app = app
+        self.run_id = run_id
+        self.saver = getattr(app, "checkpointer", None)
+        self.input: Optional[Dict] = state
+        self.values: Dict = state  # the state as of the first node this run will execute
+        self.resumed_at: Tuple[str, ...] = ()
+        self.config: Optional[RunnableConfig] = None
+        self.budget: Optional[TokenBudget] = None
+        if isinstance(self.saver, BaseCheckpointSaver):
+            self.config = {"configurable": {"thread_id": run_id}}
+            snapshot = app.get_state(self.config)
+            if snapshot.next and snapshot.values.get("keywords") == state.get("keywords"):
+                print(f"Resuming run {run_id} at: {', '.join(snapshot.next)}")
+                self.input, self.values, self.resumed_at = None, dict(snapshot.values), tuple(snapshot.next)
+            elif snapshot.values:
+                self.saver.delete_thread(run_id)  # a finished or unrelated earlier run
+
+    def invoke(self) -> Dict:
+        with run_token_budget() as self.budget:
+            if self.config is None:
+                return self.app.invoke(self.input)
+            final_state = self.app.invoke(self.input, self.config)
+        self.saver.delete_thread(self.run_id)
+        return final_state
+
+    def stream(self, stream_mode: str = "updates") -> Iterator:
+        with run_token_budget() as self.budget:
+            if self.config is None:
+                yield from self.app.stream(self.input, stream_mode=stream_mode)
+                return
+            yield from self.app.stream(self.input, self.config, stream_mode=stream_mode)
+        self.saver.delete_thread(self.run_id)
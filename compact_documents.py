@@ -0,0 +1,201 @@
+import datetime
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+from graph_state import ProcessedDocument, RawDocument
+from tools.aggregation import DocumentColumns, _parse_timestamps
+
+# Timestamps are whole epoch seconds; naive ISO strings are read as UTC so a
+# round trip returns the same wall-clock string (at second resolution).
+_EPOCH = datetime.datetime(1970, 1, 1)
+# int64 minimum is NaT when viewed as datetime64, so missing timestamps survive vectorized conversion.
+MISSING_TIMESTAMP = np.iinfo(np.int64).min
+_ANALYSIS_KEYS = ("sentiment_score", "sentiment_label", "topic", "entities", "cluster_size")
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value else value
+
+
+def timestamp_to_epoch(value: Optional[str]) -> Optional[int]:
+    """ISO-8601 string to whole epoch seconds (UTC for aware values); None when missing or unparsable."""
+    try:
+        parsed = datetime.datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return int((parsed - _EPOCH).total_seconds())
+
+
+def epoch_to_timestamp(value: Optional[int]) -> str:
+    """Inverse of timestamp_to_epoch; missing timestamps become an empty string."""
+    return "" if value is None else (_EPOCH + datetime.timedelta(seconds=value)).isoformat()
+
+
+class CompactDocument:
+    """
+    One document in about a quarter of the memory of its TypedDict form:
+    slots instead of a per-instance dict, interned source/keyword/topic/label
+    strings, an int timestamp and an entity tuple.
+    """
+    __slots__ = ("source", "content", "timestamp", "keyword", "sentiment_score", "sentiment_label",
+                 "topic", "entities", "cluster_size", "processed")
+
+    def __init__(self, source: str, content: str, timestamp: Optional[int], keyword: str,
+                 sentiment_score: Optional[float] = None, sentiment_label: Optional[str] = None,
+                 topic: Optional[str] = None, entities: Sequence[str] = (), cluster_size: Optional[int] = None,
+                 processed: bool = False):
+        self.source = _intern(source)
+        self.content = content
+        self.timestamp = timestamp
+        self.keyword = _intern(keyword)
+        self.sentiment_score = sentiment_score
+        self.sentiment_label = _intern(sentiment_label)
+        self.topic = _intern(topic)
+        self.entities = tuple(_intern(entity) for entity in entities)
+        self.cluster_size = cluster_size
+        self.processed = processed
+
+    @classmethod
+    def from_dict(cls, doc: Union[RawDocument, ProcessedDocument]) -> "CompactDocument":
+        return cls(
+            doc.get("source"), doc.get("content"), timestamp_to_epoch(doc.get("timestamp")), doc.get("keyword"),
+            doc.get("sentiment_score"), doc.get("sentiment_label"), doc.get("topic"), doc.get("entities") or (),
+            doc.get("cluster_size"), processed=any(key in doc for key in _ANALYSIS_KEYS),
+        )
+
+    def to_dict(self) -> Union[RawDocument, ProcessedDocument]:
+        """The TypedDict shape the agents consume: a ProcessedDocument if it was analyzed, else a RawDocument."""
+        raw = RawDocument(source=self.source, content=self.content,
+                          timestamp=epoch_to_timestamp(self.timestamp), keyword=self.keyword)
+        if not self.processed:
+            return raw
+        return ProcessedDocument(**raw, sentiment_score=self.sentiment_score, sentiment_label=self.sentiment_label,
+                                 topic=self.topic, entities=list(self.entities), cluster_size=self.cluster_size)
+
+
+def _encode(values: Iterable[Optional[str]], vocabulary: Dict[str, int], dtype) -> np.ndarray:
+    return np.fromiter((-1 if not value else vocabulary.setdefault(value, len(vocabulary)) for value in values),
+                       dtype=dtype)
+
+
+def _label(vocabulary: List[str], index: int) -> Optional[str]:
+    return vocabulary[index] if index >= 0 else None
+
+
+class DocumentBatch:
+    """
+    Struct-of-arrays batch of documents. Source, keyword, topic, label and
+    entity strings are stored once each in a vocabulary and referenced by
+    small integer ids; timestamps, scores and cluster sizes are NumPy arrays;
+    only the contents remain one Python string per document. Converts to the
+    aggregation columns without reparsing anything.
+    """
+    def __init__(self, contents: List[str], timestamps: np.ndarray, source_ids: np.ndarray, sources: List[str],
+                 keyword_ids: np.ndarray, keywords: List[str], scores: np.ndarray, label_ids: np.ndarray,
+                 labels: List[str], topic_ids: np.ndarray, topics: List[str], cluster_sizes: np.ndarray,
+                 entity_ids: np.ndarray, entity_offsets: np.ndarray, entities: List[str], processed: bool):
+        self.contents = contents
+        self.timestamps = timestamps            # int64 epoch seconds, MISSING_TIMESTAMP when absent
+        self.source_ids = source_ids            # int16 index into `sources`, -1 when missing
+        self.sources = sources
+        self.keyword_ids = keyword_ids          # int32 index into `keywords`
+        self.keywords = keywords
+        self.scores = scores                    # float64, NaN where the score is missing
+        self.label_ids = label_ids              # int16 index into `labels`
+        self.labels = labels
+        self.topic_ids = topic_ids              # int32 index into `topics`
+        self.topics = topics
+        self.cluster_sizes = cluster_sizes      # int32, -1 when missing
+        self.entity_ids = entity_ids            # int32, all documents' entities back to back
+        self.entity_offsets = entity_offsets    # int64, document i owns entity_ids[offsets[i]:offsets[i + 1]]
+        self.entities = entities
+        self.processed = processed
+
+    @classmethod
+    def from_documents(cls, documents: Sequence[Union[RawDocument, ProcessedDocument]]) -> "DocumentBatch":
+        sources: Dict[str, int] = {}
+        keywords: Dict[str, int] = {}
+        labels: Dict[str, int] = {}
+        topics: Dict[str, int] = {}
+        entities: Dict[str, int] = {}
+        entity_counts = np.fromiter((len(doc.get("entities") or ()) for doc in documents), dtype=np.int64,
+                                    count=len(documents))
+        seconds = _parse_timestamps([doc.get("timestamp") or "" for doc in documents])
+        timestamps = np.where(np.isnan(seconds), MISSING_TIMESTAMP, np.floor(np.nan_to_num(seconds))).astype(np.int64)
+        return cls(
+            contents=[doc.get("content") for doc in documents],
+            timestamps=timestamps,
+            source_ids=_encode((doc.get("source") for doc in documents), sources, np.int16),
+            sources=list(sources),
+            keyword_ids=_encode((doc.get("keyword") for doc in documents), keywords, np.int32),
+            keywords=list(keywords),
+            scores=np.array([doc.get("sentiment_score") for doc in documents], dtype=np.float64),
+            label_ids=_encode((doc.get("sentiment_label") for doc in documents), labels, np.int16),
+            labels=list(labels),
+            topic_ids=_encode((doc.get("topic") for doc in documents), topics, np.int32),
+            topics=list(topics),
+            cluster_sizes=np.fromiter((doc.get("cluster_size") or -1 for doc in documents), dtype=np.int32,
+                                      count=len(documents)),
+            entity_ids=_encode((entity for doc in documents for entity in doc.get("entities") or ()), entities, np.int32),
+            entity_offsets=np.concatenate(([0], np.cumsum(entity_counts))),
+            entities=list(entities),
+            processed=bool(documents) and any(key in documents[0] for key in _ANALYSIS_KEYS),
+        )
+
+    def __len__(self) -> int:
+        return len(self.contents)
+
+    def _timestamp_strings(self) -> List[str]:
+        strings = np.datetime_as_string(self.timestamps.view("datetime64[s]"), unit="s")
+        return ["" if value == "NaT" else value for value in strings.tolist()]
+
+    def to_documents(self) -> List[Union[RawDocument, ProcessedDocument]]:
+        """The batch back in the TypedDict shape, in order."""
+        timestamps = self._timestamp_strings()
+        sources = [_label(self.sources, i) for i in self.source_ids.tolist()]
+        keywords = [_label(self.keywords, i) for i in self.keyword_ids.tolist()]
+        raw = [RawDocument(source=source, content=content, timestamp=timestamp, keyword=keyword)
+               for source, content, timestamp, keyword in zip(sources, self.contents, timestamps, keywords)]
+        if not self.processed:
+            return raw
+        offsets = self.entity_offsets.tolist()
+        entity_ids = self.entity_ids.tolist()
+        return [
+            ProcessedDocument(
+                **doc,
+                sentiment_score=None if score != score else score,  # NaN means missing
+                sentiment_label=_label(self.labels, label),
+                topic=_label(self.topics, topic),
+                entities=[self.entities[e] for e in entity_ids[offsets[i]:offsets[i + 1]]],
+                cluster_size=None if cluster_size < 0 else cluster_size,
+            )
+            for i, (doc, score, label, topic, cluster_size) in enumerate(zip(
+                raw, self.scores.tolist(), self.label_ids.tolist(), self.topic_ids.tolist(),
+                self.cluster_sizes.tolist()))
+        ]
+
+    def __iter__(self) -> Iterator[Union[RawDocument, ProcessedDocument]]:
+        return iter(self.to_documents())
+
+    def to_columns(self, weights: Optional[Sequence[float]] = None) -> DocumentColumns:
+        """The aggregation view of the batch; the vocabularies and arrays are shared, not rebuilt."""
+        timestamps = self.timestamps.astype(np.float64)
+        timestamps[self.timestamps == MISSING_TIMESTAMP] = np.nan
+        return DocumentColumns(
+            scores=self.scores,
+            weights=np.ones(len(self)) if weights is None else np.asarray(weights, dtype=np.float64),
+            timestamps=timestamps,
+            keyword_ids=self.keyword_ids,
+            keywords=self.keywords,
+            source_ids=self.source_ids.astype(np.int32),
+            sources=self.sources,
+            topic_ids=self.topic_ids,
+            topics=self.topics,
+            entity_ids=self.entity_ids,
+            entity_doc_index=np.repeat(np.arange(len(self), dtype=np.int32), np.diff(self.entity_offsets)),
+            entities=self.entities,
+        )
@@ -1,5 +1,321 @@
+import datetime
 import os
+from typing import List, Optional
 
 def get_gemini_api_key():
     return os.environ.get("GEMINI_API_KEY") or os.getenv("GEMINI_API_KEY")
 
+
+def _get_int_env(name: str, default: int) -> int:
+    """Reads an integer setting from the environment, falling back to `default`."""
+    value = os.environ.get(name)
+    if value is None or not value.strip():
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        print(f"Invalid value for {name}: {value!r}. Using default {default}.")
+        return default
+
+
+def get_analyst_batch_size() -> int:
+    """
+    Number of documents packed into a single Gemini prompt by the analyst.
+    A value of 1 keeps the original one-call-per-document behaviour.
+    """
+    return max(1, _get_int_env("ANALYST_BATCH_SIZE", 1))
+
+
+def get_analyst_batch_max_retries() -> int:
+    """How many times missing IDs of a partially malformed batch reply are retried."""
+    return max(0, _get_int_env("ANALYST_BATCH_MAX_RETRIES", 2))
+
+
+def _get_float_env(name: str, default: float) -> float:
+    """Reads a float setting from the environment, falling back to `default`."""
+    value = os.environ.get(name)
+    if value is None or not value.strip():
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        print(f"Invalid value for {name}: {value!r}. Using default {default}.")
+        return default
+
+
+def get_analyst_max_concurrency() -> int:
+    """Maximum number of Gemini analysis calls the analyst keeps in flight at once."""
+    return max(1, _get_int_env("ANALYST_MAX_CONCURRENCY", 1))
+
+
+def get_gemini_max_qps() -> float:
+    """Gemini requests-per-second quota. 0 disables the limit."""
+    return max(0.0, _get_float_env("GEMINI_MAX_QPS", 0.0))
+
+
+def get_gemini_max_rpm() -> float:
+    """Gemini requests-per-minute quota. 0 disables the limit."""
+    return max(0.0, _get_float_env("GEMINI_MAX_RPM", 0.0))
+
+
+def _get_bool_env(name: str, default: bool) -> bool:
+    """Reads a boolean setting ("1", "true", "yes", "on") from the environment."""
+    value = os.environ.get(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def get_nlp_cache_enabled() -> bool:
+    """Whether analyze_text_deeply results are cached by content hash."""
+    return _get_bool_env("NLP_CACHE_ENABLED", False)
+
+
+def get_nlp_cache_path() -> str:
+    """SQLite file backing the NLP cache. An empty value keeps the cache in memory only."""
+    return os.environ.get("NLP_CACHE_PATH", os.path.join(".cache", "nlp_cache.sqlite"))
+
+
+def get_nlp_cache_ttl_seconds() -> float:
+    """How long a cached NLP result stays valid. 0 means entries never expire."""
+    return max(0.0, _get_float_env("NLP_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+
+
+def get_nlp_cache_max_memory_entries() -> int:
+    """Size of the in-memory LRU front tier of the NLP cache."""
+    return max(1, _get_int_env("NLP_CACHE_MAX_MEMORY_ENTRIES", 4096))
+
+
+def get_nlp_cache_max_disk_entries() -> int:
+    """Maximum number of rows kept in the SQLite back tier of the NLP cache."""
+    return max(1, _get_int_env("NLP_CACHE_MAX_DISK_ENTRIES", 200_000))
+
+
+def get_scout_max_concurrency() -> int:
+    """Maximum number of (keyword, source) searches the scout runs in parallel."""
+    return max(1, _get_int_env("SCOUT_MAX_CONCURRENCY", 8))
+
+
+def get_scout_source_timeout_seconds() -> float:
+    """How long the scout waits for a single source before giving up on it."""
+    return max(0.1, _get_float_env("SCOUT_SOURCE_TIMEOUT_SECONDS", 15.0))
+
+
+def get_strategist_max_concurrency() -> int:
+    """Maximum number of per-keyword strategist calls running in parallel."""
+    return max(1, _get_int_env("STRATEGIST_MAX_CONCURRENCY", 4))
+
+
+def get_market_lexicon_path() -> str:
+    """Optional JSON {"term": weight} file replacing the market outcome indicators."""
+    return os.environ.get("MARKET_LEXICON_PATH", "")
+
+
+def get_sentiment_lexicon_path() -> str:
+    """Optional JSON {"term": weight} file replacing the local sentiment lexicon."""
+    return os.environ.get("SENTIMENT_LEXICON_PATH", "")
+
+
+def get_local_tier_enabled() -> bool:
+    """Whether the analyst scores obvious documents locally before escalating to Gemini."""
+    return _get_bool_env("ANALYST_LOCAL_TIER_ENABLED", False)
+
+
+def get_escalation_threshold() -> float:
+    """Local confidence below which a document is escalated to Gemini (0..1)."""
+    return min(1.0, max(0.0, _get_float_env("ANALYST_ESCALATION_THRESHOLD", 0.6)))
+
+
+def get_dedup_enabled() -> bool:
+    """Whether the analyst collapses near-duplicate documents before analysis."""
+    return _get_bool_env("ANALYST_DEDUP_ENABLED", False)
+
+
+def get_dedup_max_distance() -> int:
+    """Maximum SimHash Hamming distance (out of 64 bits) for two documents to be near-duplicates."""
+    return min(15, max(0, _get_int_env("ANALYST_DEDUP_MAX_DISTANCE", 3)))
+
+
+def get_pipeline_name() -> str:
+    """Pipeline configuration run by main.py and the UI: 'sentinator' (full runs), 'incremental' or 'streaming'."""
+    return os.environ.get("SENTINATOR_PIPELINE", "").strip() or "sentinator"
+
+
+def get_incremental_store_path() -> str:
+    """SQLite file holding watermarks, processed documents and rolling aggregates for incremental runs."""
+    return os.environ.get("INCREMENTAL_STORE_PATH", ".cache/incremental.sqlite").strip()
+
+
+def get_incremental_sentiment_delta() -> float:
+    """Change in any rolling-window sentiment mean that triggers a new strategist call."""
+    return max(0.0, _get_float_env("INCREMENTAL_SENTIMENT_DELTA", 0.1))
+
+
+def get_gemini_api_base_url() -> str:
+    """Base URL of the Gemini REST API. Point it at a local stub server for tests and benchmarks."""
+    url = os.environ.get("GEMINI_API_BASE_URL", "").strip()
+    return (url or "https://generativelanguage.googleapis.com/v1beta").rstrip("/")
+
+
+def get_gemini_timeout_seconds() -> float:
+    """Timeout of a single Gemini HTTP request."""
+    return max(1.0, _get_float_env("GEMINI_TIMEOUT_SECONDS", 60.0))
+
+
+def get_gemini_max_retries() -> int:
+    """Retries of a Gemini request after a 429, a 5xx or a connection error."""
+    return max(0, _get_int_env("GEMINI_MAX_RETRIES", 3))
+
+
+def get_gemini_backoff_seconds() -> float:
+    """Base delay of the exponential backoff between Gemini retries."""
+    return max(0.0, _get_float_env("GEMINI_BACKOFF_SECONDS", 0.5))
+
+
+def get_gemini_hedge_after_seconds() -> float:
+    """Send a second, hedged request when the first has not answered after this long (0 = never)."""
+    return max(0.0, _get_float_env("GEMINI_HEDGE_AFTER_SECONDS", 0.0))
+
+
+def get_gemini_pool_size() -> int:
+    """Keep-alive connections kept open to the Gemini API."""
+    return max(1, _get_int_env("GEMINI_POOL_SIZE", 16))
+
+
+def get_metrics_port() -> int:
+    """Port of the Prometheus /metrics endpoint started next to the Gradio app (0 = disabled)."""
+    return max(0, _get_int_env("METRICS_PORT", 0))
+
+
+def get_metrics_host() -> str:
+    """Interface the /metrics endpoint binds to. It is unauthenticated, so only loopback by default."""
+    return os.environ.get("METRICS_HOST", "127.0.0.1").strip() or "127.0.0.1"
+
+
+def get_trace_export_path() -> str:
+    """JSONL file receiving finished spans in OTLP/JSON format. Empty disables span export."""
+    return os.environ.get("TRACE_EXPORT_PATH", "").strip()
+
+
+def get_mock_data_end() -> str:
+    """
+    End of the time range seeded mock documents are stamped in (naive ISO-8601, UTC).
+    Unset: midnight UTC today, so a seeded query returns the same documents all day.
+    """
+    value = os.environ.get("MOCK_DATA_END", "").strip()
+    if value:
+        return value
+    today = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    return today.replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
+
+
+def get_mock_data_seed() -> Optional[int]:
+    """Seed of the mock search and market tools. Unset keeps them unseeded (different data on every call)."""
+    value = os.environ.get("MOCK_DATA_SEED", "").strip()
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        print(f"Invalid value for MOCK_DATA_SEED: {value!r}. Leaving the mock tools unseeded.")
+        return None
+
+
+def get_stream_queue_size() -> int:
+    """Scouted documents the streaming pipeline buffers before the scout has to wait for the analysts."""
+    return max(1, _get_int_env("STREAM_QUEUE_SIZE", 1000))
+
+
+def get_stream_workers() -> int:
+    """Analyst workers draining the streaming pipeline's queue concurrently."""
+    return max(1, _get_int_env("STREAM_WORKERS", 4))
+
+
+def get_stream_chunk_size() -> int:
+    """Documents a streaming analyst worker takes from the queue and analyzes together."""
+    return max(1, _get_int_env("STREAM_CHUNK_SIZE", 32))
+
+
+def get_storage_enabled() -> bool:
+    """Whether finished runs are saved to the analysis store at STORAGE_URL."""
+    return _get_bool_env("STORAGE_ENABLED", False)
+
+
+def get_storage_url() -> str:
+    """Analysis store: a SQLite file path (optionally sqlite:///path) or a postgresql:// connection URL."""
+    return os.environ.get("STORAGE_URL", "").strip() or ".cache/sentinator.sqlite"
+
+
+def get_storage_pool_size() -> int:
+    """Database connections the analysis store keeps open."""
+    return max(1, _get_int_env("STORAGE_POOL_SIZE", 4))
+
+
+def get_report_cache_fresh_seconds() -> float:
+    """How long a finished report is served from cache without re-running the pipeline (0 = no caching)."""
+    return max(0.0, _get_float_env("REPORT_CACHE_FRESH_SECONDS", 0.0))
+
+
+def get_report_cache_stale_seconds() -> float:
+    """After the fresh window, how long a cached report is still served while a background run refreshes it."""
+    return max(0.0, _get_float_env("REPORT_CACHE_STALE_SECONDS", 0.0))
+
+
+def get_report_cache_max_entries() -> int:
+    """Keyword sets whose reports are kept in the report cache."""
+    return max(1, _get_int_env("REPORT_CACHE_MAX_ENTRIES", 256))
+
+
+def get_job_workers() -> int:
+    """Pipeline runs executed concurrently by the job queue's worker pool."""
+    return max(1, _get_int_env("JOB_WORKERS", 4))
+
+
+def get_job_queue_size() -> int:
+    """Pipeline runs that may wait for a worker before new requests are rejected."""
+    return max(1, _get_int_env("JOB_QUEUE_SIZE", 64))
+
+
+def get_job_queue_tenant_limit() -> int:
+    """Pipeline runs one tenant (API user or client IP) may have waiting at once."""
+    return max(1, _get_int_env("JOB_QUEUE_TENANT_LIMIT", 8))
+
+
+def get_trusted_proxies() -> List[str]:
+    """Client addresses (e.g. an authenticating gateway) whose X-Tenant-Id header is trusted."""
+    return [host.strip() for host in os.environ.get("TRUSTED_PROXIES", "").split(",") if host.strip()]
+
+
+def get_batch_concurrency() -> int:
+    """Keywords batch_runner.py runs at once. They all share the Gemini rate limiter."""
+    return max(1, _get_int_env("BATCH_CONCURRENCY", 4))
+
+
+def get_checkpoint_enabled() -> bool:
+    """Whether pipeline runs are checkpointed after every node so a failed run can resume where it stopped."""
+    return _get_bool_env("CHECKPOINT_ENABLED", False)
+
+
+def get_checkpoint_path() -> str:
+    """SQLite file holding the LangGraph checkpoints of unfinished runs."""
+    return os.environ.get("CHECKPOINT_PATH", ".cache/checkpoints.sqlite").strip()
+
+
+def get_checkpoint_retention_seconds() -> float:
+    """How long the checkpoints of a failed run are kept for a retry to resume from."""
+    return max(0.0, _get_float_env("CHECKPOINT_RETENTION_SECONDS", 3600.0))
+
+
+def get_prompt_max_document_tokens() -> int:
+    """Tokens of a single document's text sent to Gemini for analysis; longer texts are truncated."""
+    return max(16, _get_int_env("PROMPT_MAX_DOCUMENT_TOKENS", 256))
+
+
+def get_prompt_max_evidence_tokens() -> int:
+    """Tokens of each evidence snippet quoted in a strategist prompt."""
+    return max(4, _get_int_env("PROMPT_MAX_EVIDENCE_TOKENS", 24))
+
+
+def get_llm_run_token_budget() -> int:
+    """Estimated prompt plus output tokens one pipeline run may spend on Gemini (0 = unlimited)."""
+    return max(0, _get_int_env("LLM_RUN_TOKEN_BUDGET", 0))
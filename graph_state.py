@@ -8,6 +8,7 @@ class RawDocument(TypedDict):
     keyword: str
 
 class StrategicSummary(TypedDict):
+    keyword: str
     cryptocurrency: str
     hypothesis: str
     confidence: str
@@ -15,6 +16,7 @@ class StrategicSummary(TypedDict):
     supporting_evidence: List[Dict]
 
 class PerformanceEvaluation(TypedDict):
+    keyword: str
     cryptocurrency: str
     hypothesis_tested: str
     simulated_outcome: str
@@ -26,6 +28,8 @@ class ProcessedDocument(RawDocument):
     sentiment_label: Optional[str]
     topic: Optional[str]
     entities: Optional[List[str]]
+    # Number of near-duplicate documents sharing this document's analysis.
+    cluster_size: Optional[int]
 
 class GraphState(TypedDict):
     keywords: List[str]
@@ -33,4 +37,15 @@ class GraphState(TypedDict):
     processed_documents: List[ProcessedDocument]
     strategic_summaries: List[StrategicSummary]
     evaluation: Optional[PerformanceEvaluation]
+    evaluations: List[PerformanceEvaluation]
+    analyst_metrics: Optional[Dict]
+    # Incremental runs only: rolling-window aggregates per keyword, and the
+    # keywords whose aggregates moved enough to need a new summary.
+    window_aggregates: Optional[Dict[str, Dict]]
+    strategist_keywords: Optional[List[str]]
+    # Streaming runs only: per-keyword aggregates accumulated while documents
+    # streamed past (processed_documents then only holds evidence samples).
+    stream_aggregates: Optional[Dict[str, Dict]]
+    # Streaming runs with storage: the run id their documents were saved under, chunk by chunk.
+    storage_run_id: Optional[str]
     error_message: Optional[str]
\ No newline at end of file
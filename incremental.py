@@ -0,0 +1,305 @@
+import datetime
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+from config import get_incremental_store_path, get_incremental_sentiment_delta
+from graph_state import GraphState, ProcessedDocument, RawDocument
+
+# Rolling windows maintained per keyword, in seconds.
+WINDOWS = {"1h": 3600, "24h": 24 * 3600, "7d": 7 * 24 * 3600}
+# Windows are sums of fixed-width buckets, so merging new documents never rescans old ones.
+BUCKET_SECONDS = 300
+# Stored documents from this window are the strategist's evidence when it is re-run.
+STRATEGIST_WINDOW = "24h"
+
+
+def parse_timestamp(value: Optional[str], default: float) -> float:
+    """ISO-8601 string to epoch seconds. Naive values are UTC, as in tools/aggregation.py and compact_documents.py."""
+    try:
+        parsed = datetime.datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return default
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed.timestamp()
+
+
+def document_key(doc: RawDocument) -> str:
+    """Identity of a scouted document: the same post seen again on a later tick maps to the same key."""
+    digest = hashlib.sha256()
+    for part in (doc.get("source") or "", doc.get("timestamp") or "", doc.get("content") or ""):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def aggregates_moved(previous: Optional[Dict], current: Dict, delta: float) -> bool:
+    """
+    True when any window's sentiment mean moved by more than `delta` since
+    `previous`, or a window gained or lost its only scored documents.
+    """
+    if previous is None:
+        return True
+    for window, stats in current.items():
+        before = previous.get(window, {}).get("sentiment_mean", math.nan)
+        after = stats.get("sentiment_mean", math.nan)
+        if math.isnan(before) and math.isnan(after):
+            continue
+        if math.isnan(before) or math.isnan(after) or abs(after - before) > delta:
+            return True
+    return False
+
+
+class IncrementalStore:
+    """
+    Per-keyword state for recurring runs, kept in SQLite: the timestamp
+    watermark, the processed documents still inside the longest window,
+    sentiment sums per time bucket, and the window aggregates the last
+    strategist summary was based on.
+    """
+    def __init__(self, path: Optional[str] = None, retention_seconds: float = max(WINDOWS.values()),
+                 clock=time.time):
+        self.retention_seconds = retention_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        if path and path != ":memory:":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS watermarks ("
+            "keyword TEXT PRIMARY KEY, last_timestamp REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "keyword TEXT NOT NULL, doc_key TEXT NOT NULL, timestamp REAL NOT NULL, document TEXT NOT NULL, "
+            "PRIMARY KEY (keyword, doc_key));"
+            "CREATE INDEX IF NOT EXISTS idx_documents_keyword_timestamp ON documents (keyword, timestamp);"
+            "CREATE INDEX IF NOT EXISTS idx_documents_timestamp ON documents (timestamp);"
+            "CREATE TABLE IF NOT EXISTS sentiment_buckets ("
+            "keyword TEXT NOT NULL, bucket INTEGER NOT NULL, documents INTEGER NOT NULL, scored INTEGER NOT NULL, "
+            "score_sum REAL NOT NULL, score_sq_sum REAL NOT NULL, PRIMARY KEY (keyword, bucket));"
+            "CREATE TABLE IF NOT EXISTS snapshots ("
+            "keyword TEXT PRIMARY KEY, aggregates TEXT NOT NULL, updated_at REAL NOT NULL);"
+        )
+        self._db.commit()
+
+    def watermark(self, keyword: str) -> Optional[float]:
+        """Timestamp of the newest document stored for `keyword`, or None before the first run."""
+        with self._lock:
+            row = self._db.execute("SELECT last_timestamp FROM watermarks WHERE keyword = ?", (keyword,)).fetchone()
+        return row[0] if row else None
+
+    def select_new(self, raw_documents: Sequence[RawDocument]) -> List[RawDocument]:
+        """Documents newer than their keyword's watermark that have not been stored yet."""
+        now = self._clock()
+        new_documents = []
+        with self._lock:
+            watermarks = dict(self._db.execute("SELECT keyword, last_timestamp FROM watermarks"))
+            for doc in raw_documents:
+                watermark = watermarks.get(doc.get("keyword"))
+                if watermark is not None and parse_timestamp(doc.get("timestamp"), now) < watermark:
+                    continue
+                seen = self._db.execute(
+                    "SELECT 1 FROM documents WHERE keyword = ? AND doc_key = ?", (doc.get("keyword"), document_key(doc))
+                ).fetchone()
+                if not seen:
+                    new_documents.append(doc)
+        return new_documents
+
+    def add_documents(self, processed_documents: Sequence[ProcessedDocument]) -> int:
+        """
+        Stores newly processed documents, adds them to their time buckets and
+        advances the watermarks. Returns how many documents were new.
+        """
+        now = self._clock()
+        cutoff = now - self.retention_seconds
+        inserted = 0
+        with self._lock:
+            for doc in processed_documents:
+                timestamp = parse_timestamp(doc.get("timestamp"), now)
+                if timestamp < cutoff:
+                    continue
+                keyword = doc.get("keyword")
+                cursor = self._db.execute(
+                    "INSERT OR IGNORE INTO documents (keyword, doc_key, timestamp, document) VALUES (?, ?, ?, ?)",
+                    (keyword, document_key(doc), timestamp, json.dumps(doc)),
+                )
+                if cursor.rowcount != 1:
+                    continue
+                inserted += 1
+                score = doc.get("sentiment_score")
+                scored = score is not None and math.isfinite(score)
+                score = float(score) if scored else 0.0
+                self._db.execute(
+                    "INSERT INTO sentiment_buckets (keyword, bucket, documents, scored, score_sum, score_sq_sum) "
+                    "VALUES (?, ?, 1, ?, ?, ?) ON CONFLICT (keyword, bucket) DO UPDATE SET "
+                    "documents = documents + 1, scored = scored + excluded.scored, "
+                    "score_sum = score_sum + excluded.score_sum, score_sq_sum = score_sq_sum + excluded.score_sq_sum",
+                    (keyword, int(timestamp // BUCKET_SECONDS), int(scored), score, score * score),
+                )
+                self._db.execute(
+                    "INSERT INTO watermarks (keyword, last_timestamp) VALUES (?, ?) ON CONFLICT (keyword) "
+                    "DO UPDATE SET last_timestamp = MAX(last_timestamp, excluded.last_timestamp)",
+                    (keyword, timestamp),
+                )
+            # Anything older than the longest window can no longer contribute.
+            self._db.execute("DELETE FROM documents WHERE timestamp < ?", (cutoff,))
+            self._db.execute("DELETE FROM sentiment_buckets WHERE bucket < ?", (int(cutoff // BUCKET_SECONDS),))
+            self._db.commit()
+        return inserted
+
+    def window_aggregates(self, keyword: str, now: Optional[float] = None) -> Dict[str, Dict[str, float]]:
+        """Document count, scored count, sentiment mean and variance of `keyword` for every window."""
+        now = self._clock() if now is None else now
+        current_bucket = int(now // BUCKET_SECONDS)
+        starts = {name: current_bucket - seconds // BUCKET_SECONDS + 1 for name, seconds in WINDOWS.items()}
+        columns = []
+        params: List[float] = []
+        for start in starts.values():
+            for column in ("documents", "scored", "score_sum", "score_sq_sum"):
+                columns.append(f"SUM(CASE WHEN bucket >= ? THEN {column} ELSE 0 END)")
+                params.append(start)
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {', '.join(columns)} FROM sentiment_buckets WHERE keyword = ? AND bucket >= ?",
+                (*params, keyword, min(starts.values())),
+            ).fetchone()
+
+        aggregates = {}
+        for i, name in enumerate(starts):
+            documents, scored, score_sum, score_sq_sum = (value or 0 for value in row[i * 4:i * 4 + 4])
+            mean = score_sum / scored if scored else math.nan
+            variance = max(score_sq_sum / scored - mean * mean, 0.0) if scored else math.nan
+            aggregates[name] = {
+                "documents": int(documents),
+                "scored_documents": int(scored),
+                "sentiment_mean": mean,
+                "sentiment_variance": variance,
+            }
+        return aggregates
+
+    def recent_documents(self, keyword: str, window_seconds: float, now: Optional[float] = None) -> List[ProcessedDocument]:
+        """Stored documents of `keyword` inside the window, newest first."""
+        now = self._clock() if now is None else now
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT document FROM documents WHERE keyword = ? AND timestamp >= ? ORDER BY timestamp DESC",
+                (keyword, now - window_seconds),
+            ).fetchall()
+        return [ProcessedDocument(**json.loads(document)) for (document,) in rows]
+
+    def snapshot(self, keyword: str) -> Optional[Dict]:
+        """Window aggregates the last strategist summary for `keyword` was based on."""
+        with self._lock:
+            row = self._db.execute("SELECT aggregates FROM snapshots WHERE keyword = ?", (keyword,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_snapshot(self, keyword: str, aggregates: Dict) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO snapshots (keyword, aggregates, updated_at) VALUES (?, ?, ?)",
+                (keyword, json.dumps(aggregates), self._clock()),
+            )
+            self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_shared_store: Optional[IncrementalStore] = None
+_shared_store_lock = threading.Lock()
+
+
+def get_incremental_store() -> IncrementalStore:
+    """Returns the process-wide incremental store at INCREMENTAL_STORE_PATH."""
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is None:
+            _shared_store = IncrementalStore(get_incremental_store_path() or None)
+        return _shared_store
+
+
+def reset_incremental_store() -> None:
+    """Closes the shared store so the next caller re-reads the store settings."""
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is not None:
+            _shared_store.close()
+        _shared_store = None
+
+
+class IncrementalTracker:
+    """
+    Graph nodes of the incremental pipeline. Scouted documents are cut down to
+    the ones past the watermark before analysis, merged into the rolling
+    windows afterwards, and the strategist only runs for keywords whose
+    windows moved by more than the configured delta.
+    """
+    def __init__(self, store: Optional[IncrementalStore] = None, sentiment_delta: Optional[float] = None):
+        # None defers to INCREMENTAL_STORE_PATH / INCREMENTAL_SENTIMENT_DELTA at run time.
+        self.store = store
+        self.sentiment_delta = sentiment_delta
+
+    def _get_store(self) -> IncrementalStore:
+        return self.store or get_incremental_store()
+
+    def select_new_documents(self, state: GraphState) -> dict:
+        print("--- INCREMENTAL: Watermark ---")
+        raw_documents = state["raw_documents"]
+        new_documents = self._get_store().select_new(raw_documents)
+        print(f"{len(new_documents)}/{len(raw_documents)} scouted documents are new since the last run.")
+        return {"raw_documents": new_documents}
+
+    def merge_windows(self, state: GraphState) -> dict:
+        print("--- INCREMENTAL: Rolling windows ---")
+        store = self._get_store()
+        delta = get_incremental_sentiment_delta() if self.sentiment_delta is None else self.sentiment_delta
+        store.add_documents(state["processed_documents"])
+
+        window_aggregates = {}
+        changed = []
+        for keyword in dict.fromkeys(state["keywords"]):
+            window_aggregates[keyword] = store.window_aggregates(keyword)
+            if aggregates_moved(store.snapshot(keyword), window_aggregates[keyword], delta):
+                changed.append(keyword)
+        print(f"Sentiment moved beyond {delta} for: {', '.join(changed) or 'no keyword'}.")
+
+        update = {"window_aggregates": window_aggregates, "strategist_keywords": changed}
+        if changed:
+            # The strategist reasons over the recent window, not just this tick's documents,
+            # and the evaluator simulates its outcome from that same window.
+            window_documents = [
+                doc for keyword in changed
+                for doc in store.recent_documents(keyword, WINDOWS[STRATEGIST_WINDOW])
+            ]
+            update["processed_documents"] = window_documents
+            update["raw_documents"] = [
+                RawDocument(source=doc["source"], content=doc["content"], timestamp=doc["timestamp"],
+                            keyword=doc["keyword"])
+                for doc in window_documents
+            ]
+        return update
+
+    def next_step(self, state: GraphState) -> str:
+        from langgraph.graph import END
+        return "strategist" if state.get("strategist_keywords") else END
+
+    def record_summaries(self, state: GraphState) -> dict:
+        """Remembers the aggregates behind each new summary; later deltas are measured against them."""
+        store = self._get_store()
+        for summary in state.get("strategic_summaries", []):
+            keyword = summary.get("keyword")
+            if keyword in state.get("window_aggregates", {}):
+                store.save_snapshot(keyword, state["window_aggregates"][keyword])
+        return {}
+
+incremental_tracker = IncrementalTracker()
@@ -0,0 +1,384 @@
+import contextvars
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Tuple
+
+from config import get_trace_export_path
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+SERVICE_NAME = "cryptosentinator"
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: str = "") -> str:
+    parts = [f'{key}="{_escape_label(value)}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms, rendered in the Prometheus text exposition format."""
+    def __init__(self, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._help: Dict[str, str] = {}
+        self._types: Dict[str, str] = {}
+        self._counters: Dict[Tuple[str, tuple], float] = {}
+        self._histograms: Dict[Tuple[str, tuple], list] = {}
+
+    def inc(self, name: str, value: float = 1.0, help: str = "", **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._types.setdefault(name, "counter")
+            if help:
+                self._help.setdefault(name, help)
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, help: str = "", **labels) -> None:
+        """Sets a gauge, a value that can go down as well as up."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._types.setdefault(name, "gauge")
+            if help:
+                self._help.setdefault(name, help)
+            self._counters[key] = value
+
+    def observe(self, name: str, value: float, help: str = "", **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._types.setdefault(name, "histogram")
+            if help:
+                self._help.setdefault(name, help)
+            # [per-bucket counts..., sum, count]
+            histogram = self._histograms.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram[i] += 1
+                    break
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def value(self, name: str, **labels) -> float:
+        """Current value of a counter, or the observation count of a histogram."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            if key in self._histograms:
+                return self._histograms[key][-1]
+            return self._counters.get(key, 0.0)
+
+    def render(self) -> str:
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, list(values)) for key, values in self._histograms.items())
+            types = dict(self._types)
+            help_texts = dict(self._help)
+
+        lines: List[str] = []
+        described = set()
+
+        def describe(name: str) -> None:
+            if name not in described:
+                described.add(name)
+                if name in help_texts:
+                    lines.append(f"# HELP {name} {help_texts[name]}")
+                lines.append(f"# TYPE {name} {types[name]}")
+
+        for (name, labels), value in counters:
+            describe(name)
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        for (name, labels), values in histograms:
+            describe(name)
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                le = f'le="{bound:g}"'
+                lines.append(f"{name}_bucket{_format_labels(labels, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{name}_bucket{_format_labels(labels, le)} {values[-1]}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {values[-2]:g}")
+            lines.append(f"{name}_count{_format_labels(labels)} {values[-1]}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+metrics = MetricsRegistry()
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}  # OTLP/JSON encodes 64-bit integers as strings
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Span:
+    """
+    One timed operation. Counters added with `add` (LLM calls, tokens, cache
+    hits) roll up into every enclosing span, so a node span also reports what
+    its tools spent.
+    """
+    def __init__(self, name: str, parent: Optional["Span"] = None, attributes: Optional[Dict] = None):
+        self.name = name
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.attributes: Dict = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def set_attribute(self, key: str, value) -> None:
+        with self._lock:
+            self.attributes[key] = value
+
+    def add(self, key: str, value: float = 1) -> None:
+        span = self
+        while span is not None:
+            with span._lock:
+                span.attributes[key] = span.attributes.get(key, 0) + value
+            span = span.parent
+
+    @property
+    def duration(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def to_otlp(self) -> dict:
+        """The span in the OTLP/JSON encoding used by OpenTelemetry collectors."""
+        with self._lock:
+            attributes = dict(self.attributes)
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent:
+            span["parentSpanId"] = self.parent.span_id
+        return span
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+_finished_spans: deque = deque(maxlen=2048)
+_export_lock = threading.Lock()
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def recent_spans() -> List[Span]:
+    """The most recently finished spans, oldest first."""
+    with _export_lock:
+        return list(_finished_spans)
+
+
+def _export(span: Span) -> None:
+    with _export_lock:
+        _finished_spans.append(span)
+        path = get_trace_export_path()
+        if not path:
+            return
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        record = {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": SERVICE_NAME}, "spans": [span.to_otlp()]}],
+        }]}
+        with open(path, "a", encoding="utf-8") as handle:
+            handle.write(json.dumps(record) + "\n")
+
+
+@contextmanager
+def start_span(name: str, **attributes) -> Iterator[Span]:
+    """Opens a span as a child of the current one; it is exported when the block exits."""
+    span = Span(name, _current_span.get(), attributes)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except Exception as e:
+        span.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        span.end_ns = time.time_ns()
+        _current_span.reset(token)
+        _export(span)
+
+
+def bind_context(fn: Callable) -> Callable:
+    """
+    Wraps `fn` so it runs in the caller's context, keeping thread-pool work
+    inside the span that submitted it. Each call gets its own copy, so the
+    wrapper can run on several threads at once.
+    """
+    captured = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        return captured.copy().run(fn, *args, **kwargs)
+    return wrapper
+
+
+def record_llm_call(model: str, prompt_tokens: int, output_tokens: int, latency: float, error: bool = False) -> None:
+    status = "error" if error else "ok"
+    metrics.inc("sentinator_llm_calls_total", help="LLM requests by model and outcome.", model=model, status=status)
+    metrics.inc("sentinator_llm_tokens_total", prompt_tokens, help="LLM tokens by model and direction.",
+                model=model, direction="prompt")
+    metrics.inc("sentinator_llm_tokens_total", output_tokens, model=model, direction="output")
+    metrics.observe("sentinator_llm_latency_seconds", latency, help="LLM request latency.", model=model)
+    span = _current_span.get()
+    if span is not None:
+        span.add("llm.calls")
+        span.add("llm.prompt_tokens", prompt_tokens)
+        span.add("llm.output_tokens", output_tokens)
+        if error:
+            span.add("llm.errors")
+
+
+def record_prompt(prompt: str, prefix_tokens: int, input_tokens: int, truncated: int = 0) -> None:
+    """Estimated size of one rendered prompt: its static (cacheable) prefix and its per-call input."""
+    metrics.inc("sentinator_prompt_tokens_total", prefix_tokens,
+                help="Estimated prompt tokens by prompt and part.", prompt=prompt, part="prefix")
+    metrics.inc("sentinator_prompt_tokens_total", input_tokens, prompt=prompt, part="input")
+    if truncated:
+        metrics.inc("sentinator_prompt_truncations_total", truncated,
+                    help="Texts cut to the prompt token limits.", prompt=prompt)
+    span = _current_span.get()
+    if span is not None:
+        span.add("prompt.tokens", prefix_tokens + input_tokens)
+        if truncated:
+            span.add("prompt.truncated", truncated)
+
+
+def record_token_budget_exceeded(model: str) -> None:
+    metrics.inc("sentinator_llm_budget_rejections_total",
+                help="LLM calls refused because the run's token budget was spent.", model=model)
+    span = _current_span.get()
+    if span is not None:
+        span.add("llm.budget_rejections")
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    result = "hit" if hit else "miss"
+    metrics.inc("sentinator_cache_requests_total", help="Cache lookups by cache and result.", cache=cache, result=result)
+    span = _current_span.get()
+    if span is not None:
+        span.add("cache.hits" if hit else "cache.misses")
+
+
+def record_report_request(result: str) -> None:
+    """Counts an analysis request by how it was served: 'hit', 'stale', 'miss' or 'coalesced'."""
+    metrics.inc("sentinator_report_requests_total", help="Analysis requests by cache result.", result=result)
+
+
+def record_job_event(event: str, queue_depth: int, wait_seconds: Optional[float] = None) -> None:
+    """Counts a job queue event ('queued', 'rejected', 'started', 'done', 'failed') and updates the queue depth."""
+    metrics.inc("sentinator_jobs_total", help="Pipeline jobs by queue event.", event=event)
+    metrics.set("sentinator_job_queue_depth", queue_depth, help="Pipeline jobs waiting for a worker.")
+    if wait_seconds is not None:
+        metrics.observe("sentinator_job_wait_seconds", wait_seconds, help="Time pipeline jobs spent queued.")
+
+
+def _document_count(state) -> Optional[int]:
+    """Documents carried by a state or node output; None when it carries none."""
+    if not isinstance(state, dict):
+        return None
+    for key in ("processed_documents", "raw_documents"):
+        if state.get(key) is not None:
+            return len(state[key])
+    return None
+
+
+def instrument_node(name: str, fn: Callable) -> Callable:
+    """Wraps a LangGraph node: one span per run plus duration, run and document metrics."""
+    @functools.wraps(fn)
+    def wrapper(state):
+        with start_span(f"node {name}", **{"pipeline.node": name}) as span:
+            documents_in = _document_count(state)
+            if documents_in is not None:
+                span.set_attribute("documents.in", documents_in)
+            started = time.perf_counter()
+            status = "error"
+            try:
+                output = fn(state)
+                status = "ok"
+            finally:
+                metrics.observe("sentinator_node_duration_seconds", time.perf_counter() - started,
+                                help="Wall time of each pipeline node.", node=name)
+                metrics.inc("sentinator_node_runs_total", help="Pipeline node runs by outcome.", node=name, status=status)
+            documents = _document_count(output)
+            if documents is not None:
+                span.set_attribute("documents.out", documents)
+                metrics.inc("sentinator_documents_total", documents, help="Documents produced by each node.", node=name)
+            return output
+    return wrapper
+
+
+def instrument_tool(fn: Callable) -> Callable:
+    """Wraps a tool function (below its @tool decorator): one span per call plus duration and call metrics."""
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with start_span(f"tool {name}", **{"tool.name": name}):
+            started = time.perf_counter()
+            status = "error"
+            try:
+                result = fn(*args, **kwargs)
+                status = "ok"
+                return result
+            finally:
+                metrics.observe("sentinator_tool_duration_seconds", time.perf_counter() - started,
+                                help="Wall time of each tool call.", tool=name)
+                metrics.inc("sentinator_tool_calls_total", help="Tool calls by outcome.", tool=name, status=status)
+    return wrapper
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> "ThreadingHTTPServer":
+    """Serves GET /metrics in the Prometheus text format from a daemon thread."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
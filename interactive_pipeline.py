@@ -2,51 +2,97 @@ import dotenv, os
 dotenv.load_dotenv()
 
 #from .config import get_gemini_api_key
-from langgraph.graph import StateGraph, END
-from graph_state import GraphState
-from agents.scout_agent import scout_agent
-from agents.intelligence_analyst_agent import intelligence_analyst_agent
-from agents.strategist_agent import strategist_agent
-from agents.evaluator_agent import evaluator_agent
+from collections import Counter
+from typing import Generator, Iterator, Optional
+from instrumentation import start_span
+from job_queue import QueueFullError
+from request_cache import get_report_cache
 import pprint
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY") #or get_gemini_api_key()
 
+NO_SUMMARY_MESSAGE = "## Analysis Complete\nNo strategic summary could be generated. This might be due to a lack of data for the provided keywords."
 
 
-#def run_crypto_sentinator_v2(keywords: list[str]):
-    #"""Initializes and runs the enhanced multi-agent system."""
-def create_interactive_pipeline(keywords_string: str) -> str:
+def get_compiled_pipeline():
     """
-    Takes a comma-separated string of keywords, runs the full analysis pipeline,
-    and returns a formatted Markdown string of the results.
+    The shared compiled graph. LangGraph, the agents and their model clients are
+    only imported here, on the first request, so importing this module (and
+    starting the UI) stays fast.
     """
-    print(f"Received keywords for analysis: {keywords_string}")
+    from pipeline import get_compiled_pipeline as compiled_pipeline
+    return compiled_pipeline()
+
+
+def warm_up() -> None:
+    """Imports and compiles the pipeline ahead of the first request, e.g. from a background thread."""
+    get_compiled_pipeline()
+
+
+
+def _validate_request(keywords_string: str) -> Optional[str]:
+    """Returns the Markdown message for an invalid request, or None if it can run."""
     if not GEMINI_API_KEY:
         #raise ValueError("GEMINI_API_KEY not found. Please set it in your .env file.")
         return "## Error: `OPENAI_API_KEY` is not set.\nPlease configure it in your environment or secrets."
     
     if not keywords_string or not keywords_string.strip():
         return "## Warning: No keywords provided.\nPlease enter at least one keyword to start the analysis."
+    return None
+
+
+def _parse_keywords(keywords_string: str) -> list:
+    return [keyword.strip() for keyword in keywords_string.split(',') if keyword.strip()]
+
+
+def _render_failure(error: Exception) -> str:
+    return f"## Analysis Failed\nAn unexpected error occurred during the analysis. Please check the logs.\n\n**Error details:**\n```\n{error}\n```"
+
+
+def _render_busy(error: QueueFullError) -> str:
+    return f"## Server Busy\n{error} Estimated wait: about {error.retry_after:.0f} seconds."
+
+
+#def run_crypto_sentinator_v2(keywords: list[str]):
+    #"""Initializes and runs the enhanced multi-agent system."""
+def _persist_run(final_state: Optional[dict]) -> None:
+    """Saves a finished run to the analysis store when STORAGE_ENABLED is set."""
+    from config import get_storage_enabled
+    if final_state and get_storage_enabled():
+        from storage import persist_run
+        persist_run(final_state)
+
+
+def create_interactive_pipeline(keywords_string: str, tenant: Optional[str] = None) -> str:
+    """
+    Takes a comma-separated string of keywords, runs the full analysis pipeline,
+    and returns a formatted Markdown string of the results. `tenant` (an API
+    user or client IP) is the unit of fairness in the job queue.
+    """
+    print(f"Received keywords for analysis: {keywords_string}")
+    validation_error = _validate_request(keywords_string)
+    if validation_error:
+        return validation_error
+
+    target_keywords = _parse_keywords(keywords_string)
+    # Identical concurrent requests share one run; finished reports may be served from cache.
+    try:
+        return get_report_cache().get(_cache_key(target_keywords), lambda: _invoke_report(target_keywords), tenant)
+    except QueueFullError as e:
+        return _render_busy(e)
 
-    target_keywords = [keyword.strip() for keyword in keywords_string.split(',')]
 
-    workflow = StateGraph(GraphState)
+def _cache_key(target_keywords: list) -> tuple:
+    """Requests for the same keyword set, in any order or case, share runs and cached reports."""
+    return tuple(sorted({keyword.casefold() for keyword in target_keywords}))
 
-    # Define the nodes with their new roles
-    workflow.add_node("scout", scout_agent.run)
-    workflow.add_node("analyst", intelligence_analyst_agent.run)
-    workflow.add_node("strategist", strategist_agent.run)
-    workflow.add_node("evaluator", evaluator_agent.run)
 
-    # Define the new workflow
-    workflow.set_entry_point("scout")
-    workflow.add_edge("scout", "analyst")
-    workflow.add_edge("analyst", "strategist")
-    workflow.add_edge("strategist", "evaluator")
-    workflow.add_edge("evaluator", END)
+def _invoke_report(target_keywords: list) -> Generator[str, None, bool]:
+    """Runs the graph to completion and yields the report; returns whether the report may be cached."""
+    from checkpointing import CheckpointedRun, run_id_for
 
-    app = workflow.compile()
+    # The graph is compiled once per process and shared by every request.
+    app = get_compiled_pipeline()
 
     # Run the graph
     #initial_state = {"keywords": keywords}
@@ -56,10 +102,13 @@ def create_interactive_pipeline(keywords_string: str) -> str:
     
     #final_state = app.invoke(initial_state)
     try:
-        final_state = app.invoke(initial_state)
+        with start_span("pipeline run", keywords=", ".join(target_keywords)):
+            final_state = CheckpointedRun(app, initial_state, run_id_for(target_keywords, "interactive")).invoke()
     except Exception as e:
         print(f"An error occurred during graph execution: {e}")
-        return f"## Analysis Failed\nAn unexpected error occurred during the analysis. Please check the logs.\n\n**Error details:**\n```\n{e}\n```"
+        yield _render_failure(e)
+        return False
+    _persist_run(final_state)
 
     #print("\n🏁 CryptoSentinator v2 Run Finished 🏁")
     #print("\n--- Strategic Summary ---")
@@ -78,11 +127,15 @@ def create_interactive_pipeline(keywords_string: str) -> str:
     #target_keywords = ["Bitcoin"]
     #results = run_crypto_sentinator_v2(target_keywords)
     if not final_state or not final_state.get("strategic_summaries"):
-        return "## Analysis Complete\nNo strategic summary could be generated. This might be due to a lack of data for the provided keywords."
+        yield NO_SUMMARY_MESSAGE
+        return False
 
-    summary = final_state["strategic_summaries"][0]
-    evaluation = final_state.get("evaluation", {})
+    yield render_report(final_state)
+    return True
 
+
+def _render_keyword_report(summary: dict, evaluation: dict) -> str:
+    """Renders the hypothesis, evaluation and evidence sections for one keyword."""
     report = f"""
     # 📊 Analysis Report for: {summary.get('cryptocurrency', 'N/A')}
 
@@ -111,3 +164,127 @@ def create_interactive_pipeline(keywords_string: str) -> str:
         report += "- No specific evidence snippets were extracted.\n"
         
     return report
+
+
+def render_report(final_state: dict) -> str:
+    """Renders one report section per keyword, pairing each summary with its evaluation."""
+    summaries = final_state["strategic_summaries"]
+    evaluations = final_state.get("evaluations") or [final_state.get("evaluation") or {}]
+    evaluations_by_keyword = {evaluation.get("keyword"): evaluation for evaluation in evaluations}
+
+    sections = []
+    for index, summary in enumerate(summaries):
+        evaluation = evaluations_by_keyword.get(summary.get("keyword"))
+        if evaluation is None:
+            evaluation = evaluations[index] if index < len(evaluations) else {}
+        sections.append(_render_keyword_report(summary, evaluation))
+    return "\n\n---\n".join(sections)
+
+
+def _render_scout_progress(state: dict) -> str:
+    raw_documents = state.get("raw_documents", [])
+    counts = Counter((doc["keyword"], doc["source"]) for doc in raw_documents)
+    lines = [f"## 🔎 Scout: {len(raw_documents)} documents gathered"]
+    for keyword in state["keywords"]:
+        per_source = ", ".join(f"{source}: {count}" for (kw, source), count in sorted(counts.items()) if kw == keyword)
+        lines.append(f"- **{keyword}:** {per_source or 'no documents'}")
+    return "\n".join(lines)
+
+
+def _render_analyst_progress(state: dict) -> str:
+    from tools.aggregation import aggregate_documents  # NumPy is only needed once results arrive
+
+    aggregates = state.get("stream_aggregates")
+    if aggregates is None:
+        aggregates = aggregate_documents(state.get("processed_documents", []))
+    lines = ["## 🧪 Analyst: sentiment overview"]
+    for keyword in state["keywords"]:
+        aggregate = aggregates.get(keyword)
+        if not aggregate:
+            lines.append(f"- **{keyword}:** no documents")
+            continue
+        if aggregate["scored_documents"]:
+            average = f"`{aggregate['sentiment_mean']:.2f}` (std dev {aggregate['sentiment_variance'] ** 0.5:.2f})"
+        else:
+            average = "`n/a`"
+        top_topics = ", ".join(f"{topic}: {count:g}" for topic, count in list(aggregate["topics"].items())[:3])
+        lines.append(f"- **{keyword}:** average sentiment {average} over {aggregate['documents']} documents"
+                     f" ({top_topics or 'no topics'})")
+    metrics = state.get("analyst_metrics")
+    if metrics and metrics["scored_locally"]:
+        lines.append(f"- Escalated to Gemini: {metrics['escalated']}/{metrics['documents']} documents "
+                     f"({metrics['escalation_rate']:.0%}), {metrics['llm_calls']} LLM calls")
+    if metrics and metrics.get("unique_documents", 0) < metrics.get("total_documents", 0):
+        lines.append(f"- Near-duplicates collapsed: {metrics['total_documents']} documents analyzed as "
+                     f"{metrics['unique_documents']} unique texts")
+    return "\n".join(lines)
+
+
+def _render_strategist_progress(state: dict) -> str:
+    lines = ["## 🧠 Strategist: hypotheses"]
+    for summary in state.get("strategic_summaries", []):
+        lines.append(f"- **{summary.get('cryptocurrency', 'N/A')}:** {summary.get('hypothesis', 'N/A')} "
+                     f"(confidence `{summary.get('confidence', 'N/A')}`)")
+    if len(lines) == 1:
+        lines.append("- No hypothesis could be formed.")
+    return "\n".join(lines)
+
+
+_PROGRESS_RENDERERS = {
+    "scout": _render_scout_progress,
+    "analyst": _render_analyst_progress,
+    "ingest": _render_analyst_progress,
+    "strategist": _render_strategist_progress,
+}
+
+
+def stream_interactive_pipeline(keywords_string: str, tenant: Optional[str] = None) -> Iterator[str]:
+    """
+    Streaming variant of create_interactive_pipeline. Yields a progressively
+    longer Markdown report after each graph node finishes (scout counts, then
+    sentiment statistics, then hypotheses) and finally the full report.
+    """
+    print(f"Received keywords for streamed analysis: {keywords_string}")
+    validation_error = _validate_request(keywords_string)
+    if validation_error:
+        yield validation_error
+        return
+
+    target_keywords = _parse_keywords(keywords_string)
+    try:
+        yield from get_report_cache().stream(_cache_key(target_keywords), lambda: _stream_report(target_keywords), tenant)
+    except QueueFullError as e:
+        yield _render_busy(e)
+
+
+def _stream_report(target_keywords: list) -> Generator[str, None, bool]:
+    """Streams the graph, yielding the report so far after each node; returns whether the final report may be cached."""
+    from checkpointing import CheckpointedRun, run_id_for
+
+    app = get_compiled_pipeline()
+    run = CheckpointedRun(app, {"keywords": target_keywords}, run_id_for(target_keywords, "interactive"))
+    state = dict(run.values)
+    sections = [f"# ⏳ Analyzing: {', '.join(target_keywords)}"]
+    if run.resumed_at:
+        sections[0] += f"\n\n♻️ Resuming the interrupted run at: {', '.join(run.resumed_at)}"
+    yield sections[0]
+
+    try:
+        for update in run.stream(stream_mode="updates"):
+            for node_name, node_output in update.items():
+                state.update(node_output or {})
+                renderer = _PROGRESS_RENDERERS.get(node_name)
+                if renderer:
+                    sections.append(renderer(state))
+                    yield "\n\n".join(sections)
+    except Exception as e:
+        print(f"An error occurred during graph execution: {e}")
+        yield _render_failure(e)
+        return False
+    _persist_run(state)
+
+    if not state.get("strategic_summaries"):
+        yield NO_SUMMARY_MESSAGE
+        return False
+    yield render_report(state)
+    return True
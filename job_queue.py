@@ -0,0 +1,215 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from config import get_job_queue_size, get_job_queue_tenant_limit, get_job_workers
+from instrumentation import bind_context, record_job_event
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BACKGROUND = 2  # e.g. refreshing a stale cached report nobody is waiting for
+DEFAULT_TENANT = "anonymous"
+# Finished jobs kept for polling by id.
+FINISHED_JOBS_RETAINED = 1024
+
+
+class QueueFullError(Exception):
+    """The job was rejected because the queue (or the tenant's share of it) is full; the HTTP analogue is 429."""
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Job:
+    """A queued call. Poll `status` or block on `wait()` for its result."""
+    def __init__(self, job_id: str, fn: Callable, args: tuple, kwargs: dict, tenant: str, priority: int):
+        self.id = job_id
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.tenant = tenant
+        self.priority = priority
+        self.status = "queued"  # queued -> running -> done | failed
+        self.submitted_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self._finished = threading.Event()
+
+    def wait(self, timeout: Optional[float] = None) -> Any:
+        """The job's return value; re-raises its exception. TimeoutError if it has not finished in time."""
+        if not self._finished.wait(timeout):
+            raise TimeoutError(f"Job {self.id} did not finish within {timeout} seconds.")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def done(self) -> bool:
+        return self._finished.is_set()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Status of the job for polling clients."""
+        now = time.monotonic()
+        started = self.started_at or now
+        return {
+            "id": self.id,
+            "tenant": self.tenant,
+            "status": self.status,
+            "wait_seconds": started - self.submitted_at,
+            "run_seconds": (self.finished_at or now) - started if self.started_at else 0.0,
+            "error": None if self.error is None else str(self.error),
+        }
+
+
+class JobQueue:
+    """
+    Bounded priority queue in front of a fixed pool of worker threads.
+    Higher-priority jobs (lower numbers) run first. Within a priority,
+    tenants (API users or client IPs) take turns, so one busy tenant cannot
+    starve the others. When the queue is full, `submit` fails fast with
+    QueueFullError instead of letting the backlog grow.
+    """
+    def __init__(self, workers: Optional[int] = None, max_queued: Optional[int] = None,
+                 max_queued_per_tenant: Optional[int] = None):
+        # None defers to the JOB_* settings.
+        self.workers = workers or get_job_workers()
+        self.max_queued = max_queued or get_job_queue_size()
+        self.max_queued_per_tenant = max_queued_per_tenant or get_job_queue_tenant_limit()
+        self._condition = threading.Condition()
+        # priority -> tenant -> that tenant's jobs, tenants in round-robin order
+        self._queues: Dict[int, "OrderedDict[str, Deque[Job]]"] = {}
+        self._queued = 0
+        self._queued_by_tenant: Dict[str, int] = {}
+        self._running = 0
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._threads: List[threading.Thread] = []
+        self._closed = False
+        self._average_run_seconds = 0.0
+
+    def submit(self, fn: Callable, *args, tenant: Optional[str] = None, priority: int = PRIORITY_NORMAL,
+               **kwargs) -> Job:
+        """Queues `fn(*args, **kwargs)`; raises QueueFullError if there is no room for it."""
+        tenant = tenant or DEFAULT_TENANT
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The job queue has been shut down.")
+            if self._queued >= self.max_queued or self._queued_by_tenant.get(tenant, 0) >= self.max_queued_per_tenant:
+                record_job_event("rejected", self._queued)
+                scope = "" if self._queued >= self.max_queued else f" for {tenant}"
+                raise QueueFullError(f"The analysis queue is full{scope}. Please retry shortly.", self._retry_after())
+            job = Job(str(next(self._ids)), bind_context(fn), args, kwargs, tenant, priority)
+            self._queues.setdefault(priority, OrderedDict()).setdefault(tenant, deque()).append(job)
+            self._queued += 1
+            self._queued_by_tenant[tenant] = self._queued_by_tenant.get(tenant, 0) + 1
+            self._jobs[job.id] = job
+            self._start_workers()
+            record_job_event("queued", self._queued)
+            self._condition.notify()
+            return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """A queued, running or recently finished job by id."""
+        with self._condition:
+            return self._jobs.get(job_id)
+
+    def _retry_after(self) -> float:
+        # Rough time until a slot frees up: the queued jobs spread over the workers.
+        return max(1.0, self._average_run_seconds * (self._queued + 1) / self.workers)
+
+    def _start_workers(self) -> None:
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"job-worker-{len(self._threads)}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def _next_job(self) -> Optional[Job]:
+        # Called with the lock held: the oldest job of the next tenant in line at the highest priority.
+        for priority in sorted(self._queues):
+            tenants = self._queues[priority]
+            tenant, jobs = next(iter(tenants.items()))
+            job = jobs.popleft()
+            if jobs:
+                tenants.move_to_end(tenant)
+            else:
+                del tenants[tenant]
+                if not tenants:
+                    del self._queues[priority]
+            self._queued -= 1
+            self._queued_by_tenant[tenant] -= 1
+            if not self._queued_by_tenant[tenant]:
+                del self._queued_by_tenant[tenant]
+            return job
+        return None
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._queued or self._closed)
+                job = self._next_job()
+                if job is None:
+                    return
+                self._running += 1
+                job.status = "running"
+                job.started_at = time.monotonic()
+                record_job_event("started", self._queued, wait_seconds=job.started_at - job.submitted_at)
+            try:
+                job.result = job.fn(*job.args, **job.kwargs)
+                job.status = "done"
+            except Exception as e:
+                job.error = e
+                job.status = "failed"
+                print(f"Job {job.id} for {job.tenant} failed: {e}")
+            job.finished_at = time.monotonic()
+            job.fn = job.args = job.kwargs = None
+            with self._condition:
+                self._running -= 1
+                run_seconds = job.finished_at - job.started_at
+                self._average_run_seconds += 0.2 * (run_seconds - self._average_run_seconds)
+                record_job_event(job.status, self._queued)
+                self._retire()
+            job._finished.set()
+
+    def _retire(self) -> None:
+        # Forgets the oldest finished jobs beyond the retention limit.
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished_at is not None]
+        for job_id in finished[:max(0, len(finished) - FINISHED_JOBS_RETAINED)]:
+            del self._jobs[job_id]
+
+    def stats(self) -> Dict[str, int]:
+        with self._condition:
+            return {"queued": self._queued, "running": self._running, "workers": self.workers}
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stops the workers once the queued jobs have run."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            threads = list(self._threads)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+
+_job_queue: Optional[JobQueue] = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """The process-wide job queue, configured from the JOB_* settings on first use."""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue()
+        return _job_queue
+
+
+def reset_job_queue() -> None:
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is not None:
+            _job_queue.shutdown(wait=False)
+        _job_queue = None
@@ -0,0 +1,385 @@
+import asyncio
+import contextlib
+import math
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from typing import TYPE_CHECKING, Dict, Iterator, Optional
+
+from config import (
+    get_gemini_api_key,
+    get_gemini_api_base_url,
+    get_gemini_timeout_seconds,
+    get_gemini_max_retries,
+    get_gemini_backoff_seconds,
+    get_gemini_hedge_after_seconds,
+    get_gemini_pool_size,
+    get_llm_run_token_budget,
+)
+from instrumentation import record_llm_call, record_token_budget_exceeded
+from rate_limiter import RateLimiter, get_gemini_rate_limiter
+
+if TYPE_CHECKING:
+    import requests
+
+DEFAULT_MODEL = "gemini-2.0-flash"
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+MAX_BACKOFF_SECONDS = 30.0
+# Gemini averages about four characters per token on English text.
+CHARS_PER_TOKEN = 4
+
+
+class LLMError(Exception):
+    """A Gemini request failed for good: a non-retryable status, or retries ran out."""
+    def __init__(self, message: str, status: Optional[int] = None, retry_after: Optional[str] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class TokenBudgetExceeded(LLMError):
+    """The run's token budget cannot cover another prompt; the request was not sent."""
+
+
+def count_tokens(text: str) -> int:
+    """
+    Local estimate of the tokens in `text`. It is computed before a prompt is
+    sent; Gemini's countTokens endpoint would be exact but costs a round trip.
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+class TokenBudget:
+    """
+    Token ceiling of one pipeline run, shared by every LLM call the run makes
+    (from any thread that inherited its context). Prompts are charged with
+    their estimate before sending and settled with the reported usage after.
+    """
+    def __init__(self, limit: int = 0):
+        self.limit = limit
+        self.used = 0
+        self.calls = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int) -> None:
+        with self._lock:
+            if self.limit and self.used + tokens > self.limit:
+                self.rejected += 1
+                raise TokenBudgetExceeded(
+                    f"Run token budget exhausted: {self.used} of {self.limit} tokens used, "
+                    f"the next prompt needs about {tokens}")
+            self.used += tokens
+            self.calls += 1
+
+    def settle(self, reserved: int, actual: int) -> None:
+        """Replaces a reservation with the tokens the call actually consumed."""
+        with self._lock:
+            self.used += actual - reserved
+
+    def remaining(self) -> Optional[int]:
+        with self._lock:
+            return max(0, self.limit - self.used) if self.limit else None
+
+
+_run_budget: ContextVar[Optional[TokenBudget]] = ContextVar("sentinator_token_budget", default=None)
+
+
+def current_token_budget() -> Optional[TokenBudget]:
+    """The budget of the run the caller belongs to, or None outside a run."""
+    return _run_budget.get()
+
+
+@contextlib.contextmanager
+def run_token_budget(limit: Optional[int] = None) -> Iterator[TokenBudget]:
+    """
+    Scopes a token budget (default LLM_RUN_TOKEN_BUDGET, 0 = unlimited) to
+    the calls made inside the block. Nested runs keep the outer budget.
+    """
+    budget = _run_budget.get()
+    if budget is not None:
+        yield budget
+        return
+    budget = TokenBudget(get_llm_run_token_budget() if limit is None else limit)
+    # Restored with set() rather than reset(): the block may span a generator's yields.
+    _run_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _run_budget.set(None)
+
+
+class LLMResponse:
+    """
+    Reply of one generate_content call. `text` matches the attribute of the
+    google-generativeai response objects the agents were written against.
+    """
+    def __init__(self, text: str, prompt_tokens: int = 0, output_tokens: int = 0,
+                 latency: float = 0.0, attempts: int = 1, hedged: bool = False):
+        self.text = text
+        self.prompt_tokens = prompt_tokens
+        self.output_tokens = output_tokens
+        self.latency = latency
+        self.attempts = attempts
+        self.hedged = hedged
+
+
+class _CallState:
+    """
+    Progress of one generate_content call, shared by its primary request, its
+    retries and a possible hedge. Each of those attempts is charged to `budget`.
+    """
+    def __init__(self, prompt: str, budget: Optional[TokenBudget] = None):
+        self.estimate = count_tokens(prompt)
+        self.budget = budget
+        self.started = threading.Event()  # set once the primary is sending (or has finished)
+        self.sent_at = 0.0
+        self.retrying = False
+
+
+_session: Optional["requests.Session"] = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> "requests.Session":
+    """
+    One keep-alive connection pool shared by every LLM client in the process.
+    `requests` is imported here, on the first call, to keep imports cheap.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    global _session
+    with _session_lock:
+        if _session is None:
+            pool_size = get_gemini_pool_size()
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+class GeminiClient:
+    """
+    Gemini REST client with pooled connections, exponential backoff with
+    jitter on 429/5xx, optional request hedging, the shared rate limiter,
+    and latency/token accounting. Settings left as None are read from the
+    GEMINI_* environment variables when a request is made.
+    """
+    def __init__(self, model_name: str = DEFAULT_MODEL, api_key: Optional[str] = None,
+                 base_url: Optional[str] = None, timeout: Optional[float] = None,
+                 max_retries: Optional[int] = None, backoff: Optional[float] = None,
+                 hedge_after: Optional[float] = None, rate_limiter: Optional[RateLimiter] = None,
+                 session: Optional["requests.Session"] = None, sleep=time.sleep, jitter=random.random):
+        self.model_name = model_name
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.hedge_after = hedge_after
+        self.rate_limiter = rate_limiter
+        self.session = session
+        self._sleep = sleep
+        self._jitter = jitter
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._latencies: deque = deque(maxlen=1024)
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.hedges = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+
+    def _setting(self, value, getter):
+        return getter() if value is None else value
+
+    def _request_once(self, prompt: str, call: Optional[_CallState] = None, acquire: bool = True) -> LLMResponse:
+        """One HTTP round trip. Raises LLMError, or requests exceptions for transport failures."""
+        budget = call.budget if call is not None else None
+        if budget is not None:
+            try:
+                budget.reserve(call.estimate)
+            except TokenBudgetExceeded:
+                record_token_budget_exceeded(self.model_name)
+                raise
+        if acquire:
+            (self.rate_limiter or get_gemini_rate_limiter()).acquire()
+        if call is not None and not call.started.is_set():
+            call.sent_at = time.perf_counter()
+            call.started.set()
+        url = f"{self._setting(self.base_url, get_gemini_api_base_url).rstrip('/')}/models/{self.model_name}:generateContent"
+        session = self.session or get_http_session()
+        with self._lock:
+            self.attempts += 1
+        response = session.post(
+            url,
+            json={"contents": [{"parts": [{"text": prompt}]}]},
+            headers={"x-goog-api-key": self._setting(self.api_key, get_gemini_api_key) or ""},
+            timeout=self._setting(self.timeout, get_gemini_timeout_seconds),
+        )
+        if response.status_code != 200:
+            raise LLMError(f"Gemini returned HTTP {response.status_code}: {response.text[:200]}",
+                           status=response.status_code, retry_after=response.headers.get("Retry-After"))
+        payload = response.json()
+        try:
+            parts = payload["candidates"][0]["content"]["parts"]
+        except (KeyError, IndexError, TypeError):
+            raise LLMError(f"Gemini response has no candidates: {str(payload)[:200]}")
+        usage = payload.get("usageMetadata", {})
+        reply = LLMResponse(
+            text="".join(part.get("text", "") for part in parts),
+            prompt_tokens=int(usage.get("promptTokenCount", 0)),
+            output_tokens=int(usage.get("candidatesTokenCount", 0)),
+        )
+        # A failed attempt keeps its estimate charged: the prompt may still have been billed.
+        if budget is not None:
+            budget.settle(call.estimate, (reply.prompt_tokens or call.estimate) + reply.output_tokens)
+        return reply
+
+    def _backoff_delay(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), MAX_BACKOFF_SECONDS)
+            except ValueError:
+                pass
+        # Full jitter: a random delay up to the exponential cap spreads retries out.
+        cap = min(self._setting(self.backoff, get_gemini_backoff_seconds) * (2 ** attempt), MAX_BACKOFF_SECONDS)
+        return cap * self._jitter()
+
+    def _request_with_retries(self, prompt: str, call: Optional[_CallState] = None) -> LLMResponse:
+        import requests
+
+        max_retries = self._setting(self.max_retries, get_gemini_max_retries)
+        attempt = 0
+        while True:
+            try:
+                response = self._request_once(prompt, call)
+                response.attempts = attempt + 1
+                return response
+            except (LLMError, requests.ConnectionError, requests.Timeout) as e:
+                status = getattr(e, "status", None)
+                retryable = not isinstance(e, LLMError) or status in RETRYABLE_STATUS
+                if not retryable or attempt >= max_retries:
+                    raise
+                delay = self._backoff_delay(attempt, getattr(e, "retry_after", None))
+                print(f"Gemini request failed ({e}). Retrying in {delay:.2f}s ({attempt + 1}/{max_retries}).")
+                with self._lock:
+                    self.retries += 1
+                if call is not None:
+                    call.retrying = True
+                self._sleep(delay)
+                attempt += 1
+
+    def _hedged_request(self, prompt: str, hedge_after: float, call: _CallState) -> LLMResponse:
+        with self._lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(max_workers=get_gemini_pool_size(),
+                                                          thread_name_prefix="llm-hedge")
+            executor = self._hedge_executor
+        primary = executor.submit(self._request_with_retries, prompt, call)
+        primary.add_done_callback(lambda future: call.started.set())
+        # Time spent queuing for a worker or a rate-limiter token is not the slow tail:
+        # the hedge clock starts when the primary's first attempt is sent.
+        call.started.wait()
+        if primary.done():
+            return primary.result()
+        try:
+            return primary.result(timeout=max(0.0, hedge_after - (time.perf_counter() - call.sent_at)))
+        except FutureTimeoutError:
+            pass
+        # A request in backoff is being throttled; a duplicate would only add to the load.
+        # The duplicate also needs its own quota token, and is not sent if none is free right now.
+        if call.retrying or (self.rate_limiter or get_gemini_rate_limiter()).try_acquire() > 0:
+            return primary.result()
+        # The first request is in the slow tail: race a single duplicate attempt and keep whichever answers first.
+        with self._lock:
+            self.hedges += 1
+        hedge = executor.submit(self._request_once, prompt, call, False)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    response = future.result()
+                    response.hedged = future is hedge
+                    return response
+        raise primary.exception()
+
+    def generate_content(self, prompt: str) -> LLMResponse:
+        """
+        Sends `prompt` to the model and returns its reply. Raises LLMError on
+        failure, and TokenBudgetExceeded without sending when the current
+        run's token budget cannot cover another attempt (first try, retry
+        or hedge) of the prompt.
+        """
+        call = _CallState(prompt, _run_budget.get())
+        started = time.perf_counter()
+        hedge_after = self._setting(self.hedge_after, get_gemini_hedge_after_seconds)
+        try:
+            if hedge_after > 0:
+                response = self._hedged_request(prompt, hedge_after, call)
+            else:
+                response = self._request_with_retries(prompt, call)
+        except Exception as e:
+            if isinstance(e, TokenBudgetExceeded) and not call.sent_at:
+                raise  # refused before anything was sent: not a failed request
+            with self._lock:
+                self.calls += 1
+                self.errors += 1
+            record_llm_call(self.model_name, 0, 0, time.perf_counter() - started, error=True)
+            raise
+        response.latency = time.perf_counter() - started
+        record_llm_call(self.model_name, response.prompt_tokens, response.output_tokens, response.latency)
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += response.prompt_tokens
+            self.output_tokens += response.output_tokens
+            self._latencies.append(response.latency)
+        return response
+
+    async def agenerate_content(self, prompt: str) -> LLMResponse:
+        """Async variant of generate_content; the request runs on a worker thread."""
+        return await asyncio.to_thread(self.generate_content, prompt)
+
+    def stats(self) -> Dict[str, float]:
+        """Call, retry and token counters plus latency percentiles of recent calls."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                "calls": self.calls,
+                "attempts": self.attempts,
+                "retries": self.retries,
+                "hedges": self.hedges,
+                "errors": self.errors,
+                "prompt_tokens": self.prompt_tokens,
+                "output_tokens": self.output_tokens,
+            }
+        for name, quantile in (("latency_p50", 0.5), ("latency_p95", 0.95), ("latency_max", 1.0)):
+            stats[name] = latencies[min(len(latencies) - 1, int(quantile * len(latencies)))] if latencies else 0.0
+        return stats
+
+
+_clients: Dict[str, GeminiClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_llm_client(model_name: str = DEFAULT_MODEL) -> GeminiClient:
+    """Returns the process-wide client for `model_name`; all clients share one connection pool."""
+    with _clients_lock:
+        if model_name not in _clients:
+            _clients[model_name] = GeminiClient(model_name)
+        return _clients[model_name]
+
+
+def llm_stats() -> Dict[str, Dict[str, float]]:
+    """Accounting of every shared client, keyed by model name."""
+    with _clients_lock:
+        clients = dict(_clients)
+    return {name: client.stats() for name, client in clients.items()}
@@ -1,13 +1,10 @@
 import dotenv, os
 dotenv.load_dotenv()
 
-from .config import get_gemini_api_key
-from langgraph.graph import StateGraph, END
-from .graph_state import GraphState
-from .agents.scout_agent import scout_agent
-from .agents.intelligence_analyst_agent import intelligence_analyst_agent
-from .agents.strategist_agent import strategist_agent
-from .agents.evaluator_agent import evaluator_agent
+from .config import get_gemini_api_key, get_storage_enabled
+from .pipeline import get_compiled_pipeline
+from .checkpointing import CheckpointedRun, run_id_for
+from .instrumentation import start_span
 import pprint
 
 GEMINI_API_KEY = get_gemini_api_key()
@@ -19,37 +16,28 @@ def run_crypto_sentinator_v2(keywords: list[str]):
     if not GEMINI_API_KEY:
         raise ValueError("GEMINI_API_KEY not found. Please set it in your .env file.")
 
-    workflow = StateGraph(GraphState)
-
-    # Define the nodes with their new roles
-    workflow.add_node("scout", scout_agent.run)
-    workflow.add_node("analyst", intelligence_analyst_agent.run)
-    workflow.add_node("strategist", strategist_agent.run)
-    workflow.add_node("evaluator", evaluator_agent.run)
-
-    # Define the new workflow
-    workflow.set_entry_point("scout")
-    workflow.add_edge("scout", "analyst")
-    workflow.add_edge("analyst", "strategist")
-    workflow.add_edge("strategist", "evaluator")
-    workflow.add_edge("evaluator", END)
-
-    app = workflow.compile()
+    app = get_compiled_pipeline()
 
     # Run the graph
     initial_state = {"keywords": keywords}
     print(f"\n🚀 Starting CryptoSentinator v2 for: {keywords} 🚀\n")
     
-    final_state = app.invoke(initial_state)
+    with start_span("pipeline run", keywords=", ".join(keywords)):
+        final_state = CheckpointedRun(app, initial_state, run_id_for(keywords, "main")).invoke()
+    if get_storage_enabled():
+        from .storage import persist_run
+        run_id = persist_run(final_state)
+        if run_id:
+            print(f"Saved run {run_id} to the analysis store.")
 
     print("\n🏁 CryptoSentinator v2 Run Finished 🏁")
     print("\n--- Strategic Summary ---")
-    if final_state.get("strategic_summaries"):
-        pprint.pprint(final_state["strategic_summaries"][0], indent=2)
+    for summary in final_state.get("strategic_summaries", []):
+        pprint.pprint(summary, indent=2)
     
     print("\n--- Performance Evaluation ---")
-    if final_state.get("evaluation"):
-        pprint.pprint(final_state["evaluation"], indent=2)
+    for evaluation in final_state.get("evaluations", []):
+        pprint.pprint(evaluation, indent=2)
 
     return final_state
 
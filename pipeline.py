@@ -0,0 +1,156 @@
+import threading
+from typing import TYPE_CHECKING, Callable, Dict, Optional
+
+from config import get_checkpoint_enabled, get_pipeline_name
+from instrumentation import instrument_node
+
+if TYPE_CHECKING:
+    from langgraph.graph import StateGraph
+
+# LangGraph, the agents and their tool dependencies are imported inside the
+# builders, so importing this module stays cheap and the first request pays
+# for them once instead of every cold start.
+
+DEFAULT_PIPELINE = "sentinator"
+INCREMENTAL_PIPELINE = "incremental"
+STREAMING_PIPELINE = "streaming"
+
+
+def build_sentinator_workflow(scout=None) -> "StateGraph":
+    """
+    Builds the four-agent Scout -> Analyst -> Strategist -> Evaluator workflow.
+    `scout` replaces the Scout agent, e.g. with a fixed corpus for benchmarks.
+    """
+    from langgraph.graph import StateGraph, END
+    from graph_state import GraphState
+    from agents.scout_agent import scout_agent
+    from agents.intelligence_analyst_agent import intelligence_analyst_agent
+    from agents.strategist_agent import strategist_agent
+    from agents.evaluator_agent import evaluator_agent
+
+    workflow = StateGraph(GraphState)
+
+    # Define the nodes with their new roles
+    workflow.add_node("scout", instrument_node("scout", (scout or scout_agent).run))
+    workflow.add_node("analyst", instrument_node("analyst", intelligence_analyst_agent.run))
+    workflow.add_node("strategist", instrument_node("strategist", strategist_agent.run))
+    workflow.add_node("evaluator", instrument_node("evaluator", evaluator_agent.run))
+
+    # Define the new workflow
+    workflow.set_entry_point("scout")
+    workflow.add_edge("scout", "analyst")
+    workflow.add_edge("analyst", "strategist")
+    workflow.add_edge("strategist", "evaluator")
+    workflow.add_edge("evaluator", END)
+    return workflow
+
+
+def build_incremental_workflow() -> "StateGraph":
+    """
+    Workflow for recurring runs: only documents past each keyword's watermark
+    are analyzed, and the strategist and evaluator only run for keywords whose
+    rolling-window sentiment moved beyond the configured delta.
+    """
+    from langgraph.graph import StateGraph, END
+    from graph_state import GraphState
+    from incremental import incremental_tracker
+    from agents.scout_agent import scout_agent
+    from agents.intelligence_analyst_agent import intelligence_analyst_agent
+    from agents.strategist_agent import strategist_agent
+    from agents.evaluator_agent import evaluator_agent
+
+    workflow = StateGraph(GraphState)
+
+    workflow.add_node("scout", instrument_node("scout", scout_agent.run))
+    workflow.add_node("watermark", instrument_node("watermark", incremental_tracker.select_new_documents))
+    workflow.add_node("analyst", instrument_node("analyst", intelligence_analyst_agent.run))
+    workflow.add_node("windows", instrument_node("windows", incremental_tracker.merge_windows))
+    workflow.add_node("strategist", instrument_node("strategist", strategist_agent.run))
+    workflow.add_node("record", instrument_node("record", incremental_tracker.record_summaries))
+    workflow.add_node("evaluator", instrument_node("evaluator", evaluator_agent.run))
+
+    workflow.set_entry_point("scout")
+    workflow.add_edge("scout", "watermark")
+    workflow.add_edge("watermark", "analyst")
+    workflow.add_edge("analyst", "windows")
+    workflow.add_conditional_edges("windows", incremental_tracker.next_step, {"strategist": "strategist", END: END})
+    workflow.add_edge("strategist", "record")
+    workflow.add_edge("record", "evaluator")
+    workflow.add_edge("evaluator", END)
+    return workflow
+
+
+def build_streaming_workflow(ingestor=None) -> "StateGraph":
+    """
+    Workflow for large corpora: scouting and analysis overlap through a
+    bounded queue, and the strategist and evaluator work from running
+    aggregates instead of the full document list. `ingestor` replaces the
+    streaming stage, e.g. with one reading a fixed corpus.
+    """
+    from langgraph.graph import StateGraph, END
+    from graph_state import GraphState
+    from streaming_pipeline import streaming_ingestor
+    from agents.strategist_agent import strategist_agent
+    from agents.evaluator_agent import evaluator_agent
+
+    workflow = StateGraph(GraphState)
+
+    workflow.add_node("ingest", instrument_node("ingest", (ingestor or streaming_ingestor).run))
+    workflow.add_node("strategist", instrument_node("strategist", strategist_agent.run))
+    workflow.add_node("evaluator", instrument_node("evaluator", evaluator_agent.run))
+
+    workflow.set_entry_point("ingest")
+    workflow.add_edge("ingest", "strategist")
+    workflow.add_edge("strategist", "evaluator")
+    workflow.add_edge("evaluator", END)
+    return workflow
+
+
+_pipeline_builders: Dict[str, Callable[[], "StateGraph"]] = {
+    DEFAULT_PIPELINE: build_sentinator_workflow,
+    INCREMENTAL_PIPELINE: build_incremental_workflow,
+    STREAMING_PIPELINE: build_streaming_workflow,
+}
+_compiled_pipelines: Dict[str, object] = {}
+_registry_lock = threading.Lock()
+
+
+def register_pipeline(name: str, builder: Callable[[], "StateGraph"]) -> None:
+    """Registers a workflow builder under `name`, replacing any compiled app for that name."""
+    with _registry_lock:
+        _pipeline_builders[name] = builder
+        _compiled_pipelines.pop(name, None)
+
+
+def _checkpointer():
+    """The SQLite checkpoint saver when CHECKPOINT_ENABLED is set; runs then need a run id (see checkpointing.py)."""
+    if not get_checkpoint_enabled():
+        return None
+    from checkpointing import get_checkpoint_saver
+    return get_checkpoint_saver()
+
+
+def get_compiled_pipeline(name: Optional[str] = None):
+    """
+    Returns the compiled LangGraph app for `name` (SENTINATOR_PIPELINE when
+    omitted), building and compiling it on first use only. Compiled apps are stateless between invocations, so one
+    instance is safely shared by every request and thread.
+    """
+    name = name or get_pipeline_name()
+    app = _compiled_pipelines.get(name)
+    if app is not None:
+        return app
+    with _registry_lock:
+        app = _compiled_pipelines.get(name)
+        if app is None:
+            if name not in _pipeline_builders:
+                raise KeyError(f"Unknown pipeline configuration: {name!r}")
+            app = _pipeline_builders[name]().compile(checkpointer=_checkpointer())
+            _compiled_pipelines[name] = app
+        return app
+
+
+def clear_pipeline_cache() -> None:
+    """Drops every compiled app so the next request recompiles it."""
+    with _registry_lock:
+        _compiled_pipelines.clear()
@@ -0,0 +1,127 @@
+import threading
+import time
+from typing import Optional
+
+from config import get_gemini_max_qps, get_gemini_max_rpm
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket. Tokens refill continuously at `rate` per second
+    up to `capacity`; `acquire` blocks until enough tokens are available.
+    """
+    def __init__(self, rate: float, capacity: float, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("TokenBucket rate and capacity must be positive.")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._last_refill = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = now - self._last_refill
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._last_refill = now
+
+    def time_until(self, tokens: float = 1.0) -> float:
+        """Seconds until `tokens` are available (0 if they are now), without taking them."""
+        with self._lock:
+            self._refill()
+            return max(0.0, (tokens - self._tokens) / self.rate)
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """
+        Takes `tokens` if available and returns 0. Otherwise returns the number
+        of seconds to wait before trying again.
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Blocks until `tokens` were taken and returns the total time spent waiting."""
+        if tokens > self.capacity:
+            raise ValueError("Cannot acquire more tokens than the bucket capacity.")
+        waited = 0.0
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait <= 0:
+                return waited
+            self._sleep(wait)
+            waited += wait
+
+
+class RateLimiter:
+    """
+    Enforces both a per-second (QPS) and a per-minute (RPM) request quota.
+    A limit of 0 or None disables that quota.
+    """
+    def __init__(self, max_qps: Optional[float] = None, max_rpm: Optional[float] = None,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.max_qps = max_qps or None
+        self.max_rpm = max_rpm or None
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._buckets = []
+        if self.max_qps:
+            self._buckets.append(TokenBucket(self.max_qps, max(1.0, self.max_qps), clock, sleep))
+        if self.max_rpm:
+            # RPM quotas are enforced as a rolling minute: the full minute's budget
+            # can burst, then it refills at max_rpm / 60 per second.
+            self._buckets.append(TokenBucket(self.max_rpm / 60.0, self.max_rpm, clock, sleep))
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._buckets)
+
+    def try_acquire(self) -> float:
+        """
+        Takes one request from every quota if all of them allow it now and
+        returns 0. Otherwise takes nothing and returns the seconds to wait, so
+        a caller stalled on one quota never holds tokens of another.
+        """
+        with self._lock:
+            wait = max((bucket.time_until() for bucket in self._buckets), default=0.0)
+            if wait > 0:
+                return wait
+            for bucket in self._buckets:
+                bucket.try_acquire()
+            return 0.0
+
+    def acquire(self) -> float:
+        """Blocks until one request is allowed under every quota. Returns the time waited."""
+        waited = 0.0
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return waited
+            self._sleep(wait)
+            waited += wait
+
+
+_shared_limiter: Optional[RateLimiter] = None
+_shared_limiter_lock = threading.Lock()
+
+
+def get_gemini_rate_limiter() -> RateLimiter:
+    """Returns the process-wide limiter shared by every Gemini caller."""
+    global _shared_limiter
+    with _shared_limiter_lock:
+        if _shared_limiter is None:
+            _shared_limiter = RateLimiter(get_gemini_max_qps(), get_gemini_max_rpm())
+        return _shared_limiter
+
+
+def reset_gemini_rate_limiter() -> None:
+    """Drops the shared limiter so the next caller re-reads the quota settings."""
+    global _shared_limiter
+    with _shared_limiter_lock:
+        _shared_limiter = None
@@ -0,0 +1,181 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Generator, Hashable, Iterator, List, Optional
+
+from config import get_report_cache_fresh_seconds, get_report_cache_max_entries, get_report_cache_stale_seconds
+from instrumentation import record_report_request
+from job_queue import PRIORITY_BACKGROUND, PRIORITY_NORMAL, JobQueue, QueueFullError, get_job_queue
+
+# A report producer yields progressively longer Markdown reports, the last one
+# complete, and returns whether that last report may be cached.
+ReportProducer = Callable[[], Generator[str, None, bool]]
+
+
+class _Flight:
+    """One in-flight pipeline run. Every request for the same key follows it and sees all of its updates."""
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._updates: List[str] = []
+        self._done = False
+        self._error: Optional[BaseException] = None
+
+    def publish(self, update: str) -> None:
+        with self._condition:
+            self._updates.append(update)
+            self._condition.notify_all()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        with self._condition:
+            self._done = True
+            self._error = error
+            self._condition.notify_all()
+
+    def follow(self) -> Iterator[str]:
+        seen = 0
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._done or len(self._updates) > seen)
+                updates = self._updates[seen:]
+                done, error = self._done, self._error
+            for update in updates:
+                yield update
+            seen += len(updates)
+            if done and seen == len(self._updates):
+                if error is not None:
+                    raise error
+                return
+
+
+class _Entry:
+    __slots__ = ("report", "created")
+
+    def __init__(self, report: str, created: float):
+        self.report = report
+        self.created = created
+
+
+class ReportCache:
+    """
+    Single-flight coalescing and caching of finished reports. Concurrent
+    requests for the same key share one run. A report younger than
+    `fresh_seconds` is served as is. Up to `stale_seconds` after that, it is
+    still served immediately while one background run refreshes it
+    (stale-while-revalidate). Runs are jobs on the job queue, so they are
+    subject to its admission control, and a client that disconnects does not
+    cancel the run for the others.
+    """
+    def __init__(self, fresh_seconds: Optional[float] = None, stale_seconds: Optional[float] = None,
+                 max_entries: Optional[int] = None, jobs: Optional[JobQueue] = None):
+        # None defers to the REPORT_CACHE_* settings and the shared job queue.
+        self.jobs = jobs
+        self.fresh_seconds = get_report_cache_fresh_seconds() if fresh_seconds is None else fresh_seconds
+        self.stale_seconds = get_report_cache_stale_seconds() if stale_seconds is None else stale_seconds
+        self.max_entries = max_entries or get_report_cache_max_entries()
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._counts = {"hit": 0, "stale": 0, "miss": 0, "coalesced": 0}
+
+    def _count(self, result: str) -> None:
+        self._counts[result] += 1
+        record_report_request(result)
+
+    def stream(self, key: Hashable, produce: ReportProducer, tenant: Optional[str] = None) -> Iterator[str]:
+        """
+        The reports for `key`: one cached report, or every update of the
+        (possibly shared) run. Raises QueueFullError if a new run is needed
+        and the job queue has no room for it.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            age = now - entry.created if entry is not None else None
+            flight = self._flights.get(key)
+            if age is not None and age < self.fresh_seconds:
+                self._count("hit")
+                self._entries.move_to_end(key)
+            elif age is not None and age < self.fresh_seconds + self.stale_seconds:
+                self._count("stale")
+                self._entries.move_to_end(key)
+                if flight is None:
+                    try:
+                        self._start(key, produce, tenant, PRIORITY_BACKGROUND)
+                    except QueueFullError:
+                        pass  # the stale report is still served; a later request retries the refresh
+            elif flight is not None:
+                self._count("coalesced")
+                entry = None
+            else:
+                self._count("miss")
+                entry = None
+                flight = self._start(key, produce, tenant, PRIORITY_NORMAL)
+        if entry is not None:
+            yield entry.report
+            return
+        yield from flight.follow()
+
+    def get(self, key: Hashable, produce: ReportProducer, tenant: Optional[str] = None) -> Optional[str]:
+        """The final report for `key`, blocking until the run finishes."""
+        report = None
+        for report in self.stream(key, produce, tenant):
+            pass
+        return report
+
+    def _start(self, key: Hashable, produce: ReportProducer, tenant: Optional[str], priority: int) -> _Flight:
+        # Called with the lock held.
+        flight = _Flight()
+        (self.jobs or get_job_queue()).submit(self._run, key, flight, produce, tenant=tenant, priority=priority)
+        self._flights[key] = flight
+        return flight
+
+    def _run(self, key: Hashable, flight: _Flight, produce: ReportProducer) -> None:
+        report, cacheable, error = None, False, None
+        try:
+            updates = produce()
+            while True:
+                try:
+                    report = next(updates)
+                except StopIteration as stop:
+                    cacheable = bool(stop.value)
+                    break
+                flight.publish(report)
+        except Exception as e:
+            error = e
+        finally:
+            with self._lock:
+                del self._flights[key]
+                if cacheable and report is not None and self.fresh_seconds + self.stale_seconds > 0:
+                    self._entries[key] = _Entry(report, time.monotonic())
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            flight.finish(error)
+
+    def stats(self) -> Dict[str, int]:
+        """Requests served per result (hit, stale, miss, coalesced), plus cached reports and runs in flight."""
+        with self._lock:
+            return dict(self._counts, entries=len(self._entries), in_flight=len(self._flights))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_report_cache: Optional[ReportCache] = None
+_report_cache_lock = threading.Lock()
+
+
+def get_report_cache() -> ReportCache:
+    """The process-wide report cache, configured from the REPORT_CACHE_* settings on first use."""
+    global _report_cache
+    with _report_cache_lock:
+        if _report_cache is None:
+            _report_cache = ReportCache()
+        return _report_cache
+
+
+def reset_report_cache() -> None:
+    global _report_cache
+    with _report_cache_lock:
+        _report_cache = None
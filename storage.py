@@ -0,0 +1,294 @@
+import argparse
+import json
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from config import get_storage_url, get_storage_pool_size
+from incremental import document_key, parse_timestamp
+
+# Tables use "?" placeholders and {real} for floating-point columns; each
+# backend substitutes its own dialect.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY, created_at {real} NOT NULL, keywords TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS raw_documents (
+    keyword TEXT NOT NULL, doc_key TEXT NOT NULL, run_id TEXT NOT NULL, source TEXT, timestamp {real},
+    content TEXT, PRIMARY KEY (keyword, doc_key));
+CREATE INDEX IF NOT EXISTS idx_raw_keyword_timestamp ON raw_documents (keyword, timestamp);
+CREATE INDEX IF NOT EXISTS idx_raw_source_timestamp ON raw_documents (source, timestamp);
+CREATE TABLE IF NOT EXISTS processed_documents (
+    keyword TEXT NOT NULL, doc_key TEXT NOT NULL, run_id TEXT NOT NULL, source TEXT, timestamp {real},
+    content TEXT, sentiment_score {real}, sentiment_label TEXT, topic TEXT, entities TEXT, cluster_size INTEGER,
+    PRIMARY KEY (keyword, doc_key));
+-- sentiment_score makes the index covering for the hourly sentiment query.
+CREATE INDEX IF NOT EXISTS idx_processed_keyword_timestamp ON processed_documents (keyword, timestamp, sentiment_score);
+CREATE INDEX IF NOT EXISTS idx_processed_source_timestamp ON processed_documents (source, timestamp);
+CREATE TABLE IF NOT EXISTS summaries (
+    run_id TEXT NOT NULL, keyword TEXT NOT NULL, created_at {real} NOT NULL, cryptocurrency TEXT,
+    hypothesis TEXT, confidence TEXT, reasoning TEXT, supporting_evidence TEXT, PRIMARY KEY (run_id, keyword));
+CREATE INDEX IF NOT EXISTS idx_summaries_keyword_created ON summaries (keyword, created_at);
+CREATE TABLE IF NOT EXISTS evaluations (
+    run_id TEXT NOT NULL, keyword TEXT NOT NULL, created_at {real} NOT NULL, cryptocurrency TEXT,
+    hypothesis_tested TEXT, simulated_outcome TEXT, evaluation_result TEXT, evaluation_notes TEXT,
+    PRIMARY KEY (run_id, keyword));
+CREATE INDEX IF NOT EXISTS idx_evaluations_keyword_created ON evaluations (keyword, created_at);
+"""
+
+RAW_COLUMNS = ("keyword", "doc_key", "run_id", "source", "timestamp", "content")
+PROCESSED_COLUMNS = RAW_COLUMNS + ("sentiment_score", "sentiment_label", "topic", "entities", "cluster_size")
+SUMMARY_COLUMNS = ("run_id", "keyword", "created_at", "cryptocurrency", "hypothesis", "confidence", "reasoning",
+                   "supporting_evidence")
+EVALUATION_COLUMNS = ("run_id", "keyword", "created_at", "cryptocurrency", "hypothesis_tested", "simulated_outcome",
+                      "evaluation_result", "evaluation_notes")
+
+
+class SQLiteBackend:
+    """A fixed pool of SQLite connections in WAL mode, so readers do not block the writer."""
+    placeholder = "?"
+    real = "REAL"
+    hour_bucket = "CAST(timestamp / 3600 AS INTEGER) * 3600"
+
+    def __init__(self, path: str, pool_size: int):
+        if path != ":memory:":
+            import os
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        else:
+            pool_size = 1  # every connection to :memory: would be a separate database
+        self._connections: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(pool_size):
+            connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._connections.put(connection)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        connection = self._connections.get()
+        try:
+            yield connection
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            self._connections.put(connection)
+
+    def execute_script(self, connection, script: str) -> None:
+        connection.executescript(script)
+
+    def insert_many(self, connection, table: str, columns: Sequence[str], rows: List[tuple]) -> None:
+        placeholders = ", ".join("?" for _ in columns)
+        connection.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) ON CONFLICT DO NOTHING", rows)
+
+    def query(self, connection, sql: str, params: Sequence = ()) -> List[tuple]:
+        return connection.execute(sql, params).fetchall()
+
+    def close(self) -> None:
+        while not self._connections.empty():
+            self._connections.get().close()
+
+
+class PostgresBackend:
+    """psycopg2 threaded connection pool; bulk inserts go through execute_values."""
+    placeholder = "%s"
+    real = "DOUBLE PRECISION"
+    hour_bucket = "FLOOR(timestamp / 3600) * 3600"
+
+    def __init__(self, url: str, pool_size: int):
+        import psycopg2.pool
+        self._pool = psycopg2.pool.ThreadedConnectionPool(1, pool_size, url)
+
+    @contextmanager
+    def connection(self):
+        connection = self._pool.getconn()
+        try:
+            yield connection
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            self._pool.putconn(connection)
+
+    def execute_script(self, connection, script: str) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(script)
+
+    def insert_many(self, connection, table: str, columns: Sequence[str], rows: List[tuple]) -> None:
+        from psycopg2.extras import execute_values
+        with connection.cursor() as cursor:
+            execute_values(cursor, f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s ON CONFLICT DO NOTHING",
+                           rows, page_size=1000)
+
+    def query(self, connection, sql: str, params: Sequence = ()) -> List[tuple]:
+        with connection.cursor() as cursor:
+            cursor.execute(sql.replace("?", "%s"), params)
+            return cursor.fetchall()
+
+    def close(self) -> None:
+        self._pool.closeall()
+
+
+def _backend(url: str, pool_size: int):
+    if url.startswith(("postgresql://", "postgres://")):
+        return PostgresBackend(url, pool_size)
+    path = url[len("sqlite:///"):] if url.startswith("sqlite:///") else url
+    return SQLiteBackend(path or ":memory:", pool_size)
+
+
+def _documents_rows(documents: List[Dict], run_id: str, processed: bool) -> List[tuple]:
+    rows = []
+    for doc in documents:
+        row = (doc.get("keyword"), document_key(doc), run_id, doc.get("source"),
+               parse_timestamp(doc.get("timestamp"), None), doc.get("content"))
+        if processed:
+            row += (doc.get("sentiment_score"), doc.get("sentiment_label"), doc.get("topic"),
+                    json.dumps(list(doc.get("entities") or [])), doc.get("cluster_size"))
+        rows.append(row)
+    return rows
+
+
+class AnalysisStore:
+    """
+    Persists every run's raw and processed documents, summaries and
+    evaluations, and answers historical questions from the indexes without
+    re-running any agent. `url` is a SQLite path (optionally sqlite:///...)
+    or a postgresql:// DSN. A document seen by several runs is stored once,
+    under the first run that saw it.
+    """
+    def __init__(self, url: Optional[str] = None, pool_size: Optional[int] = None):
+        self.backend = _backend(url if url is not None else get_storage_url(), pool_size or get_storage_pool_size())
+        with self.backend.connection() as connection:
+            self.backend.execute_script(connection, SCHEMA.format(real=self.backend.real))
+
+    def save_run(self, final_state: Dict, run_id: Optional[str] = None, created_at: Optional[float] = None) -> str:
+        """
+        Stores a finished pipeline state in one transaction and returns its run
+        id. Streaming runs already saved their documents chunk by chunk (see
+        save_documents) under the state's `storage_run_id`, which is reused.
+        """
+        run_id = run_id or final_state.get("storage_run_id") or uuid.uuid4().hex
+        created_at = time.time() if created_at is None else created_at
+        summaries = [
+            (run_id, summary.get("keyword") or summary.get("cryptocurrency"), created_at, summary.get("cryptocurrency"),
+             summary.get("hypothesis"), summary.get("confidence"), summary.get("reasoning"),
+             json.dumps(summary.get("supporting_evidence") or []))
+            for summary in final_state.get("strategic_summaries") or []
+        ]
+        evaluations = [
+            (run_id, evaluation.get("keyword") or evaluation.get("cryptocurrency"), created_at,
+             evaluation.get("cryptocurrency"), evaluation.get("hypothesis_tested"), evaluation.get("simulated_outcome"),
+             evaluation.get("evaluation_result"), evaluation.get("evaluation_notes"))
+            for evaluation in final_state.get("evaluations") or []
+        ]
+        with self.backend.connection() as connection:
+            self.backend.insert_many(connection, "runs", ("run_id", "created_at", "keywords"),
+                                     [(run_id, created_at, json.dumps(final_state.get("keywords") or []))])
+            self.backend.insert_many(connection, "raw_documents", RAW_COLUMNS,
+                                     _documents_rows(final_state.get("raw_documents") or [], run_id, processed=False))
+            self.backend.insert_many(connection, "processed_documents", PROCESSED_COLUMNS,
+                                     _documents_rows(final_state.get("processed_documents") or [], run_id, processed=True))
+            self.backend.insert_many(connection, "summaries", SUMMARY_COLUMNS, summaries)
+            self.backend.insert_many(connection, "evaluations", EVALUATION_COLUMNS, evaluations)
+        return run_id
+
+    def save_documents(self, run_id: str, raw_documents: List[Dict], processed_documents: List[Dict]) -> None:
+        """Bulk-inserts one batch of a run's documents, such as a streamed chunk, in one transaction."""
+        with self.backend.connection() as connection:
+            self.backend.insert_many(connection, "raw_documents", RAW_COLUMNS,
+                                     _documents_rows(raw_documents, run_id, processed=False))
+            self.backend.insert_many(connection, "processed_documents", PROCESSED_COLUMNS,
+                                     _documents_rows(processed_documents, run_id, processed=True))
+
+    def sentiment_by_hour(self, keyword: str, hours: float = 7 * 24, now: Optional[float] = None) -> List[Dict]:
+        """Hourly document counts and mean sentiment of `keyword` over the last `hours`, oldest first."""
+        now = time.time() if now is None else now
+        sql = (f"SELECT {self.backend.hour_bucket} AS hour, COUNT(*), COUNT(sentiment_score), AVG(sentiment_score) "
+               "FROM processed_documents WHERE keyword = ? AND timestamp >= ? AND timestamp <= ? "
+               "GROUP BY hour ORDER BY hour")
+        with self.backend.connection() as connection:
+            rows = self.backend.query(connection, sql, (keyword, now - hours * 3600, now))
+        return [{"hour": int(hour), "documents": documents, "scored_documents": scored,
+                 "sentiment_mean": None if mean is None else float(mean)}
+                for hour, documents, scored, mean in rows]
+
+    def sentiment_by_source(self, keyword: str, hours: float = 7 * 24, now: Optional[float] = None) -> Dict[str, Dict]:
+        """Document counts and mean sentiment of `keyword` per source over the last `hours`."""
+        now = time.time() if now is None else now
+        sql = ("SELECT source, COUNT(*), COUNT(sentiment_score), AVG(sentiment_score) FROM processed_documents "
+               "WHERE keyword = ? AND timestamp >= ? AND timestamp <= ? GROUP BY source ORDER BY source")
+        with self.backend.connection() as connection:
+            rows = self.backend.query(connection, sql, (keyword, now - hours * 3600, now))
+        return {source: {"documents": documents, "scored_documents": scored,
+                         "sentiment_mean": None if mean is None else float(mean)}
+                for source, documents, scored, mean in rows}
+
+    def recent_summaries(self, keyword: str, limit: int = 10) -> List[Dict]:
+        """The latest strategic summaries for `keyword` with their evaluations, newest first."""
+        sql = ("SELECT s.run_id, s.created_at, s.cryptocurrency, s.hypothesis, s.confidence, s.reasoning, "
+               "s.supporting_evidence, e.simulated_outcome, e.evaluation_result FROM summaries s "
+               "LEFT JOIN evaluations e ON e.run_id = s.run_id AND e.keyword = s.keyword "
+               "WHERE s.keyword = ? ORDER BY s.created_at DESC LIMIT ?")
+        with self.backend.connection() as connection:
+            rows = self.backend.query(connection, sql, (keyword, limit))
+        return [{"run_id": run_id, "created_at": created_at, "keyword": keyword, "cryptocurrency": cryptocurrency,
+                 "hypothesis": hypothesis, "confidence": confidence, "reasoning": reasoning,
+                 "supporting_evidence": json.loads(evidence or "[]"), "simulated_outcome": outcome,
+                 "evaluation_result": result}
+                for run_id, created_at, cryptocurrency, hypothesis, confidence, reasoning, evidence, outcome, result in rows]
+
+    def close(self) -> None:
+        self.backend.close()
+
+
+_store: Optional[AnalysisStore] = None
+_store_lock = threading.Lock()
+
+
+def get_analysis_store() -> AnalysisStore:
+    """Process-wide store for STORAGE_URL, opened on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = AnalysisStore()
+        return _store
+
+
+def reset_analysis_store() -> None:
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+        _store = None
+
+
+def persist_run(final_state: Dict) -> Optional[str]:
+    """Saves a finished run to the shared store; storage errors are logged and never fail the run."""
+    try:
+        return get_analysis_store().save_run(final_state)
+    except Exception as e:
+        print(f"Could not persist the analysis run: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query stored analysis results without re-running the pipeline.")
+    parser.add_argument("--keyword", required=True)
+    parser.add_argument("--hours", type=float, default=7 * 24, help="Look-back window in hours.")
+    args = parser.parse_args()
+    store = get_analysis_store()
+    for row in store.sentiment_by_hour(args.keyword, args.hours):
+        hour = time.strftime("%Y-%m-%d %H:00", time.localtime(row["hour"]))
+        mean = "n/a" if row["sentiment_mean"] is None else f"{row['sentiment_mean']:+.2f}"
+        print(f"{hour}  {row['documents']:>6} documents  sentiment {mean}")
+    for summary in store.recent_summaries(args.keyword, limit=5):
+        print(f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(summary['created_at']))}  {summary['hypothesis']} "
+              f"({summary['confidence']}, {summary['evaluation_result'] or 'not evaluated'})")
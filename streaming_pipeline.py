@@ -0,0 +1,189 @@
+import queue
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from config import get_storage_enabled, get_stream_chunk_size, get_stream_queue_size, get_stream_workers
+from graph_state import GraphState, ProcessedDocument, RawDocument
+from instrumentation import bind_context
+from tools.aggregation import RunningAggregates
+from tools.lexicon_scorer import get_market_scorer
+
+# Processed documents kept per keyword as the strategist's evidence snippets.
+EVIDENCE_PER_KEYWORD = 3
+# How long a worker waits for more documents to fill a chunk once it has one.
+CHUNK_LINGER_SECONDS = 0.05
+_DONE = object()
+
+DocumentSource = Callable[[List[str]], Iterable[List[RawDocument]]]
+
+
+def merge_analyst_metrics(total: Optional[Dict], batch: Dict) -> Dict:
+    """Adds one chunk's analyst metrics to the running totals."""
+    total = dict(total or {})
+    for key in ("documents", "escalated", "scored_locally", "llm_calls", "total_documents", "unique_documents"):
+        total[key] = total.get(key, 0) + batch.get(key, 0)
+    total["escalation_rate"] = total["escalated"] / total["documents"] if total["documents"] else 0.0
+    return total
+
+
+class StreamingIngestor:
+    """
+    Scout and analyst as one streaming stage. Searches feed a bounded queue
+    as they finish; analyst workers drain it chunk by chunk, fold every chunk
+    into running aggregates and drop it. Peak memory is bounded by the queue
+    and the chunks in flight, however many documents the sources return.
+    With storage enabled, every chunk is saved to the analysis store before
+    it is dropped, since the final state only keeps evidence samples.
+    """
+    def __init__(self, document_source: Optional[DocumentSource] = None, analyst=None,
+                 queue_size: Optional[int] = None, workers: Optional[int] = None, chunk_size: Optional[int] = None,
+                 store=None):
+        # None defers to the scout/analyst agents, the STREAM_* settings and STORAGE_ENABLED at run time.
+        self.document_source = document_source
+        self.analyst = analyst
+        self.queue_size = queue_size
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.store = store
+
+    def _get_store(self):
+        if self.store is not None or not get_storage_enabled():
+            return self.store
+        from storage import get_analysis_store
+        return get_analysis_store()
+
+    def _documents(self, keywords: List[str]) -> Iterable[List[RawDocument]]:
+        if self.document_source is not None:
+            return self.document_source(keywords)
+        from agents.scout_agent import scout_agent
+        return scout_agent.iter_documents(keywords)
+
+    def run(self, state: GraphState) -> dict:
+        print("--- AGENT: Streaming Scout + Analyst ---")
+        from agents.intelligence_analyst_agent import intelligence_analyst_agent
+
+        analyst = self.analyst or intelligence_analyst_agent
+        workers = self.workers or get_stream_workers()
+        chunk_size = self.chunk_size or get_stream_chunk_size()
+        documents: "queue.Queue" = queue.Queue(maxsize=self.queue_size or get_stream_queue_size())
+        stop = threading.Event()
+        errors: List[BaseException] = []
+
+        lock = threading.Lock()
+        aggregates = RunningAggregates()
+        market_scores: Dict[str, float] = {}
+        evidence: Dict[str, List[ProcessedDocument]] = {}
+        totals: Dict = {"metrics": None, "documents": 0}
+        store = self._get_store()
+        run_id = uuid.uuid4().hex if store is not None else None
+
+        def put(item) -> bool:
+            # Blocks while the queue is full, but gives up once a worker failed.
+            while not stop.is_set():
+                try:
+                    documents.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce() -> None:
+            source = self._documents(state["keywords"])
+            try:
+                for batch in source:
+                    for doc in batch:
+                        if not put(doc):
+                            return
+            except Exception as e:
+                errors.append(e)
+                stop.set()
+            finally:
+                if hasattr(source, "close"):
+                    source.close()  # stops the scout's searches when the run ends early
+                for _ in range(workers):
+                    put(_DONE)
+
+        def take_chunk() -> Tuple[List[RawDocument], bool]:
+            """Up to `chunk_size` queued documents, and whether this worker's end marker was among them."""
+            chunk: List[RawDocument] = []
+            while not chunk:
+                try:
+                    item = documents.get(timeout=0.1)
+                except queue.Empty:
+                    if stop.is_set():
+                        return chunk, True
+                    continue
+                if item is _DONE:
+                    return chunk, True
+                chunk.append(item)
+            deadline = time.monotonic() + CHUNK_LINGER_SECONDS
+            while len(chunk) < chunk_size:
+                try:
+                    item = documents.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _DONE:
+                    return chunk, True
+                chunk.append(item)
+            return chunk, False
+
+        def fold(raw: List[RawDocument], processed: List[ProcessedDocument], metrics: Dict) -> None:
+            by_keyword: Dict[str, List[str]] = {}
+            for doc in processed:
+                by_keyword.setdefault(doc["keyword"], []).append(doc["content"])
+            scores = {keyword: get_market_scorer().score_documents(texts)["total"]
+                      for keyword, texts in by_keyword.items()}
+            with lock:
+                aggregates.update(processed)
+                totals["metrics"] = merge_analyst_metrics(totals["metrics"], metrics)
+                totals["documents"] += len(processed)
+                for keyword, score in scores.items():
+                    market_scores[keyword] = market_scores.get(keyword, 0.0) + score
+                for doc in processed:
+                    samples = evidence.setdefault(doc["keyword"], [])
+                    if len(samples) < EVIDENCE_PER_KEYWORD:
+                        samples.append(doc)
+            if store is not None:
+                try:
+                    store.save_documents(run_id, raw, processed)
+                except Exception as e:
+                    print(f"Could not persist a streamed chunk: {e}")
+
+        def consume() -> None:
+            try:
+                ended = False
+                while not ended and not stop.is_set():
+                    chunk, ended = take_chunk()
+                    if chunk:
+                        fold(chunk, *analyst.analyze(chunk))
+            except Exception as e:
+                errors.append(e)
+                stop.set()
+
+        threads = [threading.Thread(target=bind_context(produce), name="stream-scout", daemon=True)]
+        threads += [threading.Thread(target=bind_context(consume), name=f"stream-analyst-{i}", daemon=True)
+                    for i in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+
+        print(f"Streamed {totals['documents']} documents through {workers} analyst workers.")
+        stream_aggregates = aggregates.result()
+        for keyword, aggregate in stream_aggregates.items():
+            aggregate["market_score"] = market_scores.get(keyword, 0.0)
+        update = {
+            "raw_documents": [],
+            "processed_documents": [doc for samples in evidence.values() for doc in samples],
+            "stream_aggregates": stream_aggregates,
+            "analyst_metrics": totals["metrics"] or merge_analyst_metrics(None, {}),
+        }
+        if run_id is not None:
+            update["storage_run_id"] = run_id
+        return update
+
+streaming_ingestor = StreamingIngestor()
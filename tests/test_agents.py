@@ -13,6 +13,45 @@ def test_scout_agent(mocker):
     result_state = scout_agent.scout_agent.run(initial_state)
     assert len(result_state["raw_documents"]) == 3
 
+def test_scout_agent_tolerates_slow_and_failing_sources(mocker):
+    """Tests that a hung or failing source is skipped while the other sources still report."""
+    import threading
+    release = threading.Event()
+    mock_x_tool = mocker.patch('cryptosentinator.agents.scout_agent.search_x_mock')
+    mock_reddit_tool = mocker.patch('cryptosentinator.agents.scout_agent.search_reddit_mock')
+    mock_news_tool = mocker.patch('cryptosentinator.agents.scout_agent.search_news_mock')
+    mock_x_tool.invoke.side_effect = lambda args: [{"source": "X", "content": args["keyword"], "timestamp": "", "keyword": args["keyword"]}]
+    mock_reddit_tool.invoke.side_effect = lambda args: release.wait(5) or []
+    mock_news_tool.invoke.side_effect = RuntimeError("news API down")
+    agent = scout_agent.ScoutAgent(max_concurrency=6, source_timeout=0.2)
+    try:
+        result_state = agent.run({"keywords": ["BTC", "ETH"]})
+    finally:
+        release.set()
+    assert [doc["keyword"] for doc in result_state["raw_documents"]] == ["BTC", "ETH"]
+
+def test_scout_agent_times_each_search_from_when_it_starts(mocker):
+    """Tests that searches queued behind a hung one still get their full timeout."""
+    import threading
+    import time
+    release = threading.Event()
+    mock_x_tool = mocker.patch('cryptosentinator.agents.scout_agent.search_x_mock')
+    mock_reddit_tool = mocker.patch('cryptosentinator.agents.scout_agent.search_reddit_mock')
+    mock_news_tool = mocker.patch('cryptosentinator.agents.scout_agent.search_news_mock')
+    mock_x_tool.invoke.side_effect = lambda args: release.wait(5) or []
+    slow = lambda source: lambda args: time.sleep(0.2) or [{"source": source, "content": "c", "timestamp": "", "keyword": args["keyword"]}]
+    mock_reddit_tool.invoke.side_effect = slow("Reddit")
+    mock_news_tool.invoke.side_effect = slow("News")
+    agent = scout_agent.ScoutAgent(max_concurrency=1, source_timeout=0.3)
+    try:
+        result_state = agent.run({"keywords": ["BTC"]})
+        streamed = [doc["source"] for docs in agent.iter_documents(["BTC"]) for doc in docs]
+    finally:
+        release.set()
+    # X hangs in the only slot; Reddit and News each start after it times out and finish in time.
+    assert [doc["source"] for doc in result_state["raw_documents"]] == ["Reddit", "News"]
+    assert streamed == ["Reddit", "News"]
+
 def test_intelligence_analyst_agent(mocker, mock_raw_docs):
     """Tests if the Analyst Agent processes documents correctly."""
     mock_analyze_tool = mocker.patch('cryptosentinator.agents.intelligence_analyst_agent.analyze_text_deeply')
@@ -24,6 +63,66 @@ def test_intelligence_analyst_agent(mocker, mock_raw_docs):
     result_state = intelligence_analyst_agent.intelligence_analyst_agent.run(initial_state)
     assert len(result_state["processed_documents"]) == 2
 
+def test_intelligence_analyst_agent_batched(mocker, mock_raw_docs):
+    """Tests that batch mode sends one batch call per chunk and keeps document order."""
+    mock_batch_tool = mocker.patch('cryptosentinator.agents.intelligence_analyst_agent.analyze_texts_batch')
+    mock_single_tool = mocker.patch('cryptosentinator.agents.intelligence_analyst_agent.analyze_text_deeply')
+    mock_batch_tool.invoke.side_effect = lambda args: [
+        {"sentiment_score": float(len(text)), "sentiment_label": "Neutral", "topic": "Test", "entities": []}
+        for text in args["texts"]
+    ]
+    raw_docs = mock_raw_docs * 3
+    agent = intelligence_analyst_agent.IntelligenceAnalystAgent(batch_size=4)
+    result_state = agent.run({"raw_documents": raw_docs})
+    processed = result_state["processed_documents"]
+    assert mock_batch_tool.invoke.call_count == 2
+    mock_single_tool.invoke.assert_not_called()
+    assert [doc["content"] for doc in processed] == [doc["content"] for doc in raw_docs]
+    assert all(doc["sentiment_score"] == len(doc["content"]) for doc in processed)
+
+def test_intelligence_analyst_agent_concurrent_keeps_order(mocker, mock_raw_docs):
+    """Tests that the thread-pool path overlaps calls and still returns results in input order."""
+    import threading
+    import time
+    mock_analyze_tool = mocker.patch('cryptosentinator.agents.intelligence_analyst_agent.analyze_text_deeply')
+    in_flight = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def slow_analysis(args):
+        with lock:
+            in_flight["now"] += 1
+            in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        # Later documents finish first, so ordering must not depend on completion.
+        time.sleep(0.05 if args["text_content"].startswith("0") else 0.01)
+        with lock:
+            in_flight["now"] -= 1
+        return {"sentiment_score": float(args["text_content"].split(":")[0]), "sentiment_label": "Neutral", "topic": "Test", "entities": []}
+
+    mock_analyze_tool.invoke.side_effect = slow_analysis
+    raw_docs = [dict(mock_raw_docs[0], content=f"{i}: text") for i in range(8)]
+    agent = intelligence_analyst_agent.IntelligenceAnalystAgent(batch_size=1, max_concurrency=4)
+    result_state = agent.run({"raw_documents": raw_docs})
+    assert [doc["sentiment_score"] for doc in result_state["processed_documents"]] == list(range(8))
+    assert 1 < in_flight["peak"] <= 4
+
+def test_intelligence_analyst_agent_escalates_only_ambiguous_documents(mocker, mock_raw_docs):
+    """Tests that the local tier keeps obvious documents away from Gemini and reports the escalation rate."""
+    from cryptosentinator.tools.local_sentiment import LocalSentimentScorer
+    mock_analyze_tool = mocker.patch('cryptosentinator.agents.intelligence_analyst_agent.analyze_text_deeply')
+    mock_analyze_tool.invoke.return_value = {"sentiment_score": 0.1, "sentiment_label": "Neutral", "topic": "Community Discussion", "entities": []}
+    raw_docs = [
+        dict(mock_raw_docs[0], content="Great news! Bitcoin to the moon! 🚀"),
+        dict(mock_raw_docs[0], content="Some say bullish, others bearish."),
+    ]
+    agent = intelligence_analyst_agent.IntelligenceAnalystAgent(batch_size=1, local_scorer=LocalSentimentScorer(0.6))
+    result_state = agent.run({"raw_documents": raw_docs})
+    processed = result_state["processed_documents"]
+    assert mock_analyze_tool.invoke.call_count == 1
+    assert processed[0]["sentiment_label"] == "Positive"
+    assert processed[1]["topic"] == "Community Discussion"
+    assert result_state["analyst_metrics"]["escalation_rate"] == 0.5
+    assert result_state["analyst_metrics"]["llm_calls"] == 1
+
 def test_strategist_agent(mocker, mock_processed_docs):
     """Tests if the Strategist Agent correctly forms a hypothesis."""
     # Arrange
@@ -52,6 +151,66 @@ def test_strategist_agent(mocker, mock_processed_docs):
     assert summary["confidence"] == "High"
     mock_price_tool.invoke.assert_called_once() # Verify the tool was called.
 
+def test_strategist_agent_one_summary_per_keyword(mocker, mock_processed_docs):
+    """Tests that each keyword gets its own summary computed only from its own documents."""
+    mock_price_tool = mocker.patch('cryptosentinator.agents.strategist_agent.get_mock_crypto_price_data')
+    mock_price_tool.invoke.return_value = {"price": 1, "24h_change_percent": 1}
+    mock_generate_content = mocker.patch('cryptosentinator.agents.strategist_agent.model.generate_content')
+
+    class MockResponse:
+        def __init__(self, text):
+            self.text = text
+
+    def respond(prompt):
+        name = "Bitcoin" if "Cryptocurrency: Bitcoin" in prompt else "Ethereum"
+        sentiment = prompt.split("Average Sentiment Score: ")[1].split(" ")[0]
+        return MockResponse('{"cryptocurrency": "%s", "hypothesis": "%s", "confidence": "High", "reasoning": "r", "supporting_evidence": []}' % (name, sentiment))
+
+    mock_generate_content.side_effect = respond
+    result_state = strategist_agent.strategist_agent.run(
+        {"processed_documents": mock_processed_docs, "keywords": ["Bitcoin", "Ethereum"]}
+    )
+    summaries = result_state["strategic_summaries"]
+    assert [s["keyword"] for s in summaries] == ["Bitcoin", "Ethereum"]
+    assert [s["hypothesis"] for s in summaries] == ["0.90", "-0.70"]
+    assert mock_generate_content.call_count == 2
+
+def test_strategist_agent_leaves_stream_aggregates_unchanged(mocker, mock_processed_docs):
+    """Tests that rolling windows reach the prompt without being written into the state's aggregates."""
+    import copy
+    from cryptosentinator.tools.aggregation import aggregate_documents
+    mock_price_tool = mocker.patch('cryptosentinator.agents.strategist_agent.get_mock_crypto_price_data')
+    mock_price_tool.invoke.return_value = {"price": 1, "24h_change_percent": 1}
+    mock_generate_content = mocker.patch('cryptosentinator.agents.strategist_agent.model.generate_content')
+    mock_generate_content.return_value.text = '{"cryptocurrency": "Bitcoin", "hypothesis": "h", "confidence": "High", "reasoning": "r", "supporting_evidence": []}'
+    aggregates = aggregate_documents(mock_processed_docs)
+    before = copy.deepcopy(aggregates)
+    windows = {"24h": {"sentiment_mean": 0.5, "documents": 3}}
+
+    strategist_agent.strategist_agent.run({
+        "processed_documents": mock_processed_docs, "keywords": ["Bitcoin"],
+        "stream_aggregates": aggregates, "window_aggregates": {"Bitcoin": windows},
+    })
+
+    assert "Rolling-Window Sentiment: 24h 0.50 (n=3)" in mock_generate_content.call_args.args[0]
+    assert aggregates == before
+
+def test_evaluator_agent_per_keyword(mocker, mock_strategist_summary, mock_raw_docs):
+    """Tests that every summary is evaluated against its own keyword's documents."""
+    mock_outcome_tool = mocker.patch('cryptosentinator.agents.evaluator_agent.get_mock_market_outcome')
+    mock_outcome_tool.invoke.side_effect = lambda args: (
+        "Positive price movement" if args["raw_documents"][0]["keyword"] == "Bitcoin" else "Negative price movement"
+    )
+    bitcoin = dict(mock_strategist_summary, keyword="Bitcoin")
+    ethereum = dict(mock_strategist_summary, keyword="Ethereum", cryptocurrency="Ethereum")
+    result_state = evaluator_agent.evaluator_agent.run(
+        {"strategic_summaries": [bitcoin, ethereum], "raw_documents": mock_raw_docs}
+    )
+    evaluations = result_state["evaluations"]
+    assert [e["keyword"] for e in evaluations] == ["Bitcoin", "Ethereum"]
+    assert [e["evaluation_result"] for e in evaluations] == ["Correct", "Incorrect"]
+    assert result_state["evaluation"] == evaluations[0]
+
 @pytest.mark.parametrize("hypothesis, outcome, expected_result, expected_notes_substr", [
     ("bullish increase", "Positive price movement (+5%)", "Correct", "correctly predicted"),
     ("bearish decrease", "Negative price movement (-5%)", "Correct", "correctly predicted"),
@@ -67,3 +226,20 @@ def test_evaluator_agent(mocker, mock_strategist_summary, hypothesis, outcome, e
     evaluation = result_state["evaluation"]
     assert evaluation["evaluation_result"] == expected_result
     assert expected_notes_substr in evaluation["evaluation_notes"]
+
+def test_intelligence_analyst_agent_collapses_near_duplicates(mocker, mock_raw_docs):
+    """Tests that near-duplicates are analyzed once and the result is shared by the whole cluster."""
+    mock_analyze_tool = mocker.patch('cryptosentinator.agents.intelligence_analyst_agent.analyze_text_deeply')
+    mock_analyze_tool.invoke.side_effect = lambda args: {
+        "sentiment_score": 0.5, "sentiment_label": "Positive", "topic": "Test", "entities": [args["text_content"][:7]]
+    }
+    raw_docs = mock_raw_docs + [dict(mock_raw_docs[0], content="RT @fan: Bitcoin to the moon!")] * 3
+    agent = intelligence_analyst_agent.IntelligenceAnalystAgent(batch_size=1, dedup_max_distance=3)
+    result_state = agent.run({"raw_documents": raw_docs})
+    processed = result_state["processed_documents"]
+    assert mock_analyze_tool.invoke.call_count == 2
+    assert [doc["content"] for doc in processed] == [doc["content"] for doc in raw_docs]
+    assert [doc["cluster_size"] for doc in processed] == [4, 1, 4, 4, 4]
+    assert processed[2]["entities"] == ["Bitcoin"]
+    assert result_state["analyst_metrics"]["unique_documents"] == 2
+    assert result_state["analyst_metrics"]["total_documents"] == 5
@@ -0,0 +1,96 @@
+import math
+import pytest
+from tools.aggregation import (
+    RunningAggregates,
+    aggregate_documents,
+    entity_counts,
+    sentiment_by_source,
+    time_decayed_sentiment,
+    to_columns,
+    topic_histogram,
+)
+
+
+def _doc(keyword, source, score, topic="Regulation", entities=(), timestamp="2024-01-01T00:00:00"):
+    return {"source": source, "content": "c", "timestamp": timestamp, "keyword": keyword,
+            "sentiment_score": score, "sentiment_label": None, "topic": topic, "entities": list(entities)}
+
+
+def test_missing_scores_do_not_dilute_the_mean():
+    docs = [_doc("BTC", "X", 0.8), _doc("BTC", "X", None), _doc("BTC", "Reddit", 0.4)]
+    aggregate = aggregate_documents(docs)["BTC"]
+    assert aggregate["sentiment_mean"] == pytest.approx(0.6)
+    assert aggregate["sentiment_variance"] == pytest.approx(0.04)
+    assert aggregate["scored_documents"] == 2
+    assert aggregate["documents"] == 3
+
+def test_per_source_and_keyword_grouping():
+    docs = [_doc("BTC", "X", 1.0), _doc("BTC", "Reddit", -1.0), _doc("ETH", "X", 0.0)]
+    columns = to_columns(docs)
+    by_source = sentiment_by_source(columns)
+    assert by_source["X"]["mean"] == pytest.approx(0.5)
+    assert by_source["Reddit"]["count"] == 1
+    aggregates = aggregate_documents(docs)
+    assert aggregates["BTC"]["by_source"]["Reddit"]["mean"] == -1.0
+    assert "Reddit" not in aggregates["ETH"]["by_source"]
+
+def test_keyword_without_scores_has_nan_mean():
+    aggregate = aggregate_documents([_doc("BTC", "X", None)])["BTC"]
+    assert math.isnan(aggregate["sentiment_mean"])
+
+def test_time_decay_favours_recent_documents():
+    docs = [_doc("BTC", "X", 1.0, timestamp="2024-01-02T00:00:00"),
+            _doc("BTC", "X", -1.0, timestamp="2024-01-01T00:00:00")]
+    columns = to_columns(docs)
+    now = columns.timestamps[0]
+    decayed = time_decayed_sentiment(columns, half_life_hours=24, now=now)
+    # Weights 1 and 0.5 -> (1 - 0.5) / 1.5
+    assert decayed["BTC"] == pytest.approx(1 / 3)
+
+def test_timezone_aware_and_blank_timestamps():
+    columns = to_columns([_doc("BTC", "X", 0.1, timestamp="2024-01-01T01:00:00+01:00"),
+                          _doc("BTC", "X", 0.1, timestamp="")])
+    assert columns.timestamps[0] == pytest.approx(1704067200.0)
+    assert math.isnan(columns.timestamps[1])
+
+def test_topic_histogram_and_entities_with_weights():
+    docs = [_doc("BTC", "X", 0.1, "Regulation", ["SEC", "BTC"]),
+            _doc("BTC", "X", 0.1, "Technology Update", ["BTC"]),
+            _doc("BTC", "X", 0.1, None, ["BTC"])]
+    columns = to_columns(docs, weights=[1.0, 3.0, 1.0])
+    assert list(topic_histogram(columns)["BTC"].items()) == [("Technology Update", 3.0), ("Regulation", 1.0)]
+    assert entity_counts(columns, "BTC") == {"BTC": 5.0, "SEC": 1.0}
+    assert entity_counts(columns, "ETH") == {}
+
+def test_empty_documents():
+    assert aggregate_documents([]) == {}
+
+def test_large_corpus_aggregates():
+    docs = [_doc(f"K{i % 50}", ["X", "Reddit", "News"][i % 3], (i % 200) / 100 - 1, entities=["BTC"])
+            for i in range(20_000)]
+    aggregates = aggregate_documents(docs)
+    assert len(aggregates) == 50
+    assert sum(a["documents"] for a in aggregates.values()) == 20_000
+
+def test_running_aggregates_match_a_single_pass():
+    docs = [_doc(f"K{i % 3}", ["X", "Reddit"][i % 2], None if i % 7 == 0 else (i % 11) / 5 - 1,
+                 topic=["Regulation", "Adoption", None][i % 3], entities=["BTC", "ETF"][:i % 3],
+                 timestamp=f"2024-01-0{1 + i % 5}T00:00:00")
+            for i in range(500)]
+    now = 1704412800.0  # 2024-01-05T00:00:00Z
+    running = RunningAggregates(reference_time=now)
+    for start in range(0, len(docs), 64):
+        running.update(docs[start:start + 64])
+    expected = aggregate_documents(docs, now=now)
+
+    result = running.result()
+    assert set(result) == set(expected)
+    for keyword, aggregate in expected.items():
+        for key in ("sentiment_mean", "sentiment_variance", "decayed_sentiment"):
+            assert result[keyword][key] == pytest.approx(aggregate[key])
+        assert result[keyword]["documents"] == aggregate["documents"]
+        assert result[keyword]["scored_documents"] == aggregate["scored_documents"]
+        assert result[keyword]["topics"] == aggregate["topics"]
+        assert result[keyword]["entities"] == aggregate["entities"]
+        for source, stats in aggregate["by_source"].items():
+            assert result[keyword]["by_source"][source] == pytest.approx(stats)
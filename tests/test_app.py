@@ -13,3 +13,16 @@ def test_create_interactive_pipeline_called(monkeypatch):
     result = interactive_pipeline.create_interactive_pipeline("Bitcoin")
     assert result == "Mocked report"
     assert called["keywords"] == "Bitcoin"
+
+def test_tenant_header_is_only_trusted_from_configured_proxies(monkeypatch):
+    from types import SimpleNamespace
+    from app import _tenant
+
+    def request(host, tenant):
+        return SimpleNamespace(headers={"x-tenant-id": tenant}, client=SimpleNamespace(host=host))
+
+    monkeypatch.delenv("TRUSTED_PROXIES", raising=False)
+    assert _tenant(request("203.0.113.7", "spoofed-1")) == "203.0.113.7"
+    monkeypatch.setenv("TRUSTED_PROXIES", "10.0.0.2, 10.0.0.3")
+    assert _tenant(request("10.0.0.3", "team-a")) == "team-a"
+    assert _tenant(request("203.0.113.7", "spoofed-2")) == "203.0.113.7"
@@ -0,0 +1,116 @@
+import io
+import json
+import threading
+import time
+import pytest
+from batch_runner import main, read_keywords, run_batch
+
+
+class FakeApp:
+    def __init__(self, fail=(), no_summary=(), delays=None):
+        self.fail = set(fail)
+        self.no_summary = set(no_summary)
+        self.delays = delays or {}
+        self.calls = []
+        self.active = self.peak = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, state):
+        keyword = state["keywords"][0]
+        with self._lock:
+            self.calls.append(keyword)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delays.get(keyword, 0))
+            if keyword in self.fail:
+                raise RuntimeError(f"{keyword} failed")
+            if keyword in self.no_summary:
+                return {"processed_documents": [{}, {}], "strategic_summaries": [], "evaluations": []}
+            return {"processed_documents": [{}, {}],
+                    "strategic_summaries": [{"keyword": keyword, "hypothesis": f"{keyword} up"}],
+                    "evaluations": [{"keyword": keyword, "evaluation_result": "Correct"}]}
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def _lines(path):
+    records = []
+    for line in path.read_text().splitlines():
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            pass  # a line cut short by a killed sweep
+    return records
+
+
+def test_read_keywords_skips_blanks_comments_and_repeats():
+    text = "Bitcoin\n\n# majors\nEthereum, Solana\nbitcoin  # again\n"
+    assert read_keywords(io.StringIO(text)) == ["Bitcoin", "Ethereum", "Solana"]
+
+
+def test_batch_writes_one_line_per_keyword_with_bounded_concurrency(tmp_path):
+    output = tmp_path / "sweep.jsonl"
+    app = FakeApp(fail={"Dogecoin"})
+    keywords = [f"Coin{i}" for i in range(10)] + ["Dogecoin"]
+    summary = run_batch(keywords, str(output), concurrency=3, app=app, log=lambda message: None)
+    records = {record["keyword"]: record for record in _lines(output)}
+    assert set(records) == set(keywords)
+    assert records["Coin0"]["status"] == "ok" and records["Coin0"]["documents"] == 2
+    assert records["Coin0"]["strategic_summaries"][0]["hypothesis"] == "Coin0 up"
+    assert records["Dogecoin"]["status"] == "error" and "failed" in records["Dogecoin"]["error"]
+    assert app.peak <= 3
+    assert summary["completed"] == 10 and summary["failed"] == ["Dogecoin"]
+    assert set(summary["timings"]) == set(keywords) and summary["keywords_per_minute"] > 0
+
+
+def test_interrupted_sweep_resumes_and_retries_failures(tmp_path):
+    output = tmp_path / "sweep.jsonl"
+    run_batch(["Bitcoin", "Ethereum"], str(output), app=FakeApp(fail={"Ethereum"}), log=lambda message: None)
+    with open(output, "a") as f:
+        f.write('{"keyword": "Solana", "sta')  # killed mid-write
+    app = FakeApp()
+    summary = run_batch(["Bitcoin", "Ethereum", "Solana"], str(output), app=app, log=lambda message: None)
+    assert sorted(app.calls) == ["Ethereum", "Solana"]
+    assert summary["skipped"] == 1
+    ok = [record["keyword"] for record in _lines(output) if record["status"] == "ok"]
+    assert sorted(ok) == ["Bitcoin", "Ethereum", "Solana"]
+
+
+def test_cli_reads_stdin_and_exits_nonzero_on_failures(tmp_path, monkeypatch, capsys):
+    import batch_runner
+    output = tmp_path / "sweep.jsonl"
+    monkeypatch.setattr("sys.stdin", io.StringIO("Bitcoin\nBroken\n"))
+    original = batch_runner.run_batch
+    monkeypatch.setattr(batch_runner, "run_batch",
+                        lambda *args, **kwargs: original(*args, app=FakeApp(fail={"Broken"}), **kwargs))
+    assert main(["-", "--output", str(output), "--concurrency", "2"]) == 1
+    assert "1 completed, 1 failed" in capsys.readouterr().out
+    assert len(_lines(output)) == 2
+
+
+def test_runs_without_a_summary_fail_and_are_retried(tmp_path):
+    output = tmp_path / "sweep.jsonl"
+    summary = run_batch(["Bitcoin", "Ethereum"], str(output), app=FakeApp(no_summary={"Ethereum"}),
+                        log=lambda message: None)
+    assert summary["failed"] == ["Ethereum"]
+    assert "no strategic summary" in {r["keyword"]: r for r in _lines(output)}["Ethereum"]["error"]
+    app = FakeApp()
+    run_batch(["Bitcoin", "Ethereum"], str(output), app=app, log=lambda message: None)
+    assert app.calls == ["Ethereum"]
+
+
+def test_interrupted_sweep_keeps_the_results_of_running_keywords(tmp_path):
+    output = tmp_path / "sweep.jsonl"
+
+    def interrupt(message):
+        raise KeyboardInterrupt
+
+    app = FakeApp(delays={"Slow": 0.3, "Next": 0.3, "Last": 0.3})
+    with pytest.raises(KeyboardInterrupt):
+        run_batch(["Fast", "Slow", "Next", "Last"], str(output), concurrency=2, app=app, log=interrupt)
+    written = {record["keyword"] for record in _lines(output)}
+    # "Slow" was running when Ctrl-C arrived; "Last" was still queued and is dropped.
+    assert {"Fast", "Slow"} <= written and "Last" not in written
+    assert written == set(app.calls)
@@ -0,0 +1,100 @@
+import time
+from typing import List, TypedDict
+import pytest
+from langgraph.graph import END, StateGraph
+from checkpointing import CheckpointedRun, SqliteCheckpointSaver, run_id_for
+
+
+class State(TypedDict, total=False):
+    keywords: List[str]
+    raw_documents: List[str]
+    processed_documents: List[str]
+    strategic_summaries: List[str]
+
+
+def _workflow(calls, fail_strategist):
+    def scout(state):
+        calls.append("scout")
+        return {"raw_documents": [f"{keyword} post" for keyword in state["keywords"]]}
+
+    def analyst(state):
+        calls.append("analyst")
+        return {"processed_documents": [doc.upper() for doc in state["raw_documents"]]}
+
+    def strategist(state):
+        calls.append("strategist")
+        if fail_strategist:
+            raise TimeoutError("Gemini timed out")
+        return {"strategic_summaries": [f"summary of {len(state['processed_documents'])} documents"]}
+
+    workflow = StateGraph(State)
+    workflow.add_node("scout", scout)
+    workflow.add_node("analyst", analyst)
+    workflow.add_node("strategist", strategist)
+    workflow.set_entry_point("scout")
+    workflow.add_edge("scout", "analyst")
+    workflow.add_edge("analyst", "strategist")
+    workflow.add_edge("strategist", END)
+    return workflow
+
+
+def test_failed_run_resumes_after_the_last_completed_node(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite")
+    run_id = run_id_for(["Bitcoin"], "test", "sentinator")
+    calls = []
+    failing = _workflow(calls, fail_strategist=True).compile(checkpointer=SqliteCheckpointSaver(path))
+    with pytest.raises(TimeoutError):
+        CheckpointedRun(failing, {"keywords": ["Bitcoin"]}, run_id).invoke()
+    assert calls == ["scout", "analyst", "strategist"]
+
+    # A retry, even from another process, skips scouting and analysis.
+    calls.clear()
+    saver = SqliteCheckpointSaver(path)
+    app = _workflow(calls, fail_strategist=False).compile(checkpointer=saver)
+    run = CheckpointedRun(app, {"keywords": ["Bitcoin"]}, run_id)
+    assert run.resumed_at == ("strategist",)
+    assert run.values["processed_documents"] == ["BITCOIN POST"]
+    final_state = run.invoke()
+    assert calls == ["strategist"]
+    assert final_state["strategic_summaries"] == ["summary of 1 documents"]
+    assert list(saver.list({"configurable": {"thread_id": run_id}})) == []
+
+
+def test_streamed_retry_starts_from_the_checkpointed_state(tmp_path):
+    saver = SqliteCheckpointSaver(str(tmp_path / "checkpoints.sqlite"))
+    calls = []
+    with pytest.raises(TimeoutError):
+        list(CheckpointedRun(_workflow(calls, True).compile(checkpointer=saver), {"keywords": ["ETH"]}, "r").stream())
+    calls.clear()
+    run = CheckpointedRun(_workflow(calls, False).compile(checkpointer=saver), {"keywords": ["ETH"]}, "r")
+    updates = list(run.stream())
+    assert [list(update) for update in updates] == [["strategist"]]
+    assert calls == ["strategist"]
+
+
+def test_different_keywords_or_finished_runs_start_over(tmp_path):
+    saver = SqliteCheckpointSaver(str(tmp_path / "checkpoints.sqlite"))
+    calls = []
+    with pytest.raises(TimeoutError):
+        CheckpointedRun(_workflow(calls, True).compile(checkpointer=saver), {"keywords": ["BTC"]}, "r").invoke()
+    run = CheckpointedRun(_workflow(calls, False).compile(checkpointer=saver), {"keywords": ["SOL"]}, "r")
+    assert run.resumed_at == ()
+    assert run.invoke()["raw_documents"] == ["SOL post"]
+
+
+def test_abandoned_runs_expire(tmp_path):
+    saver = SqliteCheckpointSaver(str(tmp_path / "checkpoints.sqlite"), retention_seconds=60)
+    app = _workflow([], fail_strategist=True).compile(checkpointer=saver)
+    with pytest.raises(TimeoutError):
+        CheckpointedRun(app, {"keywords": ["BTC"]}, "abandoned").invoke()
+    assert saver.delete_expired() == 0
+    assert saver.delete_expired(now=time.time() + 61) == 1
+    assert saver.get_tuple({"configurable": {"thread_id": "abandoned"}}) is None
+
+
+def test_apps_without_a_checkpointer_are_invoked_as_before():
+    class DummyApp:
+        def invoke(self, state):
+            return {"echo": state}
+
+    assert CheckpointedRun(DummyApp(), {"keywords": ["BTC"]}, "r").invoke() == {"echo": {"keywords": ["BTC"]}}
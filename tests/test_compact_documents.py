@@ -0,0 +1,74 @@
+import json
+import math
+import tracemalloc
+
+import pytest
+
+from compact_documents import CompactDocument, DocumentBatch, epoch_to_timestamp, timestamp_to_epoch
+from tools.aggregation import aggregate_documents
+
+
+def _processed(i, timestamp="2024-01-01T12:30:00"):
+    return {"source": ["X", "Reddit"][i % 2], "content": f"post {i}", "timestamp": timestamp,
+            "keyword": ["Bitcoin", "Ethereum", "Solana"][i % 3],
+            "sentiment_score": None if i % 5 == 0 else (i % 7) / 7 - 0.5,
+            "sentiment_label": ["Positive", "Negative"][i % 2], "topic": None if i % 4 == 0 else "Adoption",
+            "entities": ["BTC", "ETF"][:i % 3], "cluster_size": 1 + i % 2}
+
+
+def test_timestamps_round_trip_at_second_resolution():
+    assert epoch_to_timestamp(timestamp_to_epoch("2024-01-01T12:30:00")) == "2024-01-01T12:30:00"
+    assert timestamp_to_epoch("2024-01-01T12:30:00+02:00") == timestamp_to_epoch("2024-01-01T10:30:00")
+    assert timestamp_to_epoch("not a date") is None and epoch_to_timestamp(None) == ""
+
+def test_compact_document_round_trip_and_interning():
+    raw = {"source": "X", "content": "gm", "timestamp": "2024-01-01T00:00:00", "keyword": "Bitcoin"}
+    assert CompactDocument.from_dict(raw).to_dict() == raw
+    doc = _processed(1)
+    assert CompactDocument.from_dict(doc).to_dict() == doc
+
+    first = CompactDocument.from_dict({**doc, "keyword": "".join(["Bit", "coin"])})
+    second = CompactDocument.from_dict({**doc, "keyword": "".join(["Bitc", "oin"])})
+    assert first.keyword is second.keyword
+    with pytest.raises(AttributeError):
+        first.extra = 1  # slotted, no per-instance dict
+
+def test_batch_round_trip():
+    docs = [_processed(i) for i in range(50)] + [_processed(50, timestamp="")]
+    batch = DocumentBatch.from_documents(docs)
+    assert len(batch) == 51
+    assert batch.to_documents() == docs
+    assert batch.keywords == ["Bitcoin", "Ethereum", "Solana"]  # each string stored once
+
+    raw = [{key: doc[key] for key in ("source", "content", "timestamp", "keyword")} for doc in docs]
+    assert DocumentBatch.from_documents(raw).to_documents() == raw
+
+def test_batch_feeds_aggregation_directly():
+    docs = [_processed(i, timestamp=f"2024-01-0{1 + i % 3}T00:00:00") for i in range(300)]
+    now = 1704326400.0
+    expected = aggregate_documents(docs, now=now)
+    result = aggregate_documents(DocumentBatch.from_documents(docs), now=now)
+    assert set(result) == set(expected)
+    for keyword, aggregate in expected.items():
+        for key, value in aggregate.items():
+            if isinstance(value, float):
+                assert math.isclose(result[keyword][key], value) or (math.isnan(value) and math.isnan(result[keyword][key]))
+            else:
+                assert result[keyword][key] == value
+
+def test_compact_forms_use_less_memory():
+    lines = [json.dumps(_processed(i)) for i in range(5000)]
+
+    def retained(build):
+        tracemalloc.start()
+        built = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return size, built
+
+    # Decoded from JSON, every field starts out as its own string.
+    dict_size, _ = retained(lambda: [json.loads(line) for line in lines])
+    compact_size, _ = retained(lambda: [CompactDocument.from_dict(json.loads(line)) for line in lines])
+    batch_size, _ = retained(lambda: DocumentBatch.from_documents([json.loads(line) for line in lines]))
+    assert compact_size < dict_size / 2
+    assert batch_size < compact_size
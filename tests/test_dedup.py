@@ -0,0 +1,52 @@
+import random
+from graph_state import RawDocument
+from tools.dedup import cluster_near_duplicates, plan_deduplication, simhash_fingerprints
+
+
+def test_identical_texts_share_a_fingerprint():
+    fingerprints = simhash_fingerprints(["Bitcoin to the moon!", "Bitcoin to the moon!", "Ethereum looks weak"])
+    assert fingerprints[0] == fingerprints[1]
+    assert fingerprints[0] != fingerprints[2]
+
+def test_empty_texts_get_zero_fingerprint():
+    assert simhash_fingerprints(["", "hello world", ""]).tolist()[0::2] == [0, 0]
+
+def test_near_duplicates_collapse_into_first_document():
+    texts = [
+        "Great news for #Bitcoin! To the moon! 🚀 #BitcoinIsTheFuture",
+        "RT @whale: Great news for #Bitcoin! To the moon! 🚀 #BitcoinIsTheFuture",
+        "great news for #bitcoin!  to the moon! 🚀 #BitcoinIsTheFuture",
+        "Worried about the Ethereum gas fees after the latest network upgrade.",
+    ]
+    assert cluster_near_duplicates(texts, max_distance=3) == [0, 0, 0, 3]
+
+def test_groups_are_never_merged():
+    texts = ["Bitcoin to the moon!", "Bitcoin to the moon!"]
+    assert cluster_near_duplicates(texts, groups=["BTC", "ETH"]) == [0, 1]
+
+def test_distinct_texts_stay_separate():
+    rng = random.Random(7)
+    words = ["bitcoin", "ethereum", "price", "moon", "crash", "regulation", "etf", "wallet", "miner", "fees",
+             "halving", "bullish", "bearish", "exchange", "ledger", "defi", "staking", "airdrop", "token", "layer"]
+    texts = [" ".join(rng.choice(words) for _ in range(12)) for _ in range(300)]
+    roots = cluster_near_duplicates(list(dict.fromkeys(texts)), max_distance=3)
+    assert len(set(roots)) == len(roots)
+
+def test_plan_fans_results_out_to_every_document():
+    docs = [
+        RawDocument(source="X", content="Bitcoin to the moon!", timestamp="", keyword="Bitcoin"),
+        RawDocument(source="Reddit", content="Feeling bearish about Ethereum.", timestamp="", keyword="Ethereum"),
+        RawDocument(source="X", content="RT @a: Bitcoin to the moon!", timestamp="", keyword="Bitcoin"),
+    ]
+    plan = plan_deduplication(docs)
+    assert plan.representatives == [0, 1]
+    assert plan.cluster_sizes == [2, 1]
+    assert plan.fan_out(["btc", "eth"]) == ["btc", "eth", "btc"]
+
+def test_large_corpus_of_repeated_posts():
+    rng = random.Random(11)
+    base = [" ".join(f"w{rng.randrange(5000)}" for _ in range(15)) for _ in range(500)]
+    texts = base * 20
+    roots = cluster_near_duplicates(texts)
+    assert len(set(roots)) == 500
+    assert roots[:500] == list(range(500))
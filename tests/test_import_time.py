@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("langgraph", "langchain_core", "numpy", "requests", "gradio", "google.generativeai")
+# Generous ceilings (microseconds, self + imports) so slow or busy CI machines
+# do not flake; the heavy-module check above is the precise guard.
+IMPORT_BUDGETS_US = {
+    "interactive_pipeline": 300_000,
+    "pipeline": 300_000,
+    "llm_client": 300_000,
+}
+
+
+def _import_times(module: str) -> dict:
+    """Runs `python -X importtime -c 'import module'` and returns the cumulative time per imported module."""
+    env = dict(os.environ, PYTHONPATH=PROJECT_ROOT)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("module", sorted(IMPORT_BUDGETS_US))
+def test_entry_points_import_lazily(module):
+    times = _import_times(module)
+    heavy = sorted(name for name in times if name.split(".")[0] in HEAVY_MODULES or name in HEAVY_MODULES)
+    assert not heavy, f"importing {module} eagerly pulls in {heavy}"
+    assert times[module] < IMPORT_BUDGETS_US[module], f"{module} took {times[module]}us to import"
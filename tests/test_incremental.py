@@ -0,0 +1,131 @@
+import datetime
+import json
+import math
+import pytest
+import incremental
+import pipeline
+from graph_state import ProcessedDocument, RawDocument
+from incremental import IncrementalStore, IncrementalTracker, aggregates_moved
+
+NOW = datetime.datetime(2024, 5, 1, 12, 0, 0)
+
+
+def _epoch(moment):
+    """Naive timestamps are UTC."""
+    return moment.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+def _raw(content, hours_ago, keyword="Bitcoin"):
+    timestamp = (NOW - datetime.timedelta(hours=hours_ago)).isoformat()
+    return RawDocument(source="X", content=content, timestamp=timestamp, keyword=keyword)
+
+def _doc(content, hours_ago, score, keyword="Bitcoin"):
+    return ProcessedDocument(**_raw(content, hours_ago, keyword), sentiment_score=score,
+                             sentiment_label="Neutral", topic="Test", entities=[])
+
+
+@pytest.fixture
+def store():
+    store = IncrementalStore(clock=lambda: _epoch(NOW))
+    yield store
+    store.close()
+
+
+def test_only_documents_past_the_watermark_are_new(store):
+    assert store.add_documents([_doc("old", 2, 0.5), _doc("newest", 1, 0.5)]) == 2
+    assert store.watermark("Bitcoin") == _epoch(NOW - datetime.timedelta(hours=1))
+    candidates = [_raw("older than watermark", 3), _raw("newest", 1), _raw("fresh", 0), _raw("other keyword", 5, "Ethereum")]
+    assert [doc["content"] for doc in store.select_new(candidates)] == ["fresh", "other keyword"]
+
+def test_stored_documents_are_not_counted_twice(store):
+    store.add_documents([_doc("a", 1, 0.5)])
+    assert store.add_documents([_doc("a", 1, 0.5)]) == 0
+    assert store.window_aggregates("Bitcoin")["24h"]["documents"] == 1
+
+def test_rolling_windows(store):
+    store.add_documents([_doc("recent", 0.2, 1.0), _doc("today", 5, 0.0), _doc("this week", 48, -1.0),
+                         _doc("unscored", 0.1, None), _doc("expired", 24 * 8, 1.0)])
+    windows = store.window_aggregates("Bitcoin")
+    assert windows["1h"]["documents"] == 2
+    assert windows["1h"]["scored_documents"] == 1
+    assert windows["1h"]["sentiment_mean"] == pytest.approx(1.0)
+    assert windows["24h"]["sentiment_mean"] == pytest.approx(0.5)
+    assert windows["24h"]["sentiment_variance"] == pytest.approx(0.25)
+    assert windows["7d"]["scored_documents"] == 3
+    assert windows["7d"]["sentiment_mean"] == pytest.approx(0.0)
+    assert [doc["content"] for doc in store.recent_documents("Bitcoin", 24 * 3600)] == ["unscored", "recent", "today"]
+    assert math.isnan(store.window_aggregates("Ethereum")["7d"]["sentiment_mean"])
+
+@pytest.mark.parametrize("previous, current, moved", [
+    (None, {"1h": {"sentiment_mean": 0.1}}, True),
+    ({"1h": {"sentiment_mean": 0.1}}, {"1h": {"sentiment_mean": 0.15}}, False),
+    ({"1h": {"sentiment_mean": 0.1}}, {"1h": {"sentiment_mean": 0.3}}, True),
+    ({"1h": {"sentiment_mean": math.nan}}, {"1h": {"sentiment_mean": math.nan}}, False),
+    ({"1h": {"sentiment_mean": math.nan}}, {"1h": {"sentiment_mean": 0.0}}, True),
+])
+def test_aggregates_moved(previous, current, moved):
+    assert aggregates_moved(previous, current, 0.1) is moved
+
+def test_incremental_pipeline_skips_unchanged_keywords(mocker, monkeypatch):
+    """Tests that a second tick with no new documents analyzes nothing and does not call the strategist."""
+    monkeypatch.setattr(incremental, "incremental_tracker", IncrementalTracker(IncrementalStore(), sentiment_delta=0.1))
+    pipeline.clear_pipeline_cache()
+    timestamp = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None).isoformat()
+    for name in ("search_x_mock", "search_reddit_mock", "search_news_mock"):
+        source = mocker.patch(f"agents.scout_agent.{name}")
+        source.invoke.return_value = [{"source": name, "content": f"{name} post", "timestamp": timestamp, "keyword": "Bitcoin"}]
+    analyze = mocker.patch("agents.intelligence_analyst_agent.analyze_text_deeply")
+    analyze.invoke.return_value = {"sentiment_score": 0.6, "sentiment_label": "Positive", "topic": "Test", "entities": []}
+    strategist_model = mocker.patch("agents.strategist_agent.model")
+    strategist_model.generate_content.return_value.text = json.dumps({
+        "cryptocurrency": "Bitcoin", "hypothesis": "Up.", "confidence": "Medium",
+        "reasoning": "Positive.", "supporting_evidence": ["post"],
+    })
+    try:
+        app = pipeline.get_compiled_pipeline(pipeline.INCREMENTAL_PIPELINE)
+        first = app.invoke({"keywords": ["Bitcoin"]})
+        assert analyze.invoke.call_count == 3
+        assert len(first["strategic_summaries"]) == 1
+        assert "Rolling-Window Sentiment: 1h 0.60 (n=3)" in strategist_model.generate_content.call_args[0][0]
+
+        second = app.invoke({"keywords": ["Bitcoin"]})
+        assert analyze.invoke.call_count == 3
+        assert second["raw_documents"] == []
+        assert second["strategist_keywords"] == []
+        assert strategist_model.generate_content.call_count == 1
+    finally:
+        pipeline.clear_pipeline_cache()
+
+def test_evaluator_sees_the_window_documents_of_changed_keywords(store):
+    """A keyword whose window moved without new documents is evaluated on the strategist's window, not on nothing."""
+    from agents.evaluator_agent import evaluator_agent
+    from tools.market_data_tools import NO_DATA_OUTCOME
+
+    store.add_documents([_doc("Bitcoin rally, bullish breakout", 0.5, 0.9), _doc("quiet day", 5, 0.1)])
+    store.save_snapshot("Bitcoin", {"1h": {"sentiment_mean": -0.5}})
+    tracker = IncrementalTracker(store, sentiment_delta=0.1)
+    update = tracker.merge_windows({"keywords": ["Bitcoin"], "raw_documents": [], "processed_documents": []})
+
+    assert update["strategist_keywords"] == ["Bitcoin"]
+    assert [doc["content"] for doc in update["raw_documents"]] == [doc["content"] for doc in update["processed_documents"]]
+    summary = {"keyword": "Bitcoin", "cryptocurrency": "Bitcoin", "hypothesis": "Bullish.", "confidence": "High",
+               "reasoning": "r", "supporting_evidence": []}
+    evaluation = evaluator_agent.run({**update, "strategic_summaries": [summary]})["evaluations"][0]
+    assert evaluation["simulated_outcome"] != NO_DATA_OUTCOME
+
+def test_naive_timestamps_are_utc_on_every_path(monkeypatch):
+    import time
+    from compact_documents import timestamp_to_epoch
+    from tools.aggregation import _parse_timestamps
+
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    try:
+        values = ["2024-05-01T12:00:00", "2024-05-01T14:00:00+02:00"]
+        parsed = [incremental.parse_timestamp(value, None) for value in values]
+        assert parsed == [_epoch(NOW)] * 2
+        assert parsed == [timestamp_to_epoch(value) for value in values]
+        assert parsed == list(_parse_timestamps(values))
+    finally:
+        monkeypatch.delenv("TZ")
+        time.tzset()
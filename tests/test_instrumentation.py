@@ -0,0 +1,96 @@
+import json
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from instrumentation import (
+    MetricsRegistry, bind_context, instrument_node, instrument_tool, metrics,
+    recent_spans, record_cache_lookup, record_llm_call, start_metrics_server, start_span,
+)
+
+
+def test_spans_nest_and_roll_up_llm_usage():
+    with start_span("pipeline run") as root:
+        with start_span("node analyst") as node:
+            with start_span("tool analyze_text_deeply") as tool_span:
+                record_llm_call("stub-model", prompt_tokens=10, output_tokens=4, latency=0.1)
+                record_cache_lookup("nlp", hit=True)
+    assert tool_span.parent is node and node.parent is root
+    assert {tool_span.trace_id, node.trace_id} == {root.trace_id}
+    for span in (tool_span, node, root):
+        assert span.attributes["llm.calls"] == 1
+        assert span.attributes["llm.prompt_tokens"] == 10
+        assert span.attributes["cache.hits"] == 1
+    assert recent_spans()[-3:] == [tool_span, node, root]
+
+def test_otlp_json_export(tmp_path, monkeypatch):
+    path = tmp_path / "spans.jsonl"
+    monkeypatch.setenv("TRACE_EXPORT_PATH", str(path))
+    with pytest.raises(ValueError):
+        with start_span("node scout", **{"documents.in": 3}):
+            raise ValueError("boom")
+    record = json.loads(path.read_text().splitlines()[-1])
+    span = record["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+    assert span["name"] == "node scout"
+    assert len(span["traceId"]) == 32 and len(span["spanId"]) == 16
+    assert {"key": "documents.in", "value": {"intValue": "3"}} in span["attributes"]
+    assert span["status"] == {"code": 2, "message": "ValueError: boom"}
+    assert int(span["endTimeUnixNano"]) >= int(span["startTimeUnixNano"])
+
+def test_bind_context_keeps_thread_pool_work_in_the_span():
+    with start_span("node strategist") as node:
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            list(executor.map(bind_context(lambda _: record_llm_call("m", 1, 1, 0.01)), range(6)))
+    assert node.attributes["llm.calls"] == 6
+
+def test_instrument_node_and_tool_record_metrics():
+    @instrument_tool
+    def lookup(keyword):
+        record_llm_call("stub-model", 5, 5, 0.01)
+        return keyword
+
+    node = instrument_node("test-node", lambda state: {"processed_documents": [lookup(k) for k in state["raw_documents"]]})
+    before = metrics.value("sentinator_node_runs_total", node="test-node", status="ok")
+    node({"raw_documents": ["a", "b"]})
+    span = next(span for span in reversed(recent_spans()) if span.name == "node test-node")
+    assert span.attributes["documents.in"] == 2
+    assert span.attributes["documents.out"] == 2
+    assert span.attributes["llm.calls"] == 2
+    assert metrics.value("sentinator_node_runs_total", node="test-node", status="ok") == before + 1
+    assert metrics.value("sentinator_tool_calls_total", tool="lookup", status="ok") >= 2
+
+def test_prometheus_text_format():
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+    registry.inc("jobs_total", 2, help="Jobs.", queue='a"b')
+    registry.observe("latency_seconds", 0.05, node="scout")
+    registry.observe("latency_seconds", 0.5, node="scout")
+    text = registry.render()
+    assert '# HELP jobs_total Jobs.\n# TYPE jobs_total counter\njobs_total{queue="a\\"b"} 2' in text
+    assert 'latency_seconds_bucket{node="scout",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{node="scout",le="1"} 2' in text
+    assert 'latency_seconds_bucket{node="scout",le="+Inf"} 2' in text
+    assert 'latency_seconds_count{node="scout"} 2' in text
+
+def test_metrics_endpoint():
+    record_llm_call("endpoint-model", 3, 2, 0.2)
+    server = start_metrics_server(0, host="127.0.0.1")
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            body = response.read().decode()
+            assert response.headers["Content-Type"].startswith("text/plain")
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert 'sentinator_llm_tokens_total{direction="prompt",model="endpoint-model"} 3' in body
+
+def test_metrics_endpoint_is_opt_in_and_loopback_by_default(monkeypatch):
+    from config import get_metrics_host, get_metrics_port
+    monkeypatch.delenv("METRICS_PORT", raising=False)
+    monkeypatch.delenv("METRICS_HOST", raising=False)
+    assert get_metrics_port() == 0
+    server = start_metrics_server(0)
+    try:
+        assert server.server_address[0] == get_metrics_host() == "127.0.0.1"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -40,21 +40,9 @@ def test_valid_keywords(monkeypatch):
                 }
             }
 
-    class DummyStateGraph:
-        def __init__(self, state_class):
-            pass
-        def add_node(self, name, func):
-            pass
-        def set_entry_point(self, name):
-            pass
-        def add_edge(self, from_node, to_node):
-            pass
-        def compile(self):
-            return DummyApp()
-
-    # Patch StateGraph in interactive_pipeline module
+    # Patch the compiled pipeline used by the interactive_pipeline module
     import interactive_pipeline
-    monkeypatch.setattr(interactive_pipeline, "StateGraph", DummyStateGraph)
+    monkeypatch.setattr(interactive_pipeline, "get_compiled_pipeline", lambda: DummyApp())
 
     report = create_interactive_pipeline("Bitcoin, Ethereum")
     assert "Analysis Report" in report or "📊 Analysis Report" in report
@@ -70,20 +58,8 @@ def test_graph_execution_exception(monkeypatch):
         def invoke(self, state):
             raise Exception("Test exception")
 
-    class DummyStateGraph:
-        def __init__(self, state_class):
-            pass
-        def add_node(self, name, func):
-            pass
-        def set_entry_point(self, name):
-            pass
-        def add_edge(self, from_node, to_node):
-            pass
-        def compile(self):
-            return DummyApp()
-
     import interactive_pipeline
-    monkeypatch.setattr(interactive_pipeline, "StateGraph", DummyStateGraph)
+    monkeypatch.setattr(interactive_pipeline, "get_compiled_pipeline", lambda: DummyApp())
 
     result = create_interactive_pipeline("Bitcoin")
     assert "Analysis Failed" in result
@@ -96,20 +72,72 @@ def test_no_strategic_summaries(monkeypatch):
         def invoke(self, state):
             return {}
 
-    class DummyStateGraph:
-        def __init__(self, state_class):
-            pass
-        def add_node(self, name, func):
-            pass
-        def set_entry_point(self, name):
-            pass
-        def add_edge(self, from_node, to_node):
-            pass
-        def compile(self):
-            return DummyApp()
-
     import interactive_pipeline
-    monkeypatch.setattr(interactive_pipeline, "StateGraph", DummyStateGraph)
+    monkeypatch.setattr(interactive_pipeline, "get_compiled_pipeline", lambda: DummyApp())
 
     result = create_interactive_pipeline("Bitcoin")
     assert "No strategic summary" in result
+
+def test_render_report_covers_every_keyword():
+    from interactive_pipeline import render_report
+    final_state = {
+        "strategic_summaries": [
+            {"keyword": "Bitcoin", "cryptocurrency": "Bitcoin", "hypothesis": "BTC up", "confidence": "High",
+             "reasoning": "r", "supporting_evidence": ["btc evidence"]},
+            {"keyword": "Solana", "cryptocurrency": "Solana", "hypothesis": "SOL down", "confidence": "Low",
+             "reasoning": "r", "supporting_evidence": []},
+        ],
+        "evaluations": [
+            {"keyword": "Solana", "hypothesis_tested": "SOL down", "simulated_outcome": "Negative",
+             "evaluation_result": "Correct", "evaluation_notes": "n"},
+            {"keyword": "Bitcoin", "hypothesis_tested": "BTC up", "simulated_outcome": "Stable",
+             "evaluation_result": "Partially Correct", "evaluation_notes": "n"},
+        ],
+    }
+    report = render_report(final_state)
+    bitcoin_section, solana_section = report.split("Analysis Report for: ")[1:]
+    assert "BTC up" in bitcoin_section and "Partially Correct" in bitcoin_section
+    assert "SOL down" in solana_section and "**Correct**" in solana_section
+
+def test_stream_interactive_pipeline_yields_after_each_node(monkeypatch):
+    import interactive_pipeline
+    monkeypatch.setattr(interactive_pipeline, "GEMINI_API_KEY", "dummy_key")
+
+    summary = {"keyword": "Bitcoin", "cryptocurrency": "Bitcoin", "hypothesis": "Streamed hypothesis",
+               "confidence": "High", "reasoning": "r", "supporting_evidence": []}
+    evaluation = {"keyword": "Bitcoin", "hypothesis_tested": "Streamed hypothesis", "simulated_outcome": "Positive",
+                  "evaluation_result": "Correct", "evaluation_notes": "n"}
+    raw = {"source": "X", "content": "c", "timestamp": "", "keyword": "Bitcoin"}
+
+    class DummyApp:
+        def stream(self, state, stream_mode):
+            assert stream_mode == "updates"
+            yield {"scout": {"raw_documents": [raw, dict(raw, source="Reddit")]}}
+            yield {"analyst": {"processed_documents": [dict(raw, sentiment_score=0.5, sentiment_label="Positive")]}}
+            yield {"strategist": {"strategic_summaries": [summary]}}
+            yield {"evaluator": {"evaluation": evaluation, "evaluations": [evaluation]}}
+
+    monkeypatch.setattr(interactive_pipeline, "get_compiled_pipeline", lambda: DummyApp())
+
+    outputs = list(interactive_pipeline.stream_interactive_pipeline("Bitcoin"))
+
+    assert len(outputs) == 5
+    assert "Analyzing: Bitcoin" in outputs[0]
+    assert "2 documents gathered" in outputs[1] and "Reddit: 1" in outputs[1]
+    assert "average sentiment `0.50`" in outputs[2] and "over 1 documents" in outputs[2]
+    assert "Streamed hypothesis" in outputs[3]
+    assert "Analysis Report for: Bitcoin" in outputs[4] and "Correct" in outputs[4]
+
+def test_stream_interactive_pipeline_reports_failure(monkeypatch):
+    import interactive_pipeline
+    monkeypatch.setattr(interactive_pipeline, "GEMINI_API_KEY", "dummy_key")
+
+    class DummyApp:
+        def stream(self, state, stream_mode):
+            yield {"scout": {"raw_documents": []}}
+            raise Exception("Stream exception")
+
+    monkeypatch.setattr(interactive_pipeline, "get_compiled_pipeline", lambda: DummyApp())
+
+    outputs = list(interactive_pipeline.stream_interactive_pipeline("Bitcoin"))
+    assert "Analysis Failed" in outputs[-1] and "Stream exception" in outputs[-1]
@@ -0,0 +1,66 @@
+import threading
+import pytest
+from instrumentation import metrics
+from job_queue import PRIORITY_BACKGROUND, PRIORITY_HIGH, JobQueue, QueueFullError
+
+
+@pytest.fixture
+def blocked_queue():
+    """A one-worker queue whose worker is busy until `release` is set."""
+    jobs = JobQueue(workers=1, max_queued=4, max_queued_per_tenant=3)
+    release, started = threading.Event(), threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    jobs.submit(block)
+    started.wait(5)
+    yield jobs, release
+    release.set()
+    jobs.shutdown()
+
+
+def test_tenants_take_turns_and_priority_goes_first(blocked_queue):
+    jobs, release = blocked_queue
+    order = []
+    submitted = [
+        jobs.submit(order.append, "a1", tenant="a"),
+        jobs.submit(order.append, "a2", tenant="a"),
+        jobs.submit(order.append, "b1", tenant="b"),
+        jobs.submit(order.append, "urgent", tenant="c", priority=PRIORITY_HIGH),
+    ]
+    release.set()
+    for job in submitted:
+        job.wait(5)
+    assert order == ["urgent", "a1", "b1", "a2"]
+
+
+def test_full_queue_rejects_fast(blocked_queue):
+    jobs, _ = blocked_queue
+    for _ in range(3):
+        jobs.submit(lambda: None, tenant="a")
+    with pytest.raises(QueueFullError, match="for a"):
+        jobs.submit(lambda: None, tenant="a")
+    jobs.submit(lambda: None, tenant="b", priority=PRIORITY_BACKGROUND)
+    rejected = metrics.value("sentinator_jobs_total", event="rejected")
+    with pytest.raises(QueueFullError) as raised:
+        jobs.submit(lambda: None, tenant="c")
+    assert raised.value.retry_after >= 1.0
+    assert metrics.value("sentinator_jobs_total", event="rejected") == rejected + 1
+    assert jobs.stats()["queued"] == 4
+
+
+def test_results_errors_and_polling():
+    jobs = JobQueue(workers=2, max_queued=4, max_queued_per_tenant=4)
+    try:
+        ok = jobs.submit(lambda x: x * 2, 21)
+        assert ok.wait(5) == 42
+        failing = jobs.submit(lambda: 1 / 0)
+        with pytest.raises(ZeroDivisionError):
+            failing.wait(5)
+        snapshot = jobs.get(failing.id).snapshot()
+        assert snapshot["status"] == "failed" and "division" in snapshot["error"]
+        assert metrics.value("sentinator_job_wait_seconds") >= 2
+    finally:
+        jobs.shutdown()
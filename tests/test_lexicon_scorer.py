@@ -0,0 +1,74 @@
+import pytest
+from tools.lexicon_scorer import (
+    DEFAULT_MARKET_LEXICON,
+    LexiconScorer,
+    lexicon_sentiment_result,
+    load_lexicon,
+)
+
+
+def _reference_score(text, lexicon):
+    """The original per-indicator `in` scan the compiled scorer replaces."""
+    content_lower = text.lower()
+    return sum(weight for term, weight in lexicon.items() if term in content_lower)
+
+
+@pytest.mark.parametrize("text", [
+    "Great news for #Bitcoin! To the moon! 🚀 #BitcoinIsTheFuture",
+    "Worried about #Bitcoin price drop. Is it a scam? #SellBitcoin",
+    "Discussion about Bitcoin on r/cryptocurrency. Some say it's bullish, others bearish.",
+    "Just observing #Bitcoin market movements. #Crypto",
+])
+def test_matches_original_substring_scoring(text):
+    scorer = LexiconScorer(DEFAULT_MARKET_LEXICON)
+    assert scorer.score(text) == _reference_score(text, DEFAULT_MARKET_LEXICON)
+
+def test_overlapping_terms_are_all_found():
+    scorer = LexiconScorer({"great news": 2.0, "news": 0.5, "ewsflash": 1.0})
+    assert scorer.matches("GREAT NEWSFLASH") == {"great news": 1, "news": 1, "ewsflash": 1}
+    assert scorer.score("great news, more news") == 2.5
+
+def test_terms_that_prefix_longer_terms_are_found():
+    lexicon = {"great": 1.0, "great news": 2.0, "great news today": 4.0, "news": 0.5}
+    scorer = LexiconScorer(lexicon)
+    assert scorer.score("great news today") == _reference_score("great news today", lexicon) == 7.5
+    assert scorer.matches("Great news, great day") == {"great": 2, "great news": 1, "news": 1}
+    assert LexiconScorer({"great": 1, "great news": 2}).score("great news today") == 3.0
+    assert LexiconScorer(lexicon, count_repeats=True).score("great news, great day") == 4.5
+
+def test_count_repeats_and_bulk_scores():
+    scorer = LexiconScorer({"moon": 1.0, "scam": -2.0}, count_repeats=True)
+    scores = scorer.score_documents(["moon moon", "scam", "nothing"])
+    assert scores["document_scores"] == [2.0, -2.0, 0.0]
+    assert scores["total"] == 0.0
+    assert scores["matched_documents"] == 2
+    assert scorer.prefilter(["moon moon", "scam", "nothing"]) == [0, 1]
+
+def test_sentiment_confidence_reflects_agreement():
+    scorer = LexiconScorer({"bullish": 1.5, "rally": 1.0, "bearish": -1.5})
+    positive, positive_confidence = scorer.sentiment("Bullish rally ahead")
+    mixed, mixed_confidence = scorer.sentiment("Some say bullish, others bearish")
+    assert positive > 0.5 and positive_confidence > 0.8
+    assert mixed == 0.0 and mixed_confidence == 0.0
+    assert scorer.sentiment("no signal here") == (0.0, 0.0)
+
+def test_lexicon_sentiment_result_shape():
+    result = lexicon_sentiment_result("Massive crash, total scam")
+    assert result["sentiment_label"] == "Negative" and result["sentiment_score"] < 0
+    assert result["topic"] == "Unclassified" and result["entities"] == []
+
+def test_word_boundaries_keep_emoji_and_hashtag_terms():
+    scorer = LexiconScorer({"ban": -1.0, "#pump": 1.0, "🚀": 1.0, "is the future": 1.0}, word_boundaries=True)
+    assert scorer.matches("Banks and bans") == {}
+    assert scorer.matches("BAN it, #PUMP, moon🚀 #BitcoinIsTheFuture") == {
+        "ban": 1, "#pump": 1, "🚀": 1, "is the future": 1}
+    assert LexiconScorer({"ban": -1.0}).matches("Banks") == {"ban": 1}
+
+def test_lexicon_sentiment_result_ignores_terms_inside_words():
+    result = lexicon_sentiment_result("Banks are back again, rather")
+    assert result["sentiment_label"] == "Neutral" and result["sentiment_score"] == 0.0
+
+def test_load_lexicon(tmp_path):
+    path = tmp_path / "lexicon.json"
+    path.write_text('{"Moon": 1, "rug": -2.5}', encoding="utf-8")
+    assert LexiconScorer(load_lexicon(str(path))).score("MOON rug") == -1.5
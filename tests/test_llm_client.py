@@ -0,0 +1,106 @@
+import asyncio
+import json
+import time
+import pytest
+from benchmarks.gemini_stub import GeminiStubServer
+from llm_client import GeminiClient, LLMError
+from rate_limiter import RateLimiter
+
+
+def _client(server, **kwargs):
+    kwargs.setdefault("sleep", lambda seconds: None)
+    return GeminiClient("stub-model", api_key="test", base_url=server.base_url, backoff=0.01,
+                        rate_limiter=RateLimiter(), **kwargs)
+
+
+def test_generate_content_accounts_tokens_and_reuses_connections():
+    with GeminiStubServer() as server:
+        client = _client(server, hedge_after=0)
+        replies = [client.generate_content(f"Text to analyze: Bitcoin to the moon {i}") for i in range(3)]
+    assert json.loads(replies[0].text)["sentiment_label"] == "Positive"
+    assert all(reply.prompt_tokens > 0 and reply.output_tokens > 0 for reply in replies)
+    stats = client.stats()
+    assert stats["calls"] == 3
+    assert stats["prompt_tokens"] == sum(reply.prompt_tokens for reply in replies)
+    assert stats["latency_max"] > 0
+    assert len(set(server.client_ports)) == 1  # one keep-alive connection
+
+def test_retries_429_and_5xx_with_backoff():
+    delays = []
+    with GeminiStubServer(failures=[429, 503]) as server:
+        client = _client(server, max_retries=3, hedge_after=0, sleep=delays.append, jitter=lambda: 1.0)
+        reply = client.generate_content("Text to analyze: hello")
+    assert reply.attempts == 3
+    assert delays == [0.01, 0.02]
+    assert client.stats()["retries"] == 2
+
+def test_non_retryable_status_fails_immediately():
+    with GeminiStubServer(failures=[400]) as server:
+        client = _client(server, max_retries=3, hedge_after=0)
+        with pytest.raises(LLMError) as error:
+            client.generate_content("Text to analyze: hello")
+    assert error.value.status == 400
+    assert server.requests == 1
+    assert client.stats()["errors"] == 1
+
+def test_gives_up_after_max_retries():
+    with GeminiStubServer(failures=[500, 500, 500]) as server:
+        client = _client(server, max_retries=1, hedge_after=0)
+        with pytest.raises(LLMError):
+            client.generate_content("Text to analyze: hello")
+    assert server.requests == 2
+
+def test_hedged_request_wins_over_slow_primary():
+    with GeminiStubServer() as server:
+        calls = {"n": 0}
+
+        def responder(prompt):
+            calls["n"] += 1
+            if calls["n"] == 1:
+                time.sleep(1.0)  # the primary request is stuck in the tail
+            return "ok"
+
+        server.responder = responder
+        client = _client(server, hedge_after=0.05)
+        started = time.perf_counter()
+        reply = client.generate_content("hello")
+        elapsed = time.perf_counter() - started
+    assert reply.text == "ok"
+    assert reply.hedged
+    assert elapsed < 0.9
+    assert client.stats()["hedges"] == 1
+
+def test_async_interface_overlaps_requests():
+    with GeminiStubServer(latency=0.2) as server:
+        client = _client(server, hedge_after=0)
+
+        async def run():
+            return await asyncio.gather(*(client.agenerate_content(f"Text to analyze: {i}") for i in range(4)))
+
+        started = time.perf_counter()
+        replies = asyncio.run(run())
+        elapsed = time.perf_counter() - started
+    assert len(replies) == 4
+    assert elapsed < 0.6
+
+def test_retrying_request_is_not_hedged():
+    with GeminiStubServer(failures=[429]) as server:
+        # The backoff after the 429 outlasts hedge_after; waiting it out must not send a duplicate.
+        client = _client(server, max_retries=2, hedge_after=0.05, sleep=lambda seconds: time.sleep(0.3))
+        reply = client.generate_content("Text to analyze: hello")
+    assert not reply.hedged and reply.attempts == 2
+    assert server.requests == 2
+    assert client.stats()["hedges"] == 0
+
+def test_hedge_clock_starts_when_the_request_is_sent():
+    class SlowLimiter(RateLimiter):
+        def acquire(self):
+            time.sleep(0.3)  # queued for a quota token, not slow to answer
+            return 0.3
+
+    with GeminiStubServer() as server:
+        client = GeminiClient("stub-model", api_key="test", base_url=server.base_url, hedge_after=0.1,
+                              rate_limiter=SlowLimiter())
+        reply = client.generate_content("Text to analyze: hello")
+    assert not reply.hedged
+    assert server.requests == 1
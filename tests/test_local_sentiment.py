@@ -0,0 +1,51 @@
+import pytest
+from tools.local_sentiment import LocalSentimentScorer, escalation_metrics
+
+
+@pytest.fixture
+def scorer():
+    return LocalSentimentScorer(escalation_threshold=0.6)
+
+
+@pytest.mark.parametrize("text, label, topic", [
+    ("Great news for #Bitcoin! To the moon! 🚀 #BitcoinIsTheFuture", "Positive", "Price Speculation"),
+    ("Worried about #Bitcoin price drop. Is it a scam? #SellBitcoin", "Negative", "Price Speculation"),
+    ("Just observing #Bitcoin market movements. #Crypto", "Neutral", "General Market Trend"),
+])
+def test_obvious_documents_stay_local(scorer, text, label, topic):
+    analysis = scorer.analyze(text, "X")
+    assert analysis["sentiment_label"] == label
+    assert analysis["topic"] == topic
+    assert "Bitcoin" in analysis["entities"]
+    assert not scorer.should_escalate(analysis)
+
+@pytest.mark.parametrize("text, source", [
+    ("Some say it's bullish, others bearish. What are your thoughts?", "Reddit"),  # mixed signals
+    ("Experts predict potential volatility in the coming weeks.", "X"),            # no signal
+    ("To the moon! SEC finally approves the spot ETF 🚀", "X"),                    # high impact
+    ("Great news, huge rally!", "NewsOutlet"),                                     # high-impact source
+])
+def test_ambiguous_or_high_impact_documents_escalate(scorer, text, source):
+    assert scorer.should_escalate(scorer.analyze(text, source))
+
+@pytest.mark.parametrize("text", [
+    "Banks are circling Ethereum",                      # 'ban'
+    "Bitcoin is back above 60k again, rather",          # 'gain', 'ath'
+    "Bitcoin futures open interest is flat",            # 'future'
+])
+def test_sentiment_terms_inside_other_words_do_not_count(scorer, text):
+    assert scorer.sentiment_scorer.matches(text) == {}
+    analysis = scorer.analyze(text, "X")
+    assert analysis["sentiment_label"] == "Neutral" and analysis["confidence"] == 0.0
+    assert scorer.should_escalate(analysis)
+
+def test_threshold_is_configurable():
+    text = "Mild gain today"
+    assert LocalSentimentScorer(escalation_threshold=0.9).should_escalate(LocalSentimentScorer().analyze(text))
+    assert not LocalSentimentScorer(escalation_threshold=0.1).should_escalate(LocalSentimentScorer().analyze(text))
+
+def test_escalation_metrics():
+    assert escalation_metrics(10, 3, 1) == {
+        "documents": 10, "escalated": 3, "scored_locally": 7, "escalation_rate": 0.3, "llm_calls": 1,
+    }
+    assert escalation_metrics(0, 0, 0)["escalation_rate"] == 0.0
@@ -0,0 +1,86 @@
+import pytest
+from tools import nlp_tools
+from tools.nlp_cache import NLPResultCache, make_cache_key, normalize_content
+
+RESULT = {"sentiment_score": 0.5, "sentiment_label": "Positive", "entities": ["BTC"], "topic": "Price Speculation"}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_normalization_collapses_reposts_and_formatting():
+    assert normalize_content("RT @whale: Bitcoin   to the MOON") == normalize_content("bitcoin to the moon")
+    assert make_cache_key("Bitcoin", "v1", "m") != make_cache_key("Bitcoin", "v2", "m")
+    assert make_cache_key("Bitcoin", "v1", "m") != make_cache_key("Bitcoin", "v1", "other-model")
+
+def test_memory_tier_is_lru_bounded():
+    cache = NLPResultCache(max_memory_entries=2)
+    cache.put("a", RESULT)
+    cache.put("b", RESULT)
+    assert cache.get("a") == RESULT  # "a" becomes most recently used
+    cache.put("c", RESULT)
+    assert cache.get("b") is None
+    assert cache.get("a") == RESULT
+    stats = cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 1 and stats["evictions"] == 1
+
+def test_disk_tier_survives_restart_and_expires(tmp_path):
+    clock = FakeClock()
+    path = str(tmp_path / "cache.sqlite")
+    cache = NLPResultCache(path=path, ttl_seconds=60, clock=clock)
+    cache.put("key", RESULT)
+    cache.close()
+
+    reopened = NLPResultCache(path=path, ttl_seconds=60, clock=clock)
+    assert reopened.get("key") == RESULT
+    assert reopened.stats()["disk_hits"] == 1
+
+    clock.now += 61
+    assert reopened.get("key") is None
+    assert reopened.stats()["disk_entries"] == 0
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    clock = FakeClock()
+    cache = NLPResultCache(path=str(tmp_path / "cache.sqlite"), max_memory_entries=1, max_disk_entries=10, clock=clock)
+    for i in range(11):
+        clock.now += 1
+        cache.put(f"key-{i}", RESULT)
+    assert cache.stats()["disk_entries"] <= 10
+    assert cache.get("key-0") is None
+    assert cache.get("key-10") == RESULT
+
+def test_analyze_text_deeply_uses_cache(mocker):
+    cache = NLPResultCache()
+    mocker.patch.object(nlp_tools, "get_nlp_cache", return_value=cache)
+    mock_model = mocker.patch.object(nlp_tools, "model")
+    mock_model.generate_content.return_value.text = (
+        '{"sentiment_score": 0.5, "sentiment_label": "Positive", "entities": ["BTC"], "topic": "Price Speculation"}'
+    )
+
+    first = nlp_tools.analyze_text_deeply.invoke({"text_content": "Bitcoin to the moon"})
+    second = nlp_tools.analyze_text_deeply.invoke({"text_content": "RT @someone: bitcoin to the  moon"})
+
+    assert first == second == RESULT
+    assert mock_model.generate_content.call_count == 1
+    assert cache.stats()["hits"] == 1
+
+def test_analyze_texts_batch_only_sends_uncached_texts(mocker):
+    cache = NLPResultCache()
+    cache.put(make_cache_key("cached text", nlp_tools.PROMPT_VERSION, nlp_tools.MODEL_NAME), RESULT)
+    mocker.patch.object(nlp_tools, "get_nlp_cache", return_value=cache)
+    mock_model = mocker.patch.object(nlp_tools, "model")
+    mock_model.generate_content.return_value.text = (
+        '[{"id": "doc-1", "sentiment_score": -0.2, "sentiment_label": "Negative", "entities": [], "topic": "Regulation"}]'
+    )
+
+    results = nlp_tools.analyze_texts_batch.invoke({"texts": ["cached text", "fresh text", "Fresh  text"]})
+
+    prompt = mock_model.generate_content.call_args.args[0]
+    assert "cached text" not in prompt and prompt.count("resh") == 1
+    assert results[0] == RESULT
+    assert results[1]["sentiment_score"] == results[2]["sentiment_score"] == -0.2
@@ -0,0 +1,44 @@
+import pytest
+import pipeline
+
+
+def test_compiled_pipeline_is_reused():
+    pipeline.clear_pipeline_cache()
+    first = pipeline.get_compiled_pipeline()
+    assert pipeline.get_compiled_pipeline() is first
+    assert set(first.get_graph().nodes) >= {"scout", "analyst", "strategist", "evaluator"}
+
+def test_register_pipeline_compiles_once_per_configuration(monkeypatch):
+    calls = []
+
+    def builder():
+        calls.append(1)
+        return pipeline.build_sentinator_workflow()
+
+    pipeline.register_pipeline("test-config", builder)
+    try:
+        app = pipeline.get_compiled_pipeline("test-config")
+        assert pipeline.get_compiled_pipeline("test-config") is app
+        assert app is not pipeline.get_compiled_pipeline()
+        assert len(calls) == 1
+    finally:
+        monkeypatch.delitem(pipeline._pipeline_builders, "test-config")
+        pipeline.clear_pipeline_cache()
+
+def test_unknown_pipeline_configuration():
+    with pytest.raises(KeyError):
+        pipeline.get_compiled_pipeline("does-not-exist")
+
+def test_pipeline_benchmark_runs_with_fake_llm():
+    from benchmarks import run_pipeline_benchmark as bench
+    import tools.nlp_tools as nlp_tools
+
+    model = nlp_tools.model
+    first = bench.run_size(12, ["Bitcoin", "Ethereum"], seed=7, latency_ms=0, ms_per_1k_tokens=0)
+    second = bench.run_size(12, ["Bitcoin", "Ethereum"], seed=7, latency_ms=0, ms_per_1k_tokens=0)
+
+    assert nlp_tools.model is model
+    assert set(first["node_seconds"]) == {"scout", "analyst", "strategist", "evaluator"}
+    assert first["llm_calls"] == 12 + 2  # one analysis per document, one summary per keyword
+    assert first["summaries"] == 2
+    assert (first["llm_calls"], first["output_tokens"]) == (second["llm_calls"], second["output_tokens"])
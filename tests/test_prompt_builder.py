@@ -0,0 +1,78 @@
+import pytest
+from benchmarks.gemini_stub import GeminiStubServer
+from instrumentation import metrics
+from llm_client import GeminiClient, TokenBudgetExceeded, count_tokens, current_token_budget, run_token_budget
+from rate_limiter import RateLimiter
+from tools import nlp_tools
+from tools.prompt_builder import truncate_to_tokens
+
+
+def test_truncate_keeps_short_text_and_cuts_long_text_at_a_word():
+    assert truncate_to_tokens("Bitcoin to the moon", 16) == ("Bitcoin to the moon", False)
+    text, truncated = truncate_to_tokens("bitcoin " * 200, 16)
+    assert truncated and text.endswith("bitcoin [...]")
+    assert count_tokens(text) <= 16
+
+
+def test_prompts_share_a_static_prefix_and_cap_document_text(mocker, monkeypatch):
+    monkeypatch.setenv("PROMPT_MAX_DOCUMENT_TOKENS", "64")
+    mocker.patch.object(nlp_tools, "get_nlp_cache", return_value=None)
+    mock_model = mocker.patch.object(nlp_tools, "model")
+    mock_model.generate_content.return_value.text = (
+        '{"sentiment_score": 0.5, "sentiment_label": "Positive", "entities": [], "topic": "Price Speculation"}'
+    )
+    truncations = metrics.value("sentinator_prompt_truncations_total", prompt="nlp")
+
+    nlp_tools.analyze_text_deeply.invoke({"text_content": "ETH looks strong"})
+    nlp_tools.analyze_text_deeply.invoke({"text_content": "Long thread about the merge. " * 500})
+
+    short, long = (call.args[0] for call in mock_model.generate_content.call_args_list)
+    assert short.startswith(nlp_tools.NLP_PROMPT.prefix) and long.startswith(nlp_tools.NLP_PROMPT.prefix)
+    assert count_tokens(long) <= nlp_tools.NLP_PROMPT.prefix_tokens + 64
+    assert metrics.value("sentinator_prompt_truncations_total", prompt="nlp") == truncations + 1
+
+
+def test_run_budget_refuses_calls_before_sending():
+    with GeminiStubServer() as server:
+        client = GeminiClient("stub-model", api_key="test", base_url=server.base_url, hedge_after=0,
+                              rate_limiter=RateLimiter())
+        prompt = "Text to analyze: " + "Bitcoin to the moon " * 20
+        with run_token_budget(limit=200) as budget:
+            reply = client.generate_content(prompt)
+            # Settled with the usage Gemini reported, not the estimate.
+            assert budget.used == reply.prompt_tokens + reply.output_tokens
+            with pytest.raises(TokenBudgetExceeded):
+                client.generate_content(prompt)
+        assert server.requests == 1
+    assert budget.calls == 1 and budget.rejected == 1
+    assert current_token_budget() is None
+    assert metrics.value("sentinator_llm_budget_rejections_total", model="stub-model") >= 1
+
+
+def test_nested_runs_share_the_outer_budget():
+    with run_token_budget(limit=100) as outer:
+        with run_token_budget(limit=5) as inner:
+            assert inner is outer
+        assert current_token_budget() is outer
+
+
+def test_retries_are_charged_to_the_run_budget():
+    prompt = "Text to analyze: " + "Bitcoin to the moon " * 20
+    estimate = count_tokens(prompt)
+    with GeminiStubServer(failures=[503]) as server:
+        client = GeminiClient("stub-model", api_key="test", base_url=server.base_url, hedge_after=0,
+                              backoff=0.01, sleep=lambda seconds: None, rate_limiter=RateLimiter())
+        with run_token_budget(limit=1000) as budget:
+            reply = client.generate_content(prompt)
+        assert budget.calls == 2
+        assert budget.used == estimate + reply.prompt_tokens + reply.output_tokens
+
+    # A retry the budget cannot cover is not sent.
+    with GeminiStubServer(failures=[503]) as server:
+        client = GeminiClient("stub-model", api_key="test", base_url=server.base_url, hedge_after=0,
+                              backoff=0.01, sleep=lambda seconds: None, rate_limiter=RateLimiter())
+        with run_token_budget(limit=estimate + 10) as budget:
+            with pytest.raises(TokenBudgetExceeded):
+                client.generate_content(prompt)
+        assert server.requests == 1
+    assert budget.used == estimate and budget.rejected == 1
@@ -0,0 +1,61 @@
+import pytest
+from rate_limiter import TokenBucket, RateLimiter
+
+
+class FakeClock:
+    """A manual clock whose sleep() simply advances time."""
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_token_bucket_allows_burst_then_waits():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2.0, capacity=2.0, clock=clock, sleep=clock.sleep)
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 0.0
+    # The bucket is empty; the next token arrives after 1 / rate seconds.
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert clock.now == pytest.approx(0.5)
+
+def test_token_bucket_never_exceeds_capacity():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1.0, capacity=3.0, clock=clock, sleep=clock.sleep)
+    clock.now = 100.0
+    for _ in range(3):
+        assert bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() > 0
+
+def test_rate_limiter_enforces_rpm_quota():
+    clock = FakeClock()
+    limiter = RateLimiter(max_rpm=60, clock=clock, sleep=clock.sleep)
+    for _ in range(60):
+        limiter.acquire()
+    assert clock.now == 0.0
+    limiter.acquire()
+    assert clock.now == pytest.approx(1.0)
+
+def test_rate_limiter_disabled_without_quotas():
+    limiter = RateLimiter()
+    assert not limiter.enabled
+    assert limiter.acquire() == 0
+
+def test_rate_limiter_takes_qps_and_rpm_tokens_together():
+    clock = FakeClock()
+    limiter = RateLimiter(max_qps=2, max_rpm=4, clock=clock, sleep=clock.sleep)
+    grants = []
+    for _ in range(6):
+        limiter.acquire()
+        grants.append(clock.now)
+    # QPS spaces the first minute's burst; then RPM allows one request every 15 s.
+    assert grants == pytest.approx([0.0, 0.0, 0.5, 1.0, 15.0, 30.0])
+    # A caller refused by the RPM quota keeps no QPS token to spend after the stall.
+    clock.now += 1.0
+    assert limiter.try_acquire() == pytest.approx(14.0)
+    qps_bucket = limiter._buckets[0]
+    assert qps_bucket.try_acquire() == 0.0 and qps_bucket.try_acquire() == 0.0
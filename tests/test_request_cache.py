@@ -0,0 +1,101 @@
+import threading
+import time
+import pytest
+from job_queue import JobQueue, QueueFullError
+from request_cache import ReportCache
+
+
+def _producer(calls, release=None, reports=("partial", "final"), cacheable=True):
+    def produce():
+        calls.append(1)
+        for report in reports:
+            if release is not None:
+                release.wait(5)
+            yield report
+        return cacheable
+    return produce
+
+
+def test_concurrent_requests_share_one_run():
+    cache = ReportCache(fresh_seconds=60, stale_seconds=0)
+    calls, release = [], threading.Event()
+    results = []
+
+    def request():
+        results.append(list(cache.stream("bitcoin", _producer(calls, release))))
+
+    threads = [threading.Thread(target=request) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while cache.stats()["miss"] + cache.stats()["coalesced"] < 5:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == [["partial", "final"]] * 5
+    stats = cache.stats()
+    assert (stats["miss"], stats["coalesced"]) == (1, 4)
+    assert cache.get("bitcoin", _producer(calls)) == "final"
+    assert len(calls) == 1 and cache.stats()["hit"] == 1
+
+
+def test_stale_report_is_served_while_one_run_refreshes_it():
+    cache = ReportCache(fresh_seconds=0.05, stale_seconds=60)
+    calls = []
+    assert cache.get("bitcoin", _producer(calls, reports=("old",))) == "old"
+    time.sleep(0.06)
+    release = threading.Event()
+    assert cache.get("bitcoin", _producer(calls, release, reports=("new",))) == "old"
+    assert cache.get("bitcoin", _producer(calls, release, reports=("newer",))) == "old"
+    release.set()
+    while cache.stats()["in_flight"]:
+        time.sleep(0.01)
+    assert len(calls) == 2
+    assert cache.get("bitcoin", _producer(calls)) == "new"
+    assert cache.stats()["stale"] == 2
+
+
+def test_failed_runs_are_not_cached():
+    cache = ReportCache(fresh_seconds=60, stale_seconds=60)
+    calls = []
+    assert cache.get("bitcoin", _producer(calls, reports=("failed",), cacheable=False)) == "failed"
+    assert cache.get("bitcoin", _producer(calls, reports=("ok",))) == "ok"
+    assert len(calls) == 2
+
+
+def test_producer_errors_reach_every_follower():
+    cache = ReportCache(fresh_seconds=60, stale_seconds=0)
+
+    def produce():
+        yield "partial"
+        raise RuntimeError("boom")
+
+    stream = cache.stream("bitcoin", produce)
+    assert next(stream) == "partial"
+    with pytest.raises(RuntimeError, match="boom"):
+        next(stream)
+    assert cache.stats()["entries"] == 0
+
+
+def test_new_runs_are_rejected_when_the_job_queue_is_full():
+    jobs = JobQueue(workers=1, max_queued=1, max_queued_per_tenant=1)
+    cache = ReportCache(fresh_seconds=60, stale_seconds=0, jobs=jobs)
+    calls, release = [], threading.Event()
+    running = cache.stream("bitcoin", _producer(calls, release))
+    queued = cache.stream("ethereum", _producer(calls, release))
+    rejected = cache.stream("solana", _producer(calls, release))
+    threads = [threading.Thread(target=list, args=(stream,)) for stream in (running, queued)]
+    threads[0].start()
+    while jobs.stats()["running"] < 1:
+        time.sleep(0.01)
+    threads[1].start()
+    while jobs.stats()["queued"] < 1:
+        time.sleep(0.01)
+    with pytest.raises(QueueFullError):
+        next(rejected)
+    release.set()
+    for thread in threads:
+        thread.join()
+    jobs.shutdown()
+    assert len(calls) == 2
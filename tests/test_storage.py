@@ -0,0 +1,83 @@
+import threading
+import pytest
+from incremental import parse_timestamp
+from storage import AnalysisStore
+
+NOW = parse_timestamp("2024-01-02T00:00:00", 0.0)
+
+
+def _doc(content, score, timestamp, source="X", keyword="Bitcoin"):
+    return {"source": source, "content": content, "timestamp": timestamp, "keyword": keyword,
+            "sentiment_score": score, "sentiment_label": "Positive", "topic": "Adoption", "entities": ["BTC"],
+            "cluster_size": 1}
+
+
+def _state(processed, hypothesis="Bitcoin will rise."):
+    raw = [{key: doc[key] for key in ("source", "content", "timestamp", "keyword")} for doc in processed]
+    return {
+        "keywords": ["Bitcoin"],
+        "raw_documents": raw,
+        "processed_documents": processed,
+        "strategic_summaries": [{"keyword": "Bitcoin", "cryptocurrency": "Bitcoin", "hypothesis": hypothesis,
+                                 "confidence": "High", "reasoning": "r", "supporting_evidence": [{"content": "c"}]}],
+        "evaluations": [{"keyword": "Bitcoin", "cryptocurrency": "Bitcoin", "hypothesis_tested": hypothesis,
+                         "simulated_outcome": "Price increased by 2%", "evaluation_result": "Correct",
+                         "evaluation_notes": "n"}],
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = AnalysisStore(str(tmp_path / "analysis.sqlite"), pool_size=2)
+    yield store
+    store.close()
+
+
+def test_sentiment_by_hour_buckets_and_averages(store):
+    store.save_run(_state([
+        _doc("a", 0.8, "2024-01-01T22:10:00"),
+        _doc("b", 0.4, "2024-01-01T22:50:00", source="Reddit"),
+        _doc("c", -0.5, "2024-01-01T23:05:00"),
+        _doc("old", 1.0, "2023-12-20T00:00:00"),
+        _doc("other", 1.0, "2024-01-01T23:00:00", keyword="Ethereum"),
+    ]))
+    hours = store.sentiment_by_hour("Bitcoin", hours=24, now=NOW)
+    assert [row["documents"] for row in hours] == [2, 1]
+    assert hours[0]["sentiment_mean"] == pytest.approx(0.6)
+    assert hours[1]["sentiment_mean"] == pytest.approx(-0.5)
+    assert hours[1]["hour"] - hours[0]["hour"] == 3600
+    by_source = store.sentiment_by_source("Bitcoin", hours=24, now=NOW)
+    assert by_source["Reddit"]["documents"] == 1
+    assert by_source["X"]["sentiment_mean"] == pytest.approx(0.15)
+
+
+def test_documents_seen_by_several_runs_are_stored_once(store):
+    store.save_run(_state([_doc("a", 0.8, "2024-01-01T22:10:00")]), created_at=NOW - 60)
+    store.save_run(_state([_doc("a", 0.8, "2024-01-01T22:10:00"), _doc("b", 0.0, "2024-01-01T22:20:00")],
+                          hypothesis="Bitcoin will hold."), created_at=NOW)
+    assert store.sentiment_by_hour("Bitcoin", hours=24, now=NOW)[0]["documents"] == 2
+    summaries = store.recent_summaries("Bitcoin")
+    assert [summary["hypothesis"] for summary in summaries] == ["Bitcoin will hold.", "Bitcoin will rise."]
+    assert summaries[0]["evaluation_result"] == "Correct"
+    assert summaries[0]["supporting_evidence"] == [{"content": "c"}]
+
+
+def test_history_queries_use_the_keyword_timestamp_index(store):
+    with store.backend.connection() as connection:
+        plan = store.backend.query(
+            connection, "EXPLAIN QUERY PLAN SELECT COUNT(*) FROM processed_documents "
+                        "WHERE keyword = ? AND timestamp >= ? AND timestamp <= ?", ("Bitcoin", 0, NOW))
+    assert any("idx_processed_keyword_timestamp" in row[-1] for row in plan)
+
+
+def test_concurrent_saves_share_the_connection_pool(store):
+    def save(i):
+        store.save_run(_state([_doc(f"doc {i} {j}", 0.1, "2024-01-01T23:30:00") for j in range(50)]))
+
+    threads = [threading.Thread(target=save, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.sentiment_by_hour("Bitcoin", hours=24, now=NOW)[0]["documents"] == 400
+    assert len(store.recent_summaries("Bitcoin", limit=100)) == 8
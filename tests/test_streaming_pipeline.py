@@ -0,0 +1,121 @@
+import json
+import threading
+
+import pytest
+
+import pipeline
+from streaming_pipeline import StreamingIngestor, merge_analyst_metrics
+from tools.synthetic_data import SyntheticDataGenerator
+
+
+class RecordingAnalyst:
+    """Scores every document 0.5 and records the largest number of documents held at once."""
+    def __init__(self):
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.chunks = 0
+        self._lock = threading.Lock()
+
+    def analyze(self, documents):
+        with self._lock:
+            self.in_flight += len(documents)
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            self.chunks += 1
+        processed = [dict(doc, sentiment_score=0.5, sentiment_label="Positive", topic="Test", entities=["BTC"],
+                          cluster_size=1) for doc in documents]
+        with self._lock:
+            self.in_flight -= len(documents)
+        return processed, {"documents": len(documents), "escalated": len(documents), "scored_locally": 0,
+                           "llm_calls": 1, "total_documents": len(documents), "unique_documents": len(documents)}
+
+
+def _corpus(total):
+    generator = SyntheticDataGenerator(seed=1, keywords=["Bitcoin", "Ethereum"], end="2024-01-01T00:00:00")
+    produced = {"documents": 0}
+
+    def source(keywords):
+        for chunk_index in range(0, total, 100):
+            chunk = generator.generate_chunk(chunk_index, min(100, total - chunk_index))
+            produced["documents"] += len(chunk)
+            yield chunk
+    return source, produced
+
+
+def test_streaming_ingest_aggregates_without_keeping_documents():
+    source, produced = _corpus(5000)
+    analyst = RecordingAnalyst()
+    ingestor = StreamingIngestor(source, analyst, queue_size=50, workers=3, chunk_size=20)
+
+    result = ingestor.run({"keywords": ["Bitcoin", "Ethereum"]})
+
+    assert produced["documents"] == 5000
+    assert sum(a["documents"] for a in result["stream_aggregates"].values()) == 5000
+    assert result["stream_aggregates"]["Bitcoin"]["sentiment_mean"] == pytest.approx(0.5)
+    assert "market_score" in result["stream_aggregates"]["Bitcoin"]
+    assert result["analyst_metrics"]["documents"] == 5000
+    assert result["analyst_metrics"]["llm_calls"] == analyst.chunks
+    # Only evidence samples are handed on, and no worker ever held more than its chunk.
+    assert len(result["processed_documents"]) == 6
+    assert analyst.peak_in_flight <= 3 * 20
+
+def test_streaming_ingest_reraises_worker_errors():
+    source, _ = _corpus(1000)
+
+    class FailingAnalyst:
+        def analyze(self, documents):
+            raise RuntimeError("analysis failed")
+
+    with pytest.raises(RuntimeError, match="analysis failed"):
+        StreamingIngestor(source, FailingAnalyst(), queue_size=10, workers=2, chunk_size=5).run({"keywords": ["Bitcoin"]})
+
+def test_merge_analyst_metrics():
+    total = merge_analyst_metrics(None, {"documents": 4, "escalated": 1, "llm_calls": 1})
+    total = merge_analyst_metrics(total, {"documents": 4, "escalated": 3, "llm_calls": 2})
+    assert (total["documents"], total["llm_calls"], total["escalation_rate"]) == (8, 3, 0.5)
+
+def test_streaming_pipeline_end_to_end(mocker):
+    """Tests that the scout's searches stream through the analyst into summaries and evaluations."""
+    timestamp = "2024-01-01T00:00:00"
+    for name, content in (("search_x_mock", "Great news! To the moon 🚀 bullish"),
+                          ("search_reddit_mock", "bullish rally"), ("search_news_mock", "great news")):
+        source = mocker.patch(f"agents.scout_agent.{name}")
+        source.invoke.side_effect = lambda args, content=content: [
+            {"source": "X", "content": content, "timestamp": timestamp, "keyword": args["keyword"]}]
+    analyze = mocker.patch("agents.intelligence_analyst_agent.analyze_text_deeply")
+    analyze.invoke.return_value = {"sentiment_score": 0.6, "sentiment_label": "Positive", "topic": "Test", "entities": []}
+    strategist_model = mocker.patch("agents.strategist_agent.model")
+    strategist_model.generate_content.return_value.text = json.dumps({
+        "cryptocurrency": "Bitcoin", "hypothesis": "A positive move is likely.", "confidence": "Medium",
+        "reasoning": "Positive.", "supporting_evidence": ["post"],
+    })
+    market_outcome = mocker.patch("agents.evaluator_agent.get_mock_market_outcome")
+
+    app = pipeline.build_streaming_workflow().compile()
+    final_state = app.invoke({"keywords": ["Bitcoin"]})
+
+    assert final_state["stream_aggregates"]["Bitcoin"]["documents"] == 3
+    assert final_state["stream_aggregates"]["Bitcoin"]["sentiment_mean"] == pytest.approx(0.6)
+    assert final_state["analyst_metrics"]["documents"] == 3
+    assert len(final_state["strategic_summaries"]) == 1
+    assert final_state["evaluation"]["simulated_outcome"].startswith("Positive price movement")
+    market_outcome.invoke.assert_not_called()  # the outcome comes from the streamed market score
+
+def test_streamed_chunks_are_stored_for_history(tmp_path):
+    from incremental import parse_timestamp
+    from storage import AnalysisStore
+    source, _ = _corpus(500)
+    store = AnalysisStore(str(tmp_path / "analysis.sqlite"), pool_size=2)
+    try:
+        ingestor = StreamingIngestor(source, RecordingAnalyst(), queue_size=50, workers=3, chunk_size=20, store=store)
+        result = ingestor.run({"keywords": ["Bitcoin", "Ethereum"]})
+        assert len(result["processed_documents"]) == 6
+        run_id = store.save_run({"keywords": ["Bitcoin", "Ethereum"], **result})
+        assert run_id == result["storage_run_id"]
+
+        end = parse_timestamp("2024-01-01T00:00:00", None) + 1
+        stored = {keyword: sum(row["documents"] for row in store.sentiment_by_hour(keyword, hours=8 * 24, now=end))
+                  for keyword in ("Bitcoin", "Ethereum")}
+        assert stored == {keyword: aggregate["documents"] for keyword, aggregate in result["stream_aggregates"].items()}
+        assert sum(stored.values()) == 500
+    finally:
+        store.close()
@@ -0,0 +1,83 @@
+import re
+from collections import Counter
+
+import pytest
+
+from config import get_mock_data_end
+from tools import synthetic_data
+from tools.market_data_tools import get_mock_crypto_price_data, get_mock_market_outcome, simulate_market_outcome
+from tools.synthetic_data import SyntheticDataGenerator, read_jsonl, write_jsonl
+from tools.web_search_tools import search_reddit_mock, search_x_mock
+
+END = "2024-01-01T00:00:00"
+
+
+def test_same_seed_gives_same_documents():
+    first = SyntheticDataGenerator(seed=3, end=END).generate(500)
+    second = SyntheticDataGenerator(seed=3, end=END).generate(500)
+    other = SyntheticDataGenerator(seed=4, end=END).generate(500)
+
+    assert first == second
+    assert first != other
+    assert set(first[0]) == {"source", "content", "timestamp", "keyword"}
+
+def test_mix_and_window_are_respected():
+    generator = SyntheticDataGenerator(seed=1, keywords=["Bitcoin", "Shiba Inu"], source_mix={"X": 1.0},
+                                       window_seconds=3600, end=END)
+    documents = generator.generate(2000)
+
+    assert {document["source"] for document in documents} == {"X"}
+    assert set(Counter(document["keyword"] for document in documents)) == {"Bitcoin", "Shiba Inu"}
+    assert all("2023-12-31T23:00:00" <= document["timestamp"] <= END for document in documents)
+    assert len({document["content"] for document in documents}) > 100
+    assert not any("{" in document["content"] for document in documents)
+
+def test_sentiment_mix_drives_content():
+    positive = SyntheticDataGenerator(seed=1, sentiment_mix={"positive": 1.0}, source_mix={"X": 1.0}, end=END)
+    patterns = [re.compile(re.sub(r"\\{\w+\\}", ".+", re.escape(template)) + "$")
+                for template in synthetic_data.TEMPLATES["X"]["positive"]]
+    texts = [document["content"] for document in positive.generate(200)]
+    assert all(any(pattern.match(text) for pattern in patterns) for text in texts)
+    with pytest.raises(ValueError):
+        SyntheticDataGenerator(sentiment_mix={"furious": 1.0})
+
+def test_bulk_generation_streams_across_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(synthetic_data, "CHUNK_SIZE", 100)
+    generator = SyntheticDataGenerator(seed=9, end=END)
+    path = str(tmp_path / "corpus.jsonl.gz")
+
+    assert write_jsonl(path, 250, generator) == 250
+    assert list(read_jsonl(path)) == generator.generate(250)
+
+def test_mock_tools_are_reproducible_with_a_seed(monkeypatch):
+    monkeypatch.delenv("MOCK_DATA_SEED", raising=False)
+    monkeypatch.delenv("MOCK_DATA_END", raising=False)
+    tweets = search_x_mock.invoke({"keyword": "Bitcoin", "count": 4, "seed": 5})
+    again = search_x_mock.invoke({"keyword": "Bitcoin", "count": 4, "seed": 5})
+    assert tweets == again
+    assert all(t["source"] == "X" and t["keyword"] == "Bitcoin" for t in tweets)
+    # Timestamps hang off a fixed anchor (midnight UTC by default), not the time of the call.
+    assert max(t["timestamp"] for t in tweets) <= get_mock_data_end()
+
+    monkeypatch.setenv("MOCK_DATA_SEED", "5")
+    monkeypatch.setenv("MOCK_DATA_END", "2024-03-01T00:00:00")
+    posts = search_reddit_mock.invoke({"keyword": "Ethereum", "subreddit": "ethfinance", "count": 3})
+    assert posts == search_reddit_mock.invoke({"keyword": "Ethereum", "subreddit": "ethfinance", "count": 3})
+    assert all("2024-02-23T00:00:00" <= p["timestamp"] <= "2024-03-01T00:00:00" for p in posts)
+    assert get_mock_crypto_price_data.invoke({"cryptocurrency_symbol": "BTC"}) == \
+        get_mock_crypto_price_data.invoke({"cryptocurrency_symbol": "BTC"})
+
+
+def test_seeded_market_outcomes_differ_per_asset_and_document_set():
+    def docs(keyword, *contents):
+        return [{"source": "X", "content": c, "timestamp": END, "keyword": keyword} for c in contents]
+
+    outcome = lambda documents: get_mock_market_outcome.invoke({"raw_documents": documents, "seed": 3})
+    bitcoin = docs("Bitcoin", "great news moon", "bullish 🚀")
+    assert outcome(bitcoin) == outcome(list(reversed(bitcoin)))
+    assert outcome(bitcoin).startswith("Positive")
+    assert len({outcome(bitcoin), outcome(docs("Ethereum", "great news moon", "bullish 🚀")),
+                outcome(docs("Bitcoin", "great news moon", "bullish 🚀", "moon"))}) == 3
+
+    assert simulate_market_outcome(5.0, 3, keyword="Bitcoin") == simulate_market_outcome(5.0, 3, keyword="Bitcoin")
+    assert simulate_market_outcome(5.0, 3, keyword="Bitcoin") != simulate_market_outcome(5.0, 3, keyword="Solana")
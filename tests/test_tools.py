@@ -46,6 +46,17 @@ def test_analyze_text_deeply_failure_fallback(mocker):
     assert result["sentiment_score"] == 0.0
     assert result["topic"] == "Unclassified"
 
+def test_analyze_text_deeply_fallback_matches_whole_words(mocker):
+    """Tests that the fallback does not read sentiment into words that merely contain a term."""
+    mock_model = mocker.patch('cryptosentinator.tools.nlp_tools.model')
+    mock_model.generate_content.side_effect = Exception("API Error")
+
+    neutral = nlp_tools.analyze_text_deeply.invoke({"text_content": "Banks are circling Ethereum again, rather"})
+    negative = nlp_tools.analyze_text_deeply.invoke({"text_content": "Exchange hacked, total scam"})
+
+    assert neutral["sentiment_label"] == "Neutral" and neutral["sentiment_score"] == 0.0
+    assert negative["sentiment_label"] == "Negative"
+
 @pytest.mark.parametrize("doc_dicts, expected_substring", [
     ([{"content": "great news moon rocket", "source": "X", "timestamp": "", "keyword": "BTC"}] * 3, "Positive price movement"),
     ([{"content": "scam drop sell", "source": "X", "timestamp": "", "keyword": "BTC"}] * 3, "Negative price movement"),
@@ -64,3 +75,58 @@ def test_get_mock_market_outcome(doc_dicts, expected_substring):
     
     # Assert
     assert expected_substring in outcome
+
+def test_analyze_texts_batch_matches_results_by_id(mocker):
+    """Tests that batched results are mapped back to their input positions by id."""
+    mock_model = mocker.patch('cryptosentinator.tools.nlp_tools.model')
+
+    class MockResponse:
+        def __init__(self, text):
+            self.text = text
+
+    # The reply lists the documents out of order; ids must still line them up.
+    mock_model.generate_content.return_value = MockResponse(
+        '```json\n['
+        '{"id": "doc-1", "sentiment_score": -0.5, "sentiment_label": "Negative", "entities": [], "topic": "Regulation"},'
+        '{"id": "doc-0", "sentiment_score": 0.7, "sentiment_label": "Positive", "entities": "BTC", "topic": "Price Speculation"}'
+        ']\n```'
+    )
+
+    results = nlp_tools.analyze_texts_batch.invoke({"texts": ["first", "second"]})
+
+    assert mock_model.generate_content.call_count == 1
+    assert results[0]["sentiment_score"] == 0.7
+    assert results[0]["entities"] == ["BTC"]
+    assert results[1]["topic"] == "Regulation"
+
+def test_analyze_texts_batch_retries_only_missing_ids(mocker):
+    """Tests that a partially malformed batch reply only re-sends the missing documents."""
+    mock_model = mocker.patch('cryptosentinator.tools.nlp_tools.model')
+
+    class MockResponse:
+        def __init__(self, text):
+            self.text = text
+
+    mock_model.generate_content.side_effect = [
+        MockResponse('[{"id": "doc-0", "sentiment_score": 0.4, "sentiment_label": "Positive", "entities": [], "topic": "Tech"},'
+                     '{"id": "doc-1", "sentiment_label": "Negative"}]'),
+        MockResponse('[{"id": "doc-1", "sentiment_score": -0.4, "sentiment_label": "Negative", "entities": [], "topic": "Tech"}]'),
+    ]
+
+    results = nlp_tools.analyze_texts_batch.invoke({"texts": ["kept", "retried"], "max_retries": 2})
+
+    assert mock_model.generate_content.call_count == 2
+    retry_prompt = mock_model.generate_content.call_args_list[1].args[0]
+    assert "retried" in retry_prompt and "kept" not in retry_prompt
+    assert [r["sentiment_score"] for r in results] == [0.4, -0.4]
+
+def test_analyze_texts_batch_falls_back_to_neutral(mocker):
+    """Tests that ids still missing after all retries get the neutral fallback."""
+    mock_model = mocker.patch('cryptosentinator.tools.nlp_tools.model')
+    mock_model.generate_content.side_effect = Exception("API Error")
+
+    results = nlp_tools.analyze_texts_batch.invoke({"texts": ["a", "b", "c"], "max_retries": 1})
+
+    assert mock_model.generate_content.call_count == 2
+    assert len(results) == 3
+    assert all(r["topic"] == "Unclassified" for r in results)
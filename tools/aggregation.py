@@ -0,0 +1,328 @@
+import datetime
+import math
+import time
+import warnings
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from graph_state import ProcessedDocument
+
+
+class DocumentColumns:
+    """
+    Struct-of-arrays view of a list of processed documents. Strings (keyword,
+    source, topic, entity) are dictionary-encoded into integer ids so every
+    aggregate below is a handful of NumPy reductions instead of Python loops.
+    """
+    def __init__(self, scores, weights, timestamps, keyword_ids, keywords, source_ids, sources,
+                 topic_ids, topics, entity_ids, entity_doc_index, entities):
+        self.scores = scores                      # float64, NaN where the score is missing
+        self.weights = weights                    # float64 per-document weight
+        self.timestamps = timestamps              # float64 epoch seconds, NaN where unparsable
+        self.keyword_ids = keyword_ids            # int32 index into `keywords`
+        self.keywords = keywords
+        self.source_ids = source_ids              # int32 index into `sources`
+        self.sources = sources
+        self.topic_ids = topic_ids                # int32 index into `topics`, -1 when missing
+        self.topics = topics
+        self.entity_ids = entity_ids              # int32, one entry per (document, entity) pair
+        self.entity_doc_index = entity_doc_index  # int32 document row of each entity entry
+        self.entities = entities
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+
+def _encode(values: Sequence[Optional[str]], vocabulary: Dict[str, int]) -> np.ndarray:
+    ids = np.empty(len(values), dtype=np.int32)
+    for i, value in enumerate(values):
+        if value is None or value == "":
+            ids[i] = -1
+        else:
+            ids[i] = vocabulary.setdefault(value, len(vocabulary))
+    return ids
+
+
+def _parse_timestamps(values: Sequence[str]) -> np.ndarray:
+    """Parses ISO-8601 strings into epoch seconds; blanks and unparsable values become NaN."""
+    try:
+        with warnings.catch_warnings():
+            # NumPy converts UTC offsets itself but warns that it does so.
+            warnings.simplefilter("ignore", UserWarning)
+            parsed = np.array([value or "NaT" for value in values], dtype="datetime64[us]")
+        seconds = parsed.astype("int64").astype(np.float64) / 1e6
+        seconds[np.isnat(parsed)] = np.nan
+        return seconds
+    except ValueError:
+        # Anything NumPy cannot parse falls back to the slower per-value parser.
+        seconds = np.full(len(values), np.nan)
+        for i, value in enumerate(values):
+            try:
+                parsed_value = datetime.datetime.fromisoformat(value)
+                if parsed_value.tzinfo is not None:
+                    parsed_value = parsed_value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+                seconds[i] = (parsed_value - datetime.datetime(1970, 1, 1)).total_seconds()
+            except (TypeError, ValueError):
+                pass
+        return seconds
+
+
+def to_columns(processed_documents: List[ProcessedDocument], weights: Optional[Sequence[float]] = None) -> DocumentColumns:
+    """Converts processed documents (or a compact DocumentBatch) into a DocumentColumns batch."""
+    if hasattr(processed_documents, "to_columns"):
+        return processed_documents.to_columns(weights)
+    count = len(processed_documents)
+    scores = np.array(
+        [doc.get("sentiment_score") for doc in processed_documents], dtype=np.float64
+    ) if count else np.empty(0)
+    keyword_vocab: Dict[str, int] = {}
+    source_vocab: Dict[str, int] = {}
+    topic_vocab: Dict[str, int] = {}
+    entity_vocab: Dict[str, int] = {}
+
+    entity_names: List[str] = []
+    entity_rows: List[int] = []
+    for row, doc in enumerate(processed_documents):
+        for entity in doc.get("entities") or ():
+            entity_names.append(entity)
+            entity_rows.append(row)
+
+    return DocumentColumns(
+        scores=scores,
+        weights=np.ones(count) if weights is None else np.asarray(weights, dtype=np.float64),
+        timestamps=_parse_timestamps([doc.get("timestamp") or "" for doc in processed_documents]),
+        keyword_ids=_encode([doc.get("keyword") for doc in processed_documents], keyword_vocab),
+        keywords=list(keyword_vocab),
+        source_ids=_encode([doc.get("source") for doc in processed_documents], source_vocab),
+        sources=list(source_vocab),
+        topic_ids=_encode([doc.get("topic") for doc in processed_documents], topic_vocab),
+        topics=list(topic_vocab),
+        entity_ids=_encode(entity_names, entity_vocab),
+        entity_doc_index=np.array(entity_rows, dtype=np.int32),
+        entities=list(entity_vocab),
+    )
+
+
+def group_mean_var(values: np.ndarray, group_ids: np.ndarray, n_groups: int,
+                   weights: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Weighted mean, variance and count of `values` per group, ignoring NaNs.
+    Groups without any valid value get a NaN mean and variance.
+    """
+    valid = ~np.isnan(values) & (group_ids >= 0)
+    w = np.ones(len(values)) if weights is None else weights
+    w = np.where(valid, w, 0.0)
+    v = np.where(valid, values, 0.0)
+    ids = np.where(valid, group_ids, 0)
+
+    total_weight = np.bincount(ids, weights=w, minlength=n_groups)
+    weighted_sum = np.bincount(ids, weights=w * v, minlength=n_groups)
+    weighted_sq = np.bincount(ids, weights=w * v * v, minlength=n_groups)
+    count = np.bincount(ids, weights=valid.astype(np.float64), minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = weighted_sum / total_weight
+        variance = np.maximum(weighted_sq / total_weight - mean * mean, 0.0)
+    return {"mean": mean, "variance": variance, "count": count.astype(np.int64)}
+
+
+def _stats_by(group_ids: np.ndarray, labels: List[str], columns: DocumentColumns) -> Dict[str, Dict[str, float]]:
+    stats = group_mean_var(columns.scores, group_ids, len(labels), columns.weights)
+    return {
+        label: {
+            "mean": float(stats["mean"][i]),
+            "variance": float(stats["variance"][i]),
+            "count": int(stats["count"][i]),
+        }
+        for i, label in enumerate(labels)
+    }
+
+
+def sentiment_by_keyword(columns: DocumentColumns) -> Dict[str, Dict[str, float]]:
+    """Mean, variance and count of sentiment scores per keyword."""
+    return _stats_by(columns.keyword_ids, columns.keywords, columns)
+
+
+def sentiment_by_source(columns: DocumentColumns) -> Dict[str, Dict[str, float]]:
+    """Mean, variance and count of sentiment scores per source."""
+    return _stats_by(columns.source_ids, columns.sources, columns)
+
+
+def sentiment_by_keyword_and_source(columns: DocumentColumns) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Sentiment statistics per (keyword, source) pair, nested by keyword."""
+    n_sources = max(len(columns.sources), 1)
+    pair_ids = np.where((columns.keyword_ids >= 0) & (columns.source_ids >= 0),
+                        columns.keyword_ids * n_sources + columns.source_ids, -1)
+    stats = group_mean_var(columns.scores, pair_ids, len(columns.keywords) * n_sources, columns.weights)
+    result: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for k, keyword in enumerate(columns.keywords):
+        for s, source in enumerate(columns.sources):
+            i = k * n_sources + s
+            if stats["count"][i]:
+                result.setdefault(keyword, {})[source] = {
+                    "mean": float(stats["mean"][i]),
+                    "variance": float(stats["variance"][i]),
+                    "count": int(stats["count"][i]),
+                }
+    return result
+
+
+def time_decayed_sentiment(columns: DocumentColumns, half_life_hours: float = 24.0,
+                           now: Optional[float] = None) -> Dict[str, float]:
+    """
+    Per-keyword sentiment where each document's weight halves every
+    `half_life_hours` of age. Documents without a timestamp count as current.
+    """
+    now = time.time() if now is None else now
+    age_hours = np.nan_to_num((now - columns.timestamps) / 3600.0, nan=0.0)
+    decay = np.exp(-math.log(2) * np.maximum(age_hours, 0.0) / half_life_hours)
+    stats = group_mean_var(columns.scores, columns.keyword_ids, len(columns.keywords), columns.weights * decay)
+    return {keyword: float(stats["mean"][i]) for i, keyword in enumerate(columns.keywords)}
+
+
+def topic_histogram(columns: DocumentColumns) -> Dict[str, Dict[str, float]]:
+    """Weighted topic counts per keyword, most frequent first."""
+    n_topics = len(columns.topics)
+    if not n_topics or not len(columns):
+        return {keyword: {} for keyword in columns.keywords}
+    valid = (columns.topic_ids >= 0) & (columns.keyword_ids >= 0)
+    cells = columns.keyword_ids[valid].astype(np.int64) * n_topics + columns.topic_ids[valid]
+    counts = np.bincount(cells, weights=columns.weights[valid],
+                         minlength=len(columns.keywords) * n_topics).reshape(-1, n_topics)
+    histogram = {}
+    for k, keyword in enumerate(columns.keywords):
+        order = np.argsort(-counts[k], kind="stable")
+        histogram[keyword] = {columns.topics[t]: float(counts[k, t]) for t in order if counts[k, t] > 0}
+    return histogram
+
+
+def entity_counts(columns: DocumentColumns, keyword: Optional[str] = None, top_n: int = 10) -> Dict[str, float]:
+    """Weighted mention counts of the `top_n` most frequent entities, optionally for one keyword."""
+    if not len(columns.entity_ids):
+        return {}
+    weights = columns.weights[columns.entity_doc_index]
+    if keyword is not None:
+        if keyword not in columns.keywords:
+            return {}
+        mask = columns.keyword_ids[columns.entity_doc_index] == columns.keywords.index(keyword)
+        weights = np.where(mask, weights, 0.0)
+    counts = np.bincount(columns.entity_ids, weights=weights, minlength=len(columns.entities))
+    top = np.argsort(-counts, kind="stable")[:top_n]
+    return {columns.entities[i]: float(counts[i]) for i in top if counts[i] > 0}
+
+
+def aggregate_documents(processed_documents: List[ProcessedDocument], weights: Optional[Sequence[float]] = None,
+                        half_life_hours: float = 24.0, now: Optional[float] = None) -> Dict[str, Dict]:
+    """
+    Computes every per-keyword aggregate the strategist and the report consume:
+    sentiment mean/variance/count, time-decayed sentiment, per-source stats,
+    topic histogram and top entities.
+    """
+    columns = to_columns(processed_documents, weights)
+    by_keyword = sentiment_by_keyword(columns)
+    by_source = sentiment_by_keyword_and_source(columns)
+    decayed = time_decayed_sentiment(columns, half_life_hours, now)
+    topics = topic_histogram(columns)
+    return {
+        keyword: {
+            "sentiment_mean": by_keyword[keyword]["mean"],
+            "sentiment_variance": by_keyword[keyword]["variance"],
+            "scored_documents": by_keyword[keyword]["count"],
+            "documents": int(np.count_nonzero(columns.keyword_ids == k)),
+            "decayed_sentiment": decayed[keyword],
+            "by_source": by_source.get(keyword, {}),
+            "topics": topics.get(keyword, {}),
+            "entities": entity_counts(columns, keyword),
+        }
+        for k, keyword in enumerate(columns.keywords)
+    }
+
+
+class RunningAggregates:
+    """
+    Per-keyword aggregates maintained batch by batch, so documents can be
+    dropped once folded in. `result()` has the same shape as
+    aggregate_documents over every document seen (with unit weights);
+    memory grows with the number of keywords, sources, topics and entities,
+    not with the number of documents.
+    """
+    def __init__(self, half_life_hours: float = 24.0, reference_time: Optional[float] = None):
+        self.half_life_hours = half_life_hours
+        # Decay weights are kept relative to a fixed reference; the reference cancels out in the decayed mean.
+        self.reference_time = time.time() if reference_time is None else reference_time
+        self._keywords: Dict[str, Dict] = {}
+
+    def _keyword_state(self, keyword: str) -> Dict:
+        return self._keywords.setdefault(keyword, {
+            "documents": 0, "stats": np.zeros(3), "decayed": np.zeros(2),
+            "by_source": {}, "topics": {}, "entities": {},
+        })
+
+    def update(self, processed_documents: List[ProcessedDocument]) -> None:
+        """Folds a batch of processed documents into the aggregates."""
+        if not processed_documents:
+            return
+        columns = to_columns(processed_documents)
+        n_keywords, n_sources = len(columns.keywords), max(len(columns.sources), 1)
+        valid = ~np.isnan(columns.scores) & (columns.keyword_ids >= 0)
+        ids = np.where(valid, columns.keyword_ids, 0)
+        scores = np.where(valid, columns.scores, 0.0)
+        ones = valid.astype(np.float64)
+
+        age_hours = np.nan_to_num((self.reference_time - columns.timestamps) / 3600.0, nan=0.0)
+        decay = np.where(valid, np.exp(-math.log(2) * np.maximum(age_hours, 0.0) / self.half_life_hours), 0.0)
+        documents = np.bincount(columns.keyword_ids[columns.keyword_ids >= 0], minlength=n_keywords)
+        sums = np.stack([np.bincount(ids, weights=w, minlength=n_keywords)
+                         for w in (ones, scores, scores * scores)], axis=1)
+        decayed = np.stack([np.bincount(ids, weights=w, minlength=n_keywords)
+                            for w in (decay, decay * scores)], axis=1)
+        pair_valid = valid & (columns.source_ids >= 0)
+        pair_ids = np.where(pair_valid, ids * n_sources + columns.source_ids, 0)
+        pair_sums = np.stack([np.bincount(pair_ids, weights=np.where(pair_valid, w, 0.0), minlength=n_keywords * n_sources)
+                              for w in (ones, scores, scores * scores)], axis=1)
+
+        for k, keyword in enumerate(columns.keywords):
+            state = self._keyword_state(keyword)
+            state["documents"] += int(documents[k])
+            state["stats"] += sums[k]
+            state["decayed"] += decayed[k]
+            for s, source in enumerate(columns.sources):
+                if pair_sums[k * n_sources + s, 0]:
+                    state["by_source"][source] = state["by_source"].get(source, np.zeros(3)) + pair_sums[k * n_sources + s]
+        for row in np.flatnonzero((columns.keyword_ids >= 0) & (columns.topic_ids >= 0)):
+            topics = self._keywords[columns.keywords[columns.keyword_ids[row]]]["topics"]
+            topic = columns.topics[columns.topic_ids[row]]
+            topics[topic] = topics.get(topic, 0.0) + 1.0
+        for entity_id, row in zip(columns.entity_ids.tolist(), columns.entity_doc_index.tolist()):
+            if columns.keyword_ids[row] >= 0:
+                entities = self._keywords[columns.keywords[columns.keyword_ids[row]]]["entities"]
+                entity = columns.entities[entity_id]
+                entities[entity] = entities.get(entity, 0.0) + 1.0
+
+    @staticmethod
+    def _mean_var(sums: np.ndarray) -> Dict[str, float]:
+        count, total, total_sq = sums
+        if not count:
+            return {"mean": math.nan, "variance": math.nan, "count": 0}
+        mean = total / count
+        return {"mean": float(mean), "variance": float(max(total_sq / count - mean * mean, 0.0)), "count": int(count)}
+
+    def result(self) -> Dict[str, Dict]:
+        """Current aggregates per keyword, in the aggregate_documents format."""
+        aggregates = {}
+        for keyword, state in self._keywords.items():
+            stats = self._mean_var(state["stats"])
+            decay_weight, decayed_sum = state["decayed"]
+            topics = sorted(state["topics"].items(), key=lambda item: -item[1])
+            entities = sorted(state["entities"].items(), key=lambda item: -item[1])[:10]
+            aggregates[keyword] = {
+                "sentiment_mean": stats["mean"],
+                "sentiment_variance": stats["variance"],
+                "scored_documents": stats["count"],
+                "documents": state["documents"],
+                "decayed_sentiment": float(decayed_sum / decay_weight) if decay_weight else math.nan,
+                "by_source": {source: self._mean_var(sums) for source, sums in state["by_source"].items()},
+                "topics": dict(topics),
+                "entities": dict(entities),
+            }
+        return aggregates
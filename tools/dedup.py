@@ -0,0 +1,150 @@
+import hashlib
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from graph_state import RawDocument
+from tools.nlp_cache import normalize_content
+
+FINGERPRINT_BITS = 64
+_TOKEN = re.compile(r"[#$@]?\w+|[^\w\s]")
+_BIT_SHIFTS = np.arange(FINGERPRINT_BITS, dtype=np.uint64)
+_CHUNK_SIZE = 8192
+
+
+def _features(text: str) -> List[str]:
+    """Word unigrams and bigrams of the normalized text."""
+    tokens = _TOKEN.findall(normalize_content(text))
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def simhash_fingerprints(texts: Sequence[str]) -> np.ndarray:
+    """
+    64-bit SimHash fingerprints for `texts`, as a uint64 array. The bit votes
+    are computed for a whole chunk of documents at once with NumPy.
+    """
+    fingerprints = np.zeros(len(texts), dtype=np.uint64)
+    for start in range(0, len(texts), _CHUNK_SIZE):
+        chunk = texts[start:start + _CHUNK_SIZE]
+        hashes: List[int] = []
+        counts = np.zeros(len(chunk), dtype=np.int64)
+        for i, text in enumerate(chunk):
+            features = _features(text)
+            counts[i] = len(features)
+            hashes.extend(_feature_hash(feature) for feature in features)
+        if not hashes:
+            continue
+        bits = ((np.array(hashes, dtype=np.uint64)[:, None] >> _BIT_SHIFTS) & np.uint64(1)).astype(np.int32)
+        votes = bits * 2 - 1
+        # reduceat needs non-empty segments; empty documents keep fingerprint 0.
+        non_empty = counts > 0
+        offsets = np.concatenate(([0], np.cumsum(counts[non_empty])[:-1]))
+        sums = np.add.reduceat(votes, offsets, axis=0)
+        packed = ((sums > 0).astype(np.uint64) << _BIT_SHIFTS).sum(axis=1, dtype=np.uint64)
+        fingerprints[start:start + len(chunk)][non_empty] = packed
+    return fingerprints
+
+
+def _hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class _UnionFind:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, x: int) -> int:
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> None:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            # The lower index stays the root so the earliest document represents the cluster.
+            if root_b < root_a:
+                root_a, root_b = root_b, root_a
+            self.parent[root_b] = root_a
+
+
+def cluster_near_duplicates(texts: Sequence[str], max_distance: int = 3,
+                            groups: Optional[Sequence[str]] = None) -> List[int]:
+    """
+    Clusters texts whose SimHash fingerprints differ in at most `max_distance`
+    bits. Returns, for every text, the index of its cluster representative
+    (the first text of the cluster). Texts in different `groups` (for example
+    different keywords) are never merged.
+
+    Candidates come from LSH banding: the fingerprint is split into
+    max_distance + 1 bands, and two fingerprints within the distance must agree
+    on at least one band, so only texts sharing a band bucket are compared.
+    """
+    fingerprints = [int(fp) for fp in simhash_fingerprints(texts)]
+    group_keys = list(groups) if groups is not None else [""] * len(texts)
+    union_find = _UnionFind(len(texts))
+
+    # Identical fingerprints merge directly; only distinct ones need comparing.
+    first_with_fingerprint: Dict[Tuple[str, int], int] = {}
+    distinct: List[int] = []
+    for index, fingerprint in enumerate(fingerprints):
+        key = (group_keys[index], fingerprint)
+        if key in first_with_fingerprint:
+            union_find.union(first_with_fingerprint[key], index)
+        else:
+            first_with_fingerprint[key] = index
+            distinct.append(index)
+
+    if max_distance > 0:
+        bands = max_distance + 1
+        band_bits = FINGERPRINT_BITS // bands
+        mask = (1 << band_bits) - 1
+        for band in range(bands):
+            shift = band * band_bits
+            buckets: Dict[Tuple[str, int], List[int]] = {}
+            for index in distinct:
+                buckets.setdefault((group_keys[index], (fingerprints[index] >> shift) & mask), []).append(index)
+            for members in buckets.values():
+                for i, a in enumerate(members):
+                    for b in members[i + 1:]:
+                        if _hamming(fingerprints[a], fingerprints[b]) <= max_distance:
+                            union_find.union(a, b)
+
+    return [union_find.find(index) for index in range(len(texts))]
+
+
+class DedupPlan:
+    """Which documents to analyze, and how to fan their results back out."""
+    def __init__(self, representatives: List[int], assignments: List[int], cluster_sizes: List[int]):
+        self.representatives = representatives  # document indices that get analyzed
+        self.assignments = assignments          # per document: position in `representatives`
+        self.cluster_sizes = cluster_sizes      # per representative: number of documents it stands for
+
+    def fan_out(self, representative_results: Sequence) -> list:
+        """Expands one result per representative into one result per document."""
+        return [representative_results[position] for position in self.assignments]
+
+
+def plan_deduplication(documents: Sequence[RawDocument], max_distance: int = 3) -> DedupPlan:
+    """Groups near-duplicate documents of the same keyword into clusters."""
+    roots = cluster_near_duplicates(
+        [doc["content"] for doc in documents], max_distance, [doc.get("keyword", "") for doc in documents]
+    )
+    position_of_root: Dict[int, int] = {}
+    representatives: List[int] = []
+    cluster_sizes: List[int] = []
+    assignments: List[int] = []
+    for root in roots:
+        if root not in position_of_root:
+            position_of_root[root] = len(representatives)
+            representatives.append(root)
+            cluster_sizes.append(0)
+        position = position_of_root[root]
+        cluster_sizes[position] += 1
+        assignments.append(position)
+    return DedupPlan(representatives, assignments, cluster_sizes)
@@ -0,0 +1,203 @@
+import json
+import math
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from typing_extensions import TypedDict
+
+from config import get_market_lexicon_path, get_sentiment_lexicon_path
+
+# Indicators used by the simulated market outcome ("ground truth").
+DEFAULT_MARKET_LEXICON: Dict[str, float] = {
+    'great news': 1.0, 'moon': 1.0, 'bullish': 1.0, 'future': 1.0, '🚀': 1.0,
+    'worried': -1.0, 'scam': -1.0, 'drop': -1.0, 'sell': -1.0, 'bearish': -1.0,
+}
+
+# Broader weighted vocabulary for cheap local sentiment scoring and fallbacks.
+DEFAULT_SENTIMENT_LEXICON: Dict[str, float] = {
+    # Positive
+    'great news': 1.5, 'to the moon': 2.0, 'moon': 1.0, '🚀': 1.0, 'bullish': 1.5, 'rally': 1.2,
+    'breakout': 1.2, 'all-time high': 1.5, 'ath': 1.0, 'surge': 1.2, 'soar': 1.2, 'pump': 0.8,
+    'buy': 0.6, 'adoption': 0.8, 'partnership': 0.8, 'upgrade': 0.6, 'approved': 1.0,
+    'approval': 0.8, 'gain': 0.8, 'gains': 0.8, 'profit': 0.8, 'strong': 0.6, 'optimistic': 1.0,
+    'hodl': 0.6, 'is the future': 1.0, 'future': 0.4, 'surging': 1.2, 'soaring': 1.2, 'pumping': 0.8,
+    # Negative
+    'bearish': -1.5, 'crash': -2.0, 'dump': -1.2, 'scam': -2.0, 'rug pull': -2.0, 'hack': -1.8,
+    'exploit': -1.5, 'drop': -1.0, 'plunge': -1.5, 'sell': -0.8, 'worried': -1.0, 'fear': -1.0,
+    'panic': -1.5, 'ban': -1.2, 'banned': -1.2, 'lawsuit': -1.2, 'fraud': -2.0, 'loss': -0.8,
+    'losses': -0.8, 'weak': -0.6, 'liquidated': -1.5, 'rekt': -1.5, 'fud': -0.8, 'crashing': -2.0,
+    'dumping': -1.2, 'hacked': -1.8, 'dropping': -1.0,
+}
+
+
+# Word boundaries inside a CamelCase hashtag: "#BitcoinIsTheFuture" -> "#Bitcoin Is The Future".
+_HASHTAG = re.compile(r"[#$]\w+")
+_CAMEL_CASE_BOUNDARY = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+
+def _split_hashtags(text: str) -> str:
+    return _HASHTAG.sub(lambda match: _CAMEL_CASE_BOUNDARY.sub(" ", match.group(0)), text)
+
+
+def _term_pattern(term: str, word_boundaries: bool) -> str:
+    # Only edges made of word characters get a boundary, so "🚀" and "#pump" still
+    # match right next to other text.
+    pattern = re.escape(term)
+    if word_boundaries and re.match(r"\w", term):
+        pattern = r"(?<!\w)" + pattern
+    if word_boundaries and re.search(r"\w$", term):
+        pattern += r"(?!\w)"
+    return pattern
+
+
+class LexiconScores(TypedDict):
+    document_scores: List[float]
+    total: float
+    matched_documents: int
+
+
+def prefix_free_groups(terms: Iterable[str]) -> List[List[str]]:
+    """
+    Splits terms into groups in which no term is a prefix of another, by the
+    length of each term's chain of prefixes that are terms themselves. Within
+    such a group at most one term can match at any position.
+    """
+    depth: Dict[str, int] = {}
+    for term in sorted(set(terms), key=len):
+        depth[term] = max((depth[term[:i]] + 1 for i in range(1, len(term)) if term[:i] in depth), default=0)
+    groups: List[List[str]] = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+    for term, level in depth.items():
+        groups[level].append(term)
+    return groups
+
+
+class LexiconScorer:
+    """
+    Compiles a weighted lexicon once into combined regular expressions, one
+    per prefix-free group of terms (usually a single one), so every document
+    is scanned in one pass per group however many terms there are.
+
+    Matching is case-insensitive substring matching, like the original `in`
+    checks. With `word_boundaries=True` terms only match as whole words, so
+    "ban" is not found in "Banks", and CamelCase hashtags are read as
+    separate words. By default each term counts once per document; pass
+    `count_repeats=True` to count every occurrence instead.
+    """
+    def __init__(self, lexicon: Dict[str, float], count_repeats: bool = False, word_boundaries: bool = False):
+        if not lexicon:
+            raise ValueError("A lexicon needs at least one term.")
+        self.lexicon = {term.lower(): float(weight) for term, weight in lexicon.items()}
+        self.count_repeats = count_repeats
+        self.word_boundaries = word_boundaries
+        # A lookahead finds at most one term per position, so "great" would be lost
+        # wherever "great news" matched; terms that are prefixes of others get their
+        # own pattern. The lookahead lets matches that start inside another match
+        # still be found.
+        self._patterns = [
+            re.compile("(?=(" + "|".join(_term_pattern(term, word_boundaries) for term in group) + "))")
+            for group in prefix_free_groups(self.lexicon)
+        ]
+
+    def _prepare(self, text: str) -> str:
+        return (_split_hashtags(text) if self.word_boundaries else text).lower()
+
+    def matches(self, text: str) -> Dict[str, int]:
+        """Occurrences of each lexicon term found in `text`."""
+        text = self._prepare(text)
+        found: Dict[str, int] = {}
+        for pattern in self._patterns:
+            for match in pattern.finditer(text):
+                term = match.group(1)
+                found[term] = found.get(term, 0) + 1
+        return found
+
+    def score(self, text: str) -> float:
+        """Sum of the weights of the terms found in `text`."""
+        found = self.matches(text)
+        if self.count_repeats:
+            return sum(self.lexicon[term] * count for term, count in found.items())
+        return sum(self.lexicon[term] for term in found)
+
+    def score_documents(self, texts: Iterable[str]) -> LexiconScores:
+        """Scores many documents; returns the per-document scores and their aggregate."""
+        document_scores = [self.score(text) for text in texts]
+        return LexiconScores(
+            document_scores=document_scores,
+            total=sum(document_scores),
+            matched_documents=sum(1 for score in document_scores if score),
+        )
+
+    def prefilter(self, texts: Iterable[str]) -> List[int]:
+        """Indices of the texts that contain at least one lexicon term."""
+        return [i for i, text in enumerate(texts)
+                if any(pattern.search(self._prepare(text)) for pattern in self._patterns)]
+
+    def sentiment(self, text: str) -> Tuple[float, float]:
+        """
+        Local sentiment estimate for `text`: a polarity in [-1, 1] and a
+        confidence in [0, 1]. Confidence grows with the amount of lexicon
+        evidence and shrinks when positive and negative terms disagree.
+        """
+        found = self.matches(text)
+        if not found:
+            return 0.0, 0.0
+        weights = [self.lexicon[term] * (count if self.count_repeats else 1) for term, count in found.items()]
+        total = sum(weights)
+        magnitude = sum(abs(weight) for weight in weights)
+        agreement = abs(total) / magnitude
+        evidence = 1.0 - math.exp(-magnitude)
+        return math.tanh(total / 2.0), agreement * evidence
+
+
+def load_lexicon(path: str) -> Dict[str, float]:
+    """Loads a {"term": weight} JSON lexicon."""
+    with open(path, encoding="utf-8") as handle:
+        lexicon = json.load(handle)
+    if not isinstance(lexicon, dict):
+        raise ValueError(f"Lexicon file {path} must contain a JSON object of term weights.")
+    return {str(term): float(weight) for term, weight in lexicon.items()}
+
+
+_scorers: Dict[str, LexiconScorer] = {}
+_scorers_lock = threading.Lock()
+
+
+def _get_scorer(name: str, path: Optional[str], default: Dict[str, float],
+                word_boundaries: bool = False) -> LexiconScorer:
+    with _scorers_lock:
+        if name not in _scorers:
+            _scorers[name] = LexiconScorer(load_lexicon(path) if path else default, word_boundaries=word_boundaries)
+        return _scorers[name]
+
+
+def get_market_scorer() -> LexiconScorer:
+    """Scorer for the simulated market outcome; MARKET_LEXICON_PATH overrides the lexicon."""
+    return _get_scorer("market", get_market_lexicon_path(), DEFAULT_MARKET_LEXICON)
+
+
+def get_sentiment_scorer() -> LexiconScorer:
+    """
+    Scorer for local sentiment; SENTIMENT_LEXICON_PATH overrides the lexicon.
+    Its verdicts let documents skip Gemini, so terms only match as whole words.
+    """
+    return _get_scorer("sentiment", get_sentiment_lexicon_path(), DEFAULT_SENTIMENT_LEXICON, word_boundaries=True)
+
+
+def sentiment_label(score: float) -> str:
+    """Maps a polarity in [-1, 1] to the labels used by analyze_text_deeply."""
+    if score > 0.15:
+        return "Positive"
+    if score < -0.15:
+        return "Negative"
+    return "Neutral"
+
+
+def lexicon_sentiment_result(text: str) -> Dict:
+    """An analyze_text_deeply-shaped result computed locally from the sentiment lexicon."""
+    score, _ = get_sentiment_scorer().sentiment(text)
+    return {
+        "sentiment_score": round(score, 3),
+        "sentiment_label": sentiment_label(score),
+        "entities": [],
+        "topic": "Unclassified",
+    }
@@ -0,0 +1,95 @@
+import re
+from typing import Dict, Iterable, Optional
+from typing_extensions import TypedDict
+
+from tools.lexicon_scorer import LexiconScorer, get_sentiment_scorer, sentiment_label
+
+# Documents mentioning any of these always go to Gemini: they can move the
+# market, so a cheap guess is not good enough.
+HIGH_IMPACT_TERMS = [
+    "sec", "etf", "regulation", "regulator", "lawsuit", "ban", "banned", "hack", "hacked",
+    "exploit", "halving", "fork", "delisting", "delisted", "bankruptcy", "insolvent",
+]
+HIGH_IMPACT_SOURCES = {"NewsOutlet"}
+
+# Phrases that mark a post as plainly neutral chatter.
+NEUTRAL_CUES = [
+    "just observing", "just watching", "market movements", "no opinion", "trading sideways",
+    "what are your thoughts", "gm", "wen",
+]
+
+# First matching topic wins; the order breaks ties between overlapping cues.
+TOPIC_CUES = {
+    "Regulation": ["sec", "regulat", "lawsuit", "ban", "compliance", "etf"],
+    "Technology Update": ["upgrade", "mainnet", "testnet", "fork", "protocol", "layer 2", "release"],
+    "Partnership News": ["partnership", "partners with", "collaborat", "integration"],
+    "Price Speculation": ["price", "moon", "pump", "dump", "ath", "target", "🚀", "drop"],
+    "Community Discussion": ["discussion", "thoughts", "r/", "community", "what do you think"],
+}
+DEFAULT_TOPIC = "General Market Trend"
+
+_HASHTAG = re.compile(r"[#$]([A-Za-z][A-Za-z0-9_]{1,30})")
+
+
+def _word_pattern(terms: Iterable[str]) -> re.Pattern:
+    return re.compile(r"\b(?:" + "|".join(re.escape(term) for term in terms) + r")\b", re.IGNORECASE)
+
+
+class LocalAnalysis(TypedDict):
+    sentiment_score: float
+    sentiment_label: str
+    entities: list
+    topic: str
+    confidence: float
+    high_impact: bool
+
+
+class LocalSentimentScorer:
+    """
+    CPU-only first tier of the analyst. Produces an analyze_text_deeply-shaped
+    result plus a confidence, and decides whether a document is obvious enough
+    to skip Gemini or must be escalated.
+    """
+    def __init__(self, escalation_threshold: float = 0.6, sentiment_scorer: Optional[LexiconScorer] = None):
+        self.escalation_threshold = escalation_threshold
+        self.sentiment_scorer = sentiment_scorer or get_sentiment_scorer()
+        self._high_impact = _word_pattern(HIGH_IMPACT_TERMS)
+        self._neutral = _word_pattern(NEUTRAL_CUES)
+        # Cues may be word prefixes ("regulat"), so only the start is anchored.
+        self._topics = [(topic, re.compile(r"(?<!\w)(?:" + "|".join(re.escape(cue) for cue in cues) + ")", re.IGNORECASE))
+                        for topic, cues in TOPIC_CUES.items()]
+
+    def classify_topic(self, text: str) -> str:
+        for topic, pattern in self._topics:
+            if pattern.search(text):
+                return topic
+        return DEFAULT_TOPIC
+
+    def analyze(self, text: str, source: Optional[str] = None) -> LocalAnalysis:
+        score, confidence = self.sentiment_scorer.sentiment(text)
+        if confidence == 0.0 and self._neutral.search(text) and not self.sentiment_scorer.matches(text):
+            # No polar vocabulary at all (rather than cancelling terms), and an explicit neutral cue.
+            confidence = 0.8
+        entities = list(dict.fromkeys(_HASHTAG.findall(text)))
+        return LocalAnalysis(
+            sentiment_score=round(score, 3),
+            sentiment_label=sentiment_label(score),
+            entities=entities,
+            topic=self.classify_topic(text),
+            confidence=round(confidence, 3),
+            high_impact=bool(self._high_impact.search(text)) or source in HIGH_IMPACT_SOURCES,
+        )
+
+    def should_escalate(self, analysis: LocalAnalysis) -> bool:
+        return analysis["high_impact"] or analysis["confidence"] < self.escalation_threshold
+
+
+def escalation_metrics(documents: int, escalated: int, llm_calls: int) -> Dict[str, float]:
+    """Summary of how much work the local tier kept away from Gemini."""
+    return {
+        "documents": documents,
+        "escalated": escalated,
+        "scored_locally": documents - escalated,
+        "escalation_rate": escalated / documents if documents else 0.0,
+        "llm_calls": llm_calls,
+    }
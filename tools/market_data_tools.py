@@ -1,25 +1,32 @@
-import random
+import hashlib
+
 from langchain_core.tools import tool
+from config import get_mock_data_seed
+from instrumentation import instrument_tool
 
 from graph_state import RawDocument
-from typing import List, Dict
+from tools.lexicon_scorer import get_market_scorer
+from tools.synthetic_data import SyntheticDataGenerator
+from typing import List, Dict, Optional
+
+NO_DATA_OUTCOME = "Indeterminate market movement due to lack of data."
+
+
+def _generator(seed: Optional[int]) -> SyntheticDataGenerator:
+    return SyntheticDataGenerator(seed=get_mock_data_seed() if seed is None else seed)
 
     
 @tool
-def get_mock_crypto_price_data(cryptocurrency_symbol: str) -> Dict:
+@instrument_tool
+def get_mock_crypto_price_data(cryptocurrency_symbol: str, seed: Optional[int] = None) -> Dict:
     """Simulates fetching current cryptocurrency price data."""
     
     print(f"--- TOOL: Mock Crypto Price for '{cryptocurrency_symbol}' ---")
-    price = random.uniform(1000, 60000)
-    change = random.uniform(-5, 5)
-    return {
-        "symbol": cryptocurrency_symbol,
-        "price": round(price, 2),
-        "24h_change_percent": round(change, 2)
-    }
+    return _generator(seed).price_data(cryptocurrency_symbol)
 
 @tool
-def get_mock_market_outcome(raw_documents: List[RawDocument]) -> str:
+@instrument_tool
+def get_mock_market_outcome(raw_documents: List[RawDocument], seed: Optional[int] = None) -> str:
     """
     Simulates a realistic market outcome 24 hours later based on the
     overall sentiment of the initial raw documents. This serves as the 'ground truth'
@@ -27,30 +34,39 @@ def get_mock_market_outcome(raw_documents: List[RawDocument]) -> str:
     """
     print("--- TOOL: Simulating Market Outcome (Ground Truth) ---")
     if not raw_documents:
-        return "Indeterminate market movement due to lack of data."
+        return NO_DATA_OUTCOME
 
     # A simple way to create a consistent "ground truth":
     # The real outcome is likely influenced by the real sentiment.
-    # We will simulate this by linking the outcome to the mock data content.
-    positive_indicators = ['great news', 'moon', 'bullish', 'future', '🚀']
-    negative_indicators = ['worried', 'scam', 'drop', 'sell', 'bearish']
-    
-    score = 0
-    for doc in raw_documents:
-        content_lower = doc['content'].lower()
-        for indicator in positive_indicators:
-            if indicator in content_lower:
-                score += 1
-        for indicator in negative_indicators:
-            if indicator in content_lower:
-                score -= 1
-    
+    # We will simulate this by linking the outcome to the mock data content,
+    # scored in a single pass per document by the compiled market lexicon.
+    scores = get_market_scorer().score_documents(doc['content'] for doc in raw_documents)
+    keyword = ",".join(sorted({doc.get('keyword') or "" for doc in raw_documents}))
+    return simulate_market_outcome(scores["total"], seed, keyword=keyword, documents=_documents_key(raw_documents))
+
+def _documents_key(raw_documents: List[RawDocument]) -> str:
+    """Order-independent fingerprint of a document set."""
+    digest = hashlib.sha1()
+    for entry in sorted(f"{doc.get('timestamp')}\x1f{doc['content']}" for doc in raw_documents):
+        digest.update(entry.encode("utf-8") + b"\x1e")
+    return digest.hexdigest()
+
+def simulate_market_outcome(score: float, seed: Optional[int] = None, keyword: str = "",
+                            documents: Optional[str] = None) -> str:
+    """
+    Outcome for a total market-lexicon `score` of the initial documents.
+    Streaming runs accumulate the score as documents pass instead of keeping them.
+    Seeded draws are keyed by `keyword` and `documents` (a key for the document
+    set; the score itself when not given), so each asset and window moves on its own.
+    """
+    generator = _generator(seed)
+    key = (keyword, f"{score:.6f}" if documents is None else documents)
     if score > 2:
-        price_change = random.uniform(3, 7)
+        price_change = generator.uniform(3, 7, "outcome", "positive", *key)
         return f"Positive price movement (+{price_change:.2f}%)"
     elif score < -2:
-        price_change = random.uniform(-7, -3)
+        price_change = generator.uniform(-7, -3, "outcome", "negative", *key)
         return f"Negative price movement ({price_change:.2f}%)"
     else:
-        price_change = random.uniform(-2, 2)
-        return f"Stable/Mixed price movement ({price_change:.2f}%)"
\ No newline at end of file
+        price_change = generator.uniform(-2, 2, "outcome", "stable", *key)
+        return f"Stable/Mixed price movement ({price_change:.2f}%)"
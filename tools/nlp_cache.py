@@ -0,0 +1,218 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from instrumentation import record_cache_lookup
+from config import (
+    get_nlp_cache_enabled,
+    get_nlp_cache_path,
+    get_nlp_cache_ttl_seconds,
+    get_nlp_cache_max_memory_entries,
+    get_nlp_cache_max_disk_entries,
+)
+
+_RETWEET_PREFIX = re.compile(r"^(rt\s+@\w+:\s*)+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_content(text: str) -> str:
+    """
+    Normalizes text so that retweets, reposts and whitespace or case variants
+    of the same message share one cache entry.
+    """
+    normalized = unicodedata.normalize("NFKC", text).casefold()
+    normalized = _WHITESPACE.sub(" ", normalized).strip()
+    return _RETWEET_PREFIX.sub("", normalized)
+
+
+def make_cache_key(text: str, prompt_version: str, model_name: str) -> str:
+    """Content-addressed key: the normalized text hash, scoped to a prompt and model version."""
+    digest = hashlib.sha256()
+    for part in (prompt_version, model_name, normalize_content(text)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class NLPResultCache:
+    """
+    Two-tier cache for NLP results: an in-memory LRU in front of an optional
+    SQLite table. Entries expire after `ttl_seconds`; both tiers are bounded
+    in size and evict least-recently-used entries first.
+    """
+    def __init__(self, path: Optional[str] = None, max_memory_entries: int = 4096,
+                 max_disk_entries: int = 200_000, ttl_seconds: float = 0, clock=time.time):
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.evictions = 0
+
+        self._db = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS nlp_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_nlp_cache_last_access ON nlp_cache (last_access)")
+            self._db.commit()
+            self._disk_entries = self._db.execute("SELECT COUNT(*) FROM nlp_cache").fetchone()[0]
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return bool(self.ttl_seconds) and now - created_at > self.ttl_seconds
+
+    def _remember(self, key: str, value: str, created_at: float) -> None:
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Returns a copy of the cached result, or None on a miss or an expired entry."""
+        result = self._lookup(key)
+        record_cache_lookup("nlp", result is not None)
+        return result
+
+    def _lookup(self, key: str) -> Optional[Dict]:
+        now = self._clock()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if not self._is_expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    self.memory_hits += 1
+                    return json.loads(value)
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created_at FROM nlp_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, created_at = row
+                    if not self._is_expired(created_at, now):
+                        self._db.execute("UPDATE nlp_cache SET last_access = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        self._remember(key, value, created_at)
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return json.loads(value)
+                    self._db.execute("DELETE FROM nlp_cache WHERE key = ?", (key,))
+                    self._db.commit()
+                    self._disk_entries -= 1
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, result: Dict) -> None:
+        """Stores a result in both tiers, evicting old entries when a tier is full."""
+        now = self._clock()
+        value = json.dumps(result)
+        with self._lock:
+            self._remember(key, value, now)
+            if self._db is None:
+                return
+            self._db.execute(
+                "INSERT OR REPLACE INTO nlp_cache (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            # Replacements over-count here; _evict_disk re-counts before deleting anything.
+            self._disk_entries += 1
+            if self._disk_entries > self.max_disk_entries:
+                self._evict_disk(now)
+            self._db.commit()
+
+    def _evict_disk(self, now: float) -> None:
+        # Drop expired rows first, then the least recently used ones. Evicting a
+        # tenth of the table at a time keeps the delete off the hot path.
+        if self.ttl_seconds:
+            self._db.execute("DELETE FROM nlp_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        self._disk_entries = self._db.execute("SELECT COUNT(*) FROM nlp_cache").fetchone()[0]
+        overflow = self._disk_entries - self.max_disk_entries
+        if overflow > 0:
+            to_delete = overflow + self.max_disk_entries // 10
+            self._db.execute(
+                "DELETE FROM nlp_cache WHERE key IN "
+                "(SELECT key FROM nlp_cache ORDER BY last_access LIMIT ?)", (to_delete,)
+            )
+            self.evictions += to_delete
+            self._disk_entries = self._db.execute("SELECT COUNT(*) FROM nlp_cache").fetchone()[0]
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters for monitoring."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": self._disk_entries if self._db is not None else 0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM nlp_cache")
+                self._db.commit()
+                self._disk_entries = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_shared_cache: Optional[NLPResultCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_nlp_cache() -> Optional[NLPResultCache]:
+    """Returns the process-wide NLP cache, or None when NLP_CACHE_ENABLED is off."""
+    global _shared_cache
+    if not get_nlp_cache_enabled():
+        return None
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = NLPResultCache(
+                path=get_nlp_cache_path() or None,
+                max_memory_entries=get_nlp_cache_max_memory_entries(),
+                max_disk_entries=get_nlp_cache_max_disk_entries(),
+                ttl_seconds=get_nlp_cache_ttl_seconds(),
+            )
+        return _shared_cache
+
+
+def reset_nlp_cache() -> None:
+    """Closes the shared cache so the next caller re-reads the cache settings."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is not None:
+            _shared_cache.close()
+        _shared_cache = None
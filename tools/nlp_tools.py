@@ -1,15 +1,22 @@
 
 from langchain_core.tools import tool
-from config import get_gemini_api_key
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
-import google.generativeai as genai
+from instrumentation import instrument_tool
+from llm_client import get_llm_client
+from tools.nlp_cache import get_nlp_cache, make_cache_key
+from tools.lexicon_scorer import lexicon_sentiment_result
+from tools.prompt_builder import PromptTemplate, truncate_to_tokens
+from config import get_prompt_max_document_tokens
+from typing import Dict, List
 import json
 import re
 
 
-genai.configure(api_key=get_gemini_api_key())
-model = genai.GenerativeModel('gemini-2.0-flash')
+MODEL_NAME = 'gemini-2.0-flash'
+# Bump whenever the analysis prompts change so cached results are not reused.
+PROMPT_VERSION = 'nlp-v2'
+
+# Shared pooled client; it retries, rate-limits and accounts for every call.
+model = get_llm_client(MODEL_NAME)
 
 def extract_json_from_response(response_text: str) -> dict:
     """
@@ -27,7 +34,65 @@ def extract_json_from_response(response_text: str) -> dict:
     return json.loads(json_str)
 
 
+def extract_json_array_from_response(response_text: str) -> list:
+    """
+    Extracts a JSON array from Gemini's response, even if wrapped in markdown code blocks.
+    """
+    code_block_match = re.search(r"```(?:json)?\s*(\[.*?\])\s*```", response_text, re.DOTALL)
+    if code_block_match:
+        json_str = code_block_match.group(1)
+    else:
+        json_match = re.search(r"(\[.*\])", response_text, re.DOTALL)
+        json_str = json_match.group(1) if json_match else response_text
+    parsed = json.loads(json_str)
+    if not isinstance(parsed, list):
+        raise ValueError("Gemini batch response is not a JSON array.")
+    return parsed
+
+
+TOPIC_CATEGORIES = [
+    "Technology Update", "Price Speculation", "Regulation",
+    "Community Discussion", "Partnership News", "General Market Trend"
+]
+
+REQUIRED_NLP_KEYS = ['sentiment_score', 'sentiment_label', 'entities', 'topic']
+
+NLP_PROMPT = PromptTemplate("nlp", (
+    "You are a precise financial NLP model. Analyze the following text and return a JSON object with four keys:\n"
+    "1. 'sentiment_score': A float from -1.0 (very negative) to 1.0 (very positive).\n"
+    "2. 'sentiment_label': A string ('Positive', 'Negative', 'Neutral').\n"
+    "3. 'entities': A list of key strings (crypto names, projects, events).\n"
+    f"4. 'topic': Classify the text into ONE of the following categories: {TOPIC_CATEGORIES}.\n\n"
+    "Respond ONLY with the JSON object.\n\n"
+    "Text to analyze: "
+))
+
+BATCH_PROMPT = PromptTemplate("nlp-batch", (
+    "You are a precise financial NLP model. Analyze EACH of the following documents independently.\n"
+    "Return a JSON array with exactly one object per document. Every object must have five keys:\n"
+    "1. 'id': The id of the document, copied verbatim.\n"
+    "2. 'sentiment_score': A float from -1.0 (very negative) to 1.0 (very positive).\n"
+    "3. 'sentiment_label': A string ('Positive', 'Negative', 'Neutral').\n"
+    "4. 'entities': A list of key strings (crypto names, projects, events).\n"
+    f"5. 'topic': Classify the text into ONE of the following categories: {TOPIC_CATEGORIES}.\n\n"
+    "Respond ONLY with the JSON array.\n\n"
+    "Documents to analyze (one JSON object per line):\n"
+))
+
+
+def validate_nlp_result(response_json: Dict) -> Dict:
+    """Checks the required keys and coerces score and entities into the expected types."""
+    if not all(k in response_json for k in REQUIRED_NLP_KEYS):
+        raise ValueError("Gemini response missing required keys.")
+    if not isinstance(response_json['sentiment_score'], (float, int)):
+        response_json['sentiment_score'] = float(response_json['sentiment_score'])
+    if not isinstance(response_json['entities'], list):
+        response_json['entities'] = [str(response_json['entities'])]
+    return response_json
+
+
 @tool
+@instrument_tool
 def analyze_text_deeply(text_content: str) -> dict:
     """
     Analyzes text for sentiment, key entities, and topic using Gemini.
@@ -35,41 +100,115 @@ def analyze_text_deeply(text_content: str) -> dict:
     'entities', and 'topic'.
     """
     print(f"--- TOOL: Deep NLP Analysis for text: '{text_content[:50]}...' ---")
-    
-    topic_categories = [
-        "Technology Update", "Price Speculation", "Regulation", 
-        "Community Discussion", "Partnership News", "General Market Trend"
-    ]
-    
-    prompt = (
-        "You are a precise financial NLP model. Analyze the following text and return a JSON object with four keys:\n"
-        "1. 'sentiment_score': A float from -1.0 (very negative) to 1.0 (very positive).\n"
-        "2. 'sentiment_label': A string ('Positive', 'Negative', 'Neutral').\n"
-        "3. 'entities': A list of key strings (crypto names, projects, events).\n"
-        f"4. 'topic': Classify the text into ONE of the following categories: {topic_categories}.\n\n"
-        "Respond ONLY with the JSON object.\n\n"
-        f"Text to analyze: {text_content}"
-    )
+
+    cache = get_nlp_cache()
+    cache_key = make_cache_key(text_content, PROMPT_VERSION, MODEL_NAME) if cache else None
+    if cache:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    text, truncated = truncate_to_tokens(text_content, get_prompt_max_document_tokens())
+    prompt = NLP_PROMPT.render(text, truncated=int(truncated))
 
     try:
         response = model.generate_content(prompt)
         response_text = response.text.strip()
         response_json = extract_json_from_response(response_text)
         # Basic validation
-        required_keys = ['sentiment_score', 'sentiment_label', 'entities', 'topic']
-        if not all(k in response_json for k in required_keys):
-            raise ValueError("Gemini response missing required keys.")
-        if not isinstance(response_json['sentiment_score'], (float, int)):
-            response_json['sentiment_score'] = float(response_json['sentiment_score'])
-        if not isinstance(response_json['entities'], list):
-            response_json['entities'] = [str(response_json['entities'])]
-        return response_json
+        result = validate_nlp_result(response_json)
+        if cache:
+            cache.put(cache_key, result)
+        return result
+    except Exception as e:
+        print(f"Error in deep NLP tool: {e}. Falling back to the local lexicon scorer.")
+        return lexicon_sentiment_result(text_content)
+
+
+def _build_batch_prompt(items: Dict[str, str]) -> str:
+    max_tokens = get_prompt_max_document_tokens()
+    lines, truncated = [], 0
+    for doc_id, text in items.items():
+        text, cut = truncate_to_tokens(text, max_tokens)
+        truncated += cut
+        lines.append(json.dumps({"id": doc_id, "text": text}, ensure_ascii=False))
+    return BATCH_PROMPT.render("\n".join(lines), truncated=truncated)
+
+
+def _analyze_batch_once(items: Dict[str, str]) -> Dict[str, Dict]:
+    """
+    Sends one batch prompt and returns the valid results keyed by document id.
+    Entries that are missing, malformed or carry unknown ids are simply left out.
+    """
+    try:
+        response = model.generate_content(_build_batch_prompt(items))
+        parsed = extract_json_array_from_response(response.text.strip())
     except Exception as e:
-        print(f"Error in deep NLP tool: {e}. Falling back to neutral.")
-        return {
-            "sentiment_score": 0.0,
-            "sentiment_label": "Neutral",
-            "entities": [],
-            "topic": "Unclassified"
-        }
+        print(f"Error in batch NLP call: {e}.")
+        return {}
+
+    results = {}
+    for entry in parsed:
+        if not isinstance(entry, dict):
+            continue
+        doc_id = str(entry.pop("id", ""))
+        if doc_id not in items or doc_id in results:
+            continue
+        try:
+            results[doc_id] = validate_nlp_result(entry)
+        except (ValueError, TypeError) as e:
+            print(f"Discarding malformed batch result for id {doc_id}: {e}")
+    return results
+
+
+@tool
+@instrument_tool
+def analyze_texts_batch(texts: List[str], max_retries: int = 2) -> List[Dict]:
+    """
+    Analyzes several texts with a single Gemini prompt.
+    Returns one result per input text, in input order, with the same keys as
+    analyze_text_deeply. Only the ids missing from a partially malformed reply
+    are retried; texts that still fail fall back to the local lexicon scorer.
+    """
+    print(f"--- TOOL: Batched Deep NLP Analysis for {len(texts)} texts ---")
+    cache = get_nlp_cache()
+    results: Dict[str, Dict] = {}
+    pending: Dict[str, str] = {}
+    # Identical texts (after normalization) are sent once and share the result.
+    key_to_id: Dict[str, str] = {}
+    id_aliases: Dict[str, str] = {}
+    for i, text in enumerate(texts):
+        doc_id = f"doc-{i}"
+        cache_key = make_cache_key(text, PROMPT_VERSION, MODEL_NAME)
+        if cache_key in key_to_id:
+            id_aliases[doc_id] = key_to_id[cache_key]
+            continue
+        key_to_id[cache_key] = doc_id
+        cached = cache.get(cache_key) if cache else None
+        if cached is not None:
+            results[doc_id] = cached
+        else:
+            pending[doc_id] = text
+    id_to_key = {doc_id: cache_key for cache_key, doc_id in key_to_id.items()}
+
+    for attempt in range(max_retries + 1):
+        if not pending:
+            break
+        if attempt:
+            print(f"Retrying {len(pending)} missing batch ids (attempt {attempt}/{max_retries}).")
+        batch_results = _analyze_batch_once(pending)
+        results.update(batch_results)
+        if cache:
+            for doc_id, result in batch_results.items():
+                cache.put(id_to_key[doc_id], result)
+        pending = {doc_id: text for doc_id, text in pending.items() if doc_id not in batch_results}
+
+    if pending:
+        print(f"{len(pending)} batch ids could not be analyzed. Falling back to the local lexicon scorer.")
+    ordered = []
+    for i in range(len(texts)):
+        doc_id = id_aliases.get(f"doc-{i}", f"doc-{i}")
+        result = results.get(doc_id)
+        ordered.append(dict(result) if result else lexicon_sentiment_result(texts[i]))
+    return ordered
 
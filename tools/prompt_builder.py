@@ -0,0 +1,43 @@
+"""
+Prompt assembly for the Gemini calls. Every prompt is a fixed instruction
+prefix, built once per process, followed by the per-call input. Keeping the
+byte-identical part first makes it eligible for the provider's prefix
+caching and keeps the variable part small. Input text is cut to a token
+limit before it is sent.
+"""
+import re
+from typing import Tuple
+
+from instrumentation import record_prompt
+from llm_client import CHARS_PER_TOKEN, count_tokens
+
+ELLIPSIS = " [...]"
+_TRAILING_PARTIAL_WORD = re.compile(r"\s+\S*$")
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> Tuple[str, bool]:
+    """
+    Cuts `text` to about `max_tokens` tokens, at a word boundary where one
+    is close, and marks the cut. Returns the text and whether it was cut.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text, False
+    max_chars = max(1, max_tokens * CHARS_PER_TOKEN - len(ELLIPSIS))
+    head = text[:max_chars]
+    word_boundary = _TRAILING_PARTIAL_WORD.sub("", head)
+    if len(word_boundary) >= max_chars * 0.8:
+        head = word_boundary
+    return head.rstrip() + ELLIPSIS, True
+
+
+class PromptTemplate:
+    """A static instruction prefix that each call completes with its own input."""
+    def __init__(self, name: str, prefix: str):
+        self.name = name
+        self.prefix = prefix
+        self.prefix_tokens = count_tokens(prefix)
+
+    def render(self, body: str, truncated: int = 0) -> str:
+        """The prompt for one call; `truncated` counts the texts cut to fit `body`."""
+        record_prompt(self.name, self.prefix_tokens, count_tokens(body), truncated)
+        return self.prefix + body
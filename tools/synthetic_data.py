@@ -0,0 +1,267 @@
+"""
+Seeded synthetic crypto chatter for the mock tools, tests and load tests.
+
+All random draws for a chunk of documents are made at once with NumPy, so
+millions of documents can be generated and streamed to JSONL (optionally
+gzipped) in seconds. The same seed and parameters always give the same
+documents.
+
+    python -m tools.synthetic_data --count 1000000 --output corpus.jsonl.gz --seed 42 --end 2024-01-01T00:00:00
+"""
+import argparse
+import datetime
+import gzip
+import json
+import zlib
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from graph_state import RawDocument
+
+SOURCES = ("X", "Reddit", "NewsOutlet")
+SENTIMENTS = ("positive", "negative", "neutral", "mixed")
+DEFAULT_KEYWORDS = ("Bitcoin", "Ethereum", "Solana", "Cardano", "Dogecoin")
+DEFAULT_SOURCE_MIX = {"X": 0.6, "Reddit": 0.3, "NewsOutlet": 0.1}
+DEFAULT_SENTIMENT_MIX = {"positive": 0.35, "negative": 0.3, "neutral": 0.25, "mixed": 0.1}
+DEFAULT_WINDOW_SECONDS = 7 * 24 * 3600
+CHUNK_SIZE = 65536
+
+# {kw}: keyword, {tag}: keyword as a hashtag, {n}/{pct}: numbers, {actor}/{event}/{subreddit}: vocabulary below.
+TEMPLATES: Dict[str, Dict[str, Sequence[str]]] = {
+    "X": {
+        "positive": (
+            "Great news for #{tag}! To the moon! 🚀 #{tag}IsTheFuture",
+            "#{tag} just broke {n}k, bullish breakout confirmed 🚀",
+            "Stacking more #{tag} every dip. {actor} are accumulating too. #HODL",
+            "Big one: {event} is huge for #{tag}. Rally incoming, up {pct}% already 📈",
+        ),
+        "negative": (
+            "Worried about #{tag} price drop. Is it a scam? #Sell{tag}",
+            "#{tag} dumping hard, down {pct}% today. Rug pull vibes 📉",
+            "Seeing {actor} selling their #{tag} bags after {event}. Bearish.",
+            "Another hack rumor around #{tag}. Getting out before the crash.",
+        ),
+        "neutral": (
+            "Just observing #{tag} market movements. #Crypto",
+            "#{tag} volume at {n}M today. Waiting for a clear direction.",
+            "Anyone following {event} news for #{tag}?",
+        ),
+        "mixed": (
+            "#{tag} up {pct}% but {actor} keep selling. Not sure what to make of it.",
+            "Bullish on #{tag} long term, bearish short term after {event}.",
+        ),
+    },
+    "Reddit": {
+        "positive": (
+            "Discussion about {kw} on r/{subreddit}. Adoption keeps growing and {actor} are buying. Bullish.",
+            "{kw} fundamentals look stronger than ever after {event}. Long-term holder here.",
+        ),
+        "negative": (
+            "PSA on r/{subreddit}: {kw} unlock of {n}M tokens next week, expect a dump.",
+            "Lost {pct}% on {kw} this month. The {event} hype was a trap.",
+        ),
+        "neutral": (
+            "Discussion about {kw} on r/{subreddit}. Some say it's bullish, others bearish. What are your thoughts on {kw}?",
+            "Daily {kw} thread on r/{subreddit}: {n} comments so far, what are you watching?",
+        ),
+        "mixed": (
+            "{kw} tech is great but {actor} dumping after {event} worries me.",
+            "Up {pct}% on {kw} this year, down {pct}% this week. Holding for now.",
+        ),
+    },
+    "NewsOutlet": {
+        "positive": (
+            "{kw} rallies {pct}% as {actor} pile in following {event}.",
+            "Analysts upgrade {kw} outlook after {event}; inflows reach ${n}M.",
+        ),
+        "negative": (
+            "{kw} slides {pct}% after {event}; {actor} report ${n}M in outflows.",
+            "Regulators open probe into {kw} trading following {event}.",
+        ),
+        "neutral": (
+            "Major financial news outlet reports on {kw}. Experts predict potential volatility for {kw} in the coming weeks.",
+            "{kw} trades flat ahead of {event}; volume steady at ${n}M.",
+        ),
+        "mixed": (
+            "{kw} mixed after {event}: {actor} buy while miners sell.",
+        ),
+    },
+}
+ACTORS = ("whales", "institutions", "retail traders", "miners", "hedge funds", "early holders")
+EVENTS = ("the ETF decision", "the network upgrade", "the Fed meeting", "the exchange listing",
+          "the halving", "the SEC lawsuit", "the mainnet launch", "the token unlock")
+SUBREDDITS = ("cryptocurrency", "CryptoMarkets", "defi", "altcoin")
+
+_SOURCE_INDEX = {source: i for i, source in enumerate(SOURCES)}
+_FLAT_TEMPLATES: List[str] = []
+_GROUP_OFFSETS = np.zeros((len(SOURCES), len(SENTIMENTS)), dtype=np.int64)
+_GROUP_SIZES = np.zeros((len(SOURCES), len(SENTIMENTS)), dtype=np.int64)
+for _s, _source in enumerate(SOURCES):
+    for _t, _sentiment in enumerate(SENTIMENTS):
+        _GROUP_OFFSETS[_s, _t] = len(_FLAT_TEMPLATES)
+        _GROUP_SIZES[_s, _t] = len(TEMPLATES[_source][_sentiment])
+        _FLAT_TEMPLATES.extend(TEMPLATES[_source][_sentiment])
+
+
+def _stable_hash(value: str) -> int:
+    return zlib.crc32(value.encode("utf-8"))
+
+
+def _probabilities(mix: Dict[str, float], names: Sequence[str]) -> np.ndarray:
+    weights = np.array([max(0.0, float(mix.get(name, 0.0))) for name in names])
+    if weights.sum() <= 0:
+        raise ValueError(f"Mix {mix!r} gives no weight to any of {list(names)}.")
+    return weights / weights.sum()
+
+
+def _parse_end(end) -> datetime.datetime:
+    if end is None:
+        # Naive timestamps are UTC throughout the pipeline.
+        return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None, microsecond=0)
+    if isinstance(end, str):
+        return datetime.datetime.fromisoformat(end)
+    return end
+
+
+class SyntheticDataGenerator:
+    """
+    Generates RawDocuments from templated vocabulary with a configurable
+    source and sentiment mix, timestamped over the `window_seconds` before
+    `end` (default: now). With `seed=None` every call draws fresh entropy.
+    """
+    def __init__(self, seed: Optional[int] = None, keywords: Sequence[str] = DEFAULT_KEYWORDS,
+                 source_mix: Optional[Dict[str, float]] = None, sentiment_mix: Optional[Dict[str, float]] = None,
+                 window_seconds: int = DEFAULT_WINDOW_SECONDS, end=None):
+        if not keywords:
+            raise ValueError("At least one keyword is required.")
+        self.seed = seed
+        self.keywords = list(keywords)
+        self.source_p = _probabilities(source_mix or DEFAULT_SOURCE_MIX, SOURCES)
+        self.sentiment_p = _probabilities(sentiment_mix or DEFAULT_SENTIMENT_MIX, SENTIMENTS)
+        self.window_seconds = max(1, int(window_seconds))
+        self.end = end
+
+    def _rng(self, *key) -> np.random.Generator:
+        if self.seed is None:
+            return np.random.default_rng()
+        return np.random.default_rng([self.seed, *key])
+
+    def _render(self, rng: np.random.Generator, keywords: Sequence[str], keyword_idx: np.ndarray,
+                source_idx: np.ndarray, subreddits: Optional[Sequence[str]] = None) -> List[RawDocument]:
+        """Draws sentiments, templates, fillers and timestamps for the given keywords/sources in bulk."""
+        count = len(keyword_idx)
+        sentiment_idx = rng.choice(len(SENTIMENTS), size=count, p=self.sentiment_p)
+        template_idx = _GROUP_OFFSETS[source_idx, sentiment_idx] + (
+            rng.random(count) * _GROUP_SIZES[source_idx, sentiment_idx]).astype(np.int64)
+        numbers = rng.integers(1, 1000, size=count)
+        percents = rng.integers(1, 40, size=count)
+        actors = rng.integers(0, len(ACTORS), size=count)
+        events = rng.integers(0, len(EVENTS), size=count)
+        if subreddits is None:
+            subreddit_idx = rng.integers(0, len(SUBREDDITS), size=count)
+            subreddits = SUBREDDITS
+        else:
+            subreddit_idx = np.zeros(count, dtype=np.int64)
+        end = np.datetime64(_parse_end(self.end), "s")
+        offsets = rng.integers(0, self.window_seconds, size=count).astype("timedelta64[s]")
+        timestamps = np.datetime_as_string(end - offsets, unit="s")
+
+        tags = [keyword.replace(" ", "") for keyword in keywords]
+        return [
+            {
+                "source": SOURCES[s],
+                "content": _FLAT_TEMPLATES[t].format(
+                    kw=keywords[k], tag=tags[k], n=n, pct=p, actor=ACTORS[a], event=EVENTS[e], subreddit=subreddits[r]),
+                "timestamp": str(ts),
+                "keyword": keywords[k],
+            }
+            for k, s, t, n, p, a, e, r, ts in zip(
+                keyword_idx.tolist(), source_idx.tolist(), template_idx.tolist(), numbers.tolist(),
+                percents.tolist(), actors.tolist(), events.tolist(), subreddit_idx.tolist(), timestamps.tolist())
+        ]
+
+    def documents(self, keyword: str, source: str, count: int, subreddit: Optional[str] = None) -> List[RawDocument]:
+        """
+        `count` documents for one keyword from one source, as the mock search
+        tools return them. Seeded results depend only on (seed, keyword,
+        source), not on call order, so concurrent searches stay reproducible.
+        """
+        if source not in _SOURCE_INDEX:
+            raise ValueError(f"Unknown source {source!r}; expected one of {SOURCES}.")
+        if count <= 0:
+            return []
+        rng = self._rng(_stable_hash(keyword), _stable_hash(source))
+        return self._render(rng, [keyword], np.zeros(count, dtype=np.int64),
+                            np.full(count, _SOURCE_INDEX[source], dtype=np.int64),
+                            [subreddit] if subreddit else None)
+
+    def generate_chunk(self, index: int, size: int = CHUNK_SIZE) -> List[RawDocument]:
+        """Chunk number `index` of the bulk stream, mixing all keywords and sources."""
+        rng = self._rng(index)
+        keyword_idx = rng.integers(0, len(self.keywords), size=size)
+        source_idx = rng.choice(len(SOURCES), size=size, p=self.source_p)
+        return self._render(rng, self.keywords, keyword_idx, source_idx)
+
+    def iter_documents(self, total: int) -> Iterator[List[RawDocument]]:
+        """Yields `total` documents in chunks of at most CHUNK_SIZE; memory stays bounded by one chunk."""
+        for index, start in enumerate(range(0, total, CHUNK_SIZE)):
+            yield self.generate_chunk(index, min(CHUNK_SIZE, total - start))
+
+    def generate(self, total: int) -> List[RawDocument]:
+        """`total` documents as one list."""
+        return [document for chunk in self.iter_documents(total) for document in chunk]
+
+    def price_data(self, symbol: str) -> Dict:
+        """Simulated current price and 24h change for `symbol`."""
+        rng = self._rng(_stable_hash(symbol), _stable_hash("price"))
+        return {
+            "symbol": symbol,
+            "price": round(float(rng.uniform(1000, 60000)), 2),
+            "24h_change_percent": round(float(rng.uniform(-5, 5)), 2),
+        }
+
+    def uniform(self, low: float, high: float, *key: str) -> float:
+        """One draw in [low, high), seeded by `key` when the generator has a seed."""
+        return float(self._rng(*(_stable_hash(part) for part in key)).uniform(low, high))
+
+
+def _open(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def write_jsonl(path: str, total: int, generator: SyntheticDataGenerator) -> int:
+    """Streams `total` generated documents to `path` as JSON lines (gzipped for *.gz). Returns the count."""
+    written = 0
+    with _open(path, "w") as handle:
+        for chunk in generator.iter_documents(total):
+            handle.write("\n".join(json.dumps(document) for document in chunk))
+            handle.write("\n")
+            written += len(chunk)
+    return written
+
+
+def read_jsonl(path: str) -> Iterator[RawDocument]:
+    """Streams documents back from a file written by write_jsonl."""
+    with _open(path, "r") as handle:
+        for line in handle:
+            if line.strip():
+                yield json.loads(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a seeded synthetic corpus as JSON lines.")
+    parser.add_argument("--count", type=int, required=True)
+    parser.add_argument("--output", required=True, help="Target file; a .gz suffix gzips it.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keywords", default=",".join(DEFAULT_KEYWORDS))
+    parser.add_argument("--window-hours", type=float, default=DEFAULT_WINDOW_SECONDS / 3600)
+    parser.add_argument("--end", help="ISO timestamp of the newest document (default: now). Fix it for identical files.")
+    args = parser.parse_args()
+
+    generator = SyntheticDataGenerator(
+        seed=args.seed, keywords=[keyword.strip() for keyword in args.keywords.split(",") if keyword.strip()],
+        window_seconds=int(args.window_hours * 3600), end=args.end)
+    print(f"Wrote {write_jsonl(args.output, args.count, generator)} documents to {args.output}")
@@ -1,63 +1,50 @@
-
-import datetime
-import random
 from langchain_core.tools import tool
-from typing import List, Dict 
+from config import get_mock_data_end, get_mock_data_seed
+from instrumentation import instrument_tool
+from tools.synthetic_data import SyntheticDataGenerator
+from typing import List, Dict, Optional
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+
+def _generator(seed: Optional[int], window_seconds: int) -> SyntheticDataGenerator:
+    """
+    Mock data generator; `seed` falls back to MOCK_DATA_SEED (unset = unseeded).
+    Seeded generators also stamp their documents relative to the fixed
+    MOCK_DATA_END instead of now, so the same query returns identical documents.
+    """
+    seed = get_mock_data_seed() if seed is None else seed
+    end = get_mock_data_end() if seed is not None else None
+    return SyntheticDataGenerator(seed=seed, window_seconds=window_seconds, end=end)
 
 @tool
-def search_x_mock(keyword: str, count: int = 5) -> List[Dict]:
+@instrument_tool
+def search_x_mock(keyword: str, count: int = 5, seed: Optional[int] = None) -> List[Dict]:
     """
     Simulates searching X (Twitter) for a keyword.
-    Returns a list of mock tweets.
+    Returns a list of mock tweets from the last day.
     """
     print(f"--- TOOL: Mock X Search for '{keyword}' ---")
-    tweets = []
-    for i in range(count):
-        sentiment_type = random.choice(["positive", "negative", "neutral"])
-        if sentiment_type == "positive":
-            text = f"Great news for #{keyword}! To the moon! 🚀 #{keyword}IsTheFuture"
-        elif sentiment_type == "negative":
-            text = f"Worried about #{keyword} price drop. Is it a scam? #Sell{keyword}"
-        else:
-            text = f"Just observing #{keyword} market movements. #Crypto"
-        tweets.append({
-            "source": "X",
-            "content": text,
-            "timestamp": (datetime.datetime.now() - datetime.timedelta(hours=i)).isoformat(),
-            "keyword": keyword
-        })
-    return tweets
+    return _generator(seed, DAY).documents(keyword, "X", count)
 
 @tool
-def search_reddit_mock(keyword: str, subreddit: str = "cryptocurrency", count: int = 3) -> List[Dict]:
+@instrument_tool
+def search_reddit_mock(keyword: str, subreddit: str = "cryptocurrency", count: int = 3,
+                       seed: Optional[int] = None) -> List[Dict]:
     """
     Simulates searching Reddit for a keyword in a specific subreddit.
-    Returns a list of mock Reddit posts.
+    Returns a list of mock Reddit posts from the last week.
     """
     print(f"--- TOOL: Mock Reddit Search for '{keyword}' in r/{subreddit} ---")
-    posts = []
-    for i in range(count):
-        posts.append({
-            "source": "Reddit",
-            "content": f"Discussion about {keyword} on r/{subreddit}. Some say it's bullish, others bearish. What are your thoughts on {keyword}?",
-            "timestamp": (datetime.datetime.now() - datetime.timedelta(days=i)).isoformat(),
-            "keyword": keyword
-        })
-    return posts
+    return _generator(seed, 7 * DAY).documents(keyword, "Reddit", count, subreddit=subreddit)
 
 @tool
-def search_news_mock(keyword: str, count: int = 2) -> List[Dict]:
+@instrument_tool
+def search_news_mock(keyword: str, count: int = 2, seed: Optional[int] = None) -> List[Dict]:
     """
     Simulates searching news articles for a keyword.
-    Returns a list of mock news articles.
+    Returns a list of mock news articles from the last two weeks.
     """
     print(f"--- TOOL: Mock News Search for '{keyword}' ---")
-    articles = []
-    for i in range(count):
-        articles.append({
-            "source": "NewsOutlet",
-            "content": f"Major financial news outlet reports on {keyword}. Experts predict potential volatility for {keyword} in the coming weeks.",
-            "timestamp": (datetime.datetime.now() - datetime.timedelta(days=i*2)).isoformat(),
-            "keyword": keyword
-        })
-    return articles
\ No newline at end of file
+    return _generator(seed, 14 * DAY).documents(keyword, "NewsOutlet", count)